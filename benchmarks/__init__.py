@@ -0,0 +1,9 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+Benchmarks of the hot paths of hatch-msgfmt-s-ball.
+
+They run offline on deterministic synthetic catalogs: use
+`python -m benchmarks --help` for the command line interface.
+"""
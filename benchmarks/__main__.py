@@ -0,0 +1,61 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+Command line interface of the benchmarks.
+
+The exit code is 1 when a baseline is given and a benchmark regressed.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional
+
+from . import runner
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Run the benchmarks, print a report and compare with a baseline
+
+    :param argv: the command line arguments (default sys.argv[1:])
+    :return: the exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks of the hot paths of hatch-msgfmt-s-ball",
+    )
+    parser.add_argument("-k", dest="names", action="append",
+                        help="regular expression selecting benchmarks"
+                             " (may be repeated)")
+    parser.add_argument("--quick", action="store_true",
+                        help="small catalogs and few runs (smoke test)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="scale factor of the generated catalogs")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of timed runs of every benchmark")
+    parser.add_argument("--save", type=Path, help="save the results as a baseline")
+    parser.add_argument("--baseline", type=Path,
+                        help="fail if slower or bigger than this baseline")
+    parser.add_argument("--threshold", type=float, default=runner.DEFAULT_THRESHOLD,
+                        help="allowed relative regression (default %(default)s)")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.scale, args.repeat = args.scale * 0.02, 1
+
+    results = runner.run(args.names, args.scale, args.repeat)
+    print(runner.report(results))
+    if args.save:
+        runner.save(results, args.save)
+    if args.baseline:
+        regressions = runner.compare(results, args.baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+Deterministic generators of synthetic catalogs for the benchmarks.
+
+The same parameters always give the same bytes, so that the timings of
+two runs (or of two versions of the code) can be compared.
+"""
+
+import random
+from pathlib import Path
+from typing import Optional
+
+# words by charset: every word must be encodable in its charset
+WORDS = {
+    "UTF-8": ["fichier", "éléphant", "naïve", "Ωμέγα", "значение", "日本語", "ça"],
+    "ISO-8859-1": ["fichier", "éléphant", "naïve", "ça", "größe", "año"],
+    "KOI8-R": ["файл", "значение", "строка", "ошибка", "окно"],
+}
+ASCII_WORDS = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog",
+               "open", "file", "%s", "{name}", "Cancel", "OK", 'say \\"hi\\"',
+               "tab\\t", "line\\n"]
+
+
+def _wrap(keyword: str, text: str, multiline: bool) -> list[str]:
+    # A .po statement, possibly wrapped on many lines as msgmerge does
+    if not multiline:
+        return [f'{keyword} "{text}"']
+    lines = [f'{keyword} ""']
+    words = text.split(" ")
+    for i in range(0, len(words), 8):
+        chunk = " ".join(words[i:i + 8])
+        lines.append(f'"{chunk} "' if i + 8 < len(words) else f'"{chunk}"')
+    return lines
+
+
+def po_content(
+    entries: int = 1000,
+    seed: int = 0,
+    charset: str = "UTF-8",
+    plural: float = 0.1,
+    context: float = 0.1,
+    multiline: float = 0.2,
+    fuzzy: float = 0.05,
+    language: str = "fr",
+) -> bytes:
+    """
+    Build the content of a synthetic .po file
+
+    :param entries: the number of entries
+    :param seed: the seed of the random generator
+    :param charset: the charset declared in the header (a key of WORDS)
+    :param plural: the ratio of entries with plural forms
+    :param context: the ratio of entries with a msgctxt
+    :param multiline: the ratio of long entries wrapped on many lines
+    :param fuzzy: the ratio of fuzzy entries
+    :param language: the language declared in the header
+    :return: the content of the .po file encoded in its charset
+    """
+    rnd = random.Random(seed)
+    translated = WORDS[charset] + ASCII_WORDS
+
+    def text(pool: list[str], long: bool) -> str:
+        count = rnd.randint(20, 60) if long else rnd.randint(1, 8)
+        return " ".join(rnd.choice(pool) for _ in range(count))
+
+    lines = [
+        "# Synthetic catalog for the hatch-msgfmt-s-ball benchmarks",
+        'msgid ""',
+        'msgstr ""',
+        '"Project-Id-Version: bench 1.0\\n"',
+        f'"Language: {language}\\n"',
+        '"MIME-Version: 1.0\\n"',
+        f'"Content-Type: text/plain; charset={charset}\\n"',
+        '"Content-Transfer-Encoding: 8bit\\n"',
+        '"Plural-Forms: nplurals=2; plural=(n > 1);\\n"',
+        "",
+    ]
+    for i in range(entries):
+        long = rnd.random() < multiline
+        lines.append(f"#: src/module{i % 97}.py:{i}")
+        if rnd.random() < fuzzy:
+            lines.append("#, fuzzy, python-format")
+        if rnd.random() < context:
+            lines.append(f'msgctxt "context {i % 13}"')
+        msgid = f"{text(ASCII_WORDS, long)} {i}"
+        lines += _wrap("msgid", msgid, long)
+        if rnd.random() < plural:
+            lines += _wrap("msgid_plural", msgid + "s", long)
+            lines += _wrap("msgstr[0]", text(translated, long), long)
+            lines += _wrap("msgstr[1]", text(translated, long), long)
+        else:
+            lines += _wrap("msgstr", text(translated, long), long)
+        lines.append("")
+    return "\n".join(lines).encode(charset)
+
+
+def language_codes(count: int) -> list[str]:
+    """
+    Deterministic list of language codes matching the plugin naming rules
+
+    :param count: the number of codes
+    :return: codes like aa, ab, ... and regional variants like fr_CA
+    """
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    codes = []
+    for i in range(count):
+        code = letters[i // 26 % 26] + letters[i % 26]
+        if i % 5 == 4:
+            code += "_" + letters[i // 5 % 26].upper() * 2
+        codes.append(code)
+    return codes
+
+
+def locale_tree(
+    messages: Path,
+    languages: int = 10,
+    domains: int = 2,
+    entries: int = 200,
+    layout: str = "lang",
+    noise: int = 0,
+    charset: str = "UTF-8",
+) -> list[Path]:
+    """
+    Populate a messages folder with many catalogs
+
+    :param messages: the folder (created if needed)
+    :param languages: the number of languages
+    :param domains: the number of domains per language
+    :param entries: the number of entries of every catalog
+    :param layout: "lang" for LANG/LC_MESSAGES/domain.po files or "flat"
+        for domain-LANG.po files
+    :param noise: the number of unrelated folders (with 10 files each)
+        that discovery has to skip
+    :param charset: the charset of the catalogs
+    :return: the list of the generated .po files
+    """
+    messages.mkdir(parents=True, exist_ok=True)
+    files = []
+    for li, lang in enumerate(language_codes(languages)):
+        for d in range(domains):
+            if layout == "lang":
+                path = messages / lang / "LC_MESSAGES" / f"domain{d}.po"
+                path.parent.mkdir(parents=True, exist_ok=True)
+            else:
+                path = messages / f"domain{d}-{lang}.po"
+            path.write_bytes(
+                po_content(entries, seed=li * 1000 + d, charset=charset, language=lang)
+            )
+            files.append(path)
+    for n in range(noise):
+        folder = messages / f"noise.{n}" / "sub"
+        folder.mkdir(parents=True, exist_ok=True)
+        for f in range(10):
+            (folder / f"file{f}.txt").write_text("noise")
+    return files
+
+
+def messages_dict(
+    entries: int = 1000, seed: int = 0, value_size: Optional[int] = None
+) -> dict[bytes, bytes]:
+    """
+    Build a messages dictionary as produced by msgfmt.process
+
+    :param entries: the number of messages
+    :param seed: the seed of the random generator
+    :param value_size: if given, the approximate size of every translation
+    :return: the messages dictionary
+    """
+    rnd = random.Random(seed)
+    pool = [w.encode() for w in WORDS["UTF-8"] + ASCII_WORDS]
+    messages = {b"": b"Content-Type: text/plain; charset=UTF-8\n"}
+    for i in range(entries):
+        key = b" ".join(rnd.choice(pool) for _ in range(rnd.randint(1, 8)))
+        if i % 10 == 1:
+            key = b"ctx\x04" + key
+        count = (value_size // 6 if value_size else rnd.randint(1, 8)) or 1
+        value = b" ".join(rnd.choice(pool) for _ in range(count))
+        messages[key + b" %d" % i] = value
+    return messages
@@ -0,0 +1,175 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+Measurement and baseline comparison for the benchmarks.
+
+A benchmark is a function receiving a scratch folder and a scale factor,
+that prepares its data and returns a Case: the callable to measure, and
+the amount of work it does (for the throughput).
+"""
+
+import gc
+import json
+import re
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterable, NamedTuple, Optional
+
+DEFAULT_THRESHOLD = 0.25  # a hot path may be 25% slower before failing
+
+
+class Case(NamedTuple):
+    """A prepared benchmark"""
+
+    run: Callable[[], object]  # the code to measure
+    work: float  # the amount of work of one run
+    unit: str  # the unit of work (entries, bytes, files...)
+    reset: Optional[Callable[[], object]] = None  # called before every run
+
+
+class Measure(NamedTuple):
+    """The result of a benchmark"""
+
+    name: str
+    seconds: float  # best wall time of the runs
+    throughput: float  # work per second
+    unit: str
+    peak: int  # peak of traced memory allocations in bytes
+
+    def as_dict(self) -> dict[str, object]:
+        """
+        :return: the measure as a JSON serializable dict
+        """
+        return self._asdict()
+
+
+BENCHMARKS: dict[str, Callable[[Path, float], Case]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """
+    Decorator registering a benchmark under a name
+
+    :param name: the name of the benchmark
+    :return: the decorator
+    """
+
+    def register(fn: Callable[[Path, float], Case]) -> Callable[[Path, float], Case]:
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+def measure(name: str, case: Case, repeat: int = 5) -> Measure:
+    """
+    Measure a prepared benchmark
+
+    The wall time is the best of repeat runs, and the peak memory is
+    measured by an additional run under tracemalloc.
+
+    :param name: the name of the benchmark
+    :param case: the prepared benchmark
+    :param repeat: the number of timed runs
+    :return: the measure
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if case.reset is not None:
+            case.reset()
+        gc.collect()
+        start = time.perf_counter()
+        case.run()
+        best = min(best, time.perf_counter() - start)
+    if case.reset is not None:
+        case.reset()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measure(name, best, case.work / best if best else 0.0, case.unit, peak)
+
+
+def run(
+    names: Optional[Iterable[str]] = None, scale: float = 1.0, repeat: int = 5
+) -> list[Measure]:
+    """
+    Run some registered benchmarks, each one in its own scratch folder
+
+    :param names: regular expressions selecting the benchmarks (default all)
+    :param scale: the scale factor of the generated data
+    :param repeat: the number of timed runs of each benchmark
+    :return: the measures
+    """
+    from . import suite  # noqa: F401 - registers the benchmarks
+
+    patterns = [re.compile(n) for n in names or [""]]
+    results = []
+    for name, fn in BENCHMARKS.items():
+        if not any(p.search(name) for p in patterns):
+            continue
+        with tempfile.TemporaryDirectory() as d:
+            results.append(measure(name, fn(Path(d), scale), repeat))
+    return results
+
+
+def save(results: Iterable[Measure], path: Path) -> None:
+    """
+    Save measures as a baseline file
+
+    :param results: the measures
+    :param path: the JSON file
+    """
+    path.write_text(
+        json.dumps({m.name: m.as_dict() for m in results}, indent=1), encoding="utf-8"
+    )
+
+
+def compare(
+    results: Iterable[Measure], baseline: Path, threshold: float = DEFAULT_THRESHOLD
+) -> list[str]:
+    """
+    Compare measures with a baseline file
+
+    :param results: the measures
+    :param baseline: a JSON file written by save
+    :param threshold: the allowed relative increase of time and memory
+    :return: a description of every regression (empty if none)
+    """
+    base = json.loads(baseline.read_text(encoding="utf-8"))
+    regressions = []
+    for m in results:
+        ref = base.get(m.name)
+        if ref is None:
+            continue
+        if m.seconds > ref["seconds"] * (1 + threshold):
+            regressions.append(
+                f"{m.name}: {m.seconds:.4f}s instead of {ref['seconds']:.4f}s"
+            )
+        if m.peak > ref["peak"] * (1 + threshold):
+            regressions.append(
+                f"{m.name}: peak memory {m.peak} instead of {ref['peak']} bytes"
+            )
+    return regressions
+
+
+def report(results: Iterable[Measure]) -> str:
+    """
+    Format measures as a table
+
+    :param results: the measures
+    :return: the table
+    """
+    lines = [f"{'benchmark':<24} {'time (s)':>10} {'throughput':>22} {'peak (KiB)':>12}"]
+    for m in results:
+        lines.append(
+            f"{m.name:<24} {m.seconds:>10.4f} {m.throughput:>14.0f} {m.unit + '/s':<7}"
+            f" {m.peak / 1024:>12.0f}"
+        )
+    return "\n".join(lines)
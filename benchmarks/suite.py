@@ -0,0 +1,334 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+The benchmarks of the hot paths of hatch-msgfmt-s-ball.
+
+Every benchmark prepares its data in the scratch folder it receives; the
+scale factor multiplies the size of the generated catalogs.
+"""
+
+import io
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from hatch_msgfmt.vendor import msgfmt
+
+from .catalogs import locale_tree, messages_dict, po_content
+from .runner import Case, benchmark
+
+
+def _hook(root: Path, config: dict):
+    # A real MsgFmtBuildHook with a silent application
+    from hatchling.bridge.app import Application
+
+    from hatch_msgfmt.plugin import MsgFmtBuildHook
+
+    return MsgFmtBuildHook(
+        str(root), config, None, None, str(root / "dist"), "wheel", Application()
+    )
+
+
+@benchmark("discovery")
+def discovery(tmp: Path, scale: float) -> Case:
+    """source_files() on a tree of many languages and unrelated folders"""
+    locale_tree(
+        tmp / "messages", languages=int(60 * scale) or 1, domains=4, entries=1,
+        noise=int(50 * scale),
+    )
+    hook = _hook(tmp, {"domain": "bench"})
+    hook.build_conf()
+    count = len(list(hook.source_files()))
+    return Case(lambda: list(hook.source_files()), count, "files")
+
+
+@benchmark("discovery-root")
+def discovery_root(tmp: Path, scale: float) -> Case:
+    """source_files() with messages = "." in a large repository root"""
+    locale_tree(tmp, languages=int(60 * scale) or 1, domains=4, entries=1)
+    for name in (".git", ".venv", "node_modules", "build"):
+        locale_tree(tmp / name / "sub", languages=1, domains=1, entries=1,
+                    noise=int(200 * scale) or 1)
+    (tmp / ".gitignore").write_text("build/\n*.tmp\n")
+    hook = _hook(tmp, {"domain": "bench", "messages": ".", "gitignore": True})
+    hook.build_conf()
+    count = len(list(hook.source_files()))
+    return Case(lambda: list(hook.source_files()), count, "files")
+
+
+def _parse_case(tmp: Path, content: bytes) -> Case:
+    po = tmp / "bench.po"
+    po.write_bytes(content)
+    return Case(lambda: msgfmt.process(str(po), {}), len(content), "bytes")
+
+
+@benchmark("parse")
+def parse(tmp: Path, scale: float) -> Case:
+    """process() on a UTF-8 catalog with plurals, contexts and long strings"""
+    return _parse_case(tmp, po_content(int(20000 * scale) or 1))
+
+
+@benchmark("parse-latin1")
+def parse_latin1(tmp: Path, scale: float) -> Case:
+    """process() on an ISO-8859-1 catalog"""
+    return _parse_case(tmp, po_content(int(20000 * scale) or 1, charset="ISO-8859-1"))
+
+
+@benchmark("parse-multiline")
+def parse_multiline(tmp: Path, scale: float) -> Case:
+    """process() on a catalog where every entry is wrapped on many lines"""
+    return _parse_case(tmp, po_content(int(5000 * scale) or 1, multiline=1.0))
+
+
+def _edit(content: bytes, count: int) -> bytes:
+    # Change the last string of count entries spread over a catalog
+    blocks = content.split(b"\n\n")
+    step = max(1, (len(blocks) - 1) // count)
+    for i in list(range(1, len(blocks), step))[:count]:
+        end = blocks[i].rindex(b'"')
+        blocks[i] = blocks[i][:end] + b" edited" + blocks[i][end:]
+    return b"\n\n".join(blocks)
+
+
+def _parse_cache_case(tmp: Path, scale: float, edited: Optional[int]) -> Case:
+    # ParseCache.parse from an empty cache or after editing some entries
+    from hatch_msgfmt.parse_cache import ParseCache
+
+    cache = ParseCache(tmp / "cache")
+    po = tmp / "bench.po"
+    content = po_content(int(20000 * scale) or 1)
+    if edited is None:
+        def reset() -> None:
+            shutil.rmtree(cache.directory, ignore_errors=True)
+    else:
+        cache.parse(po, content)
+        saved = cache.path(po).read_bytes()
+        content = _edit(content, edited)
+
+        def reset() -> None:
+            cache.path(po).write_bytes(saved)
+
+    return Case(lambda: cache.parse(po, content), len(content), "bytes", reset)
+
+
+@benchmark("parse-cache-cold")
+def parse_cache_cold(tmp: Path, scale: float) -> Case:
+    """ParseCache.parse filling an empty cache"""
+    return _parse_cache_case(tmp, scale, None)
+
+
+@benchmark("parse-cache-edit-1")
+def parse_cache_edit_1(tmp: Path, scale: float) -> Case:
+    """ParseCache.parse after editing 1 entry of the cached catalog"""
+    return _parse_cache_case(tmp, scale, 1)
+
+
+@benchmark("parse-cache-edit-100")
+def parse_cache_edit_100(tmp: Path, scale: float) -> Case:
+    """ParseCache.parse after editing 100 entries of the cached catalog"""
+    return _parse_cache_case(tmp, scale, 100)
+
+
+@benchmark("parse-cache-edit-1000")
+def parse_cache_edit_1000(tmp: Path, scale: float) -> Case:
+    """ParseCache.parse after editing 1000 entries of the cached catalog"""
+    return _parse_cache_case(tmp, scale, 1000)
+
+
+@benchmark("generate")
+def generate(tmp: Path, scale: float) -> Case:
+    """generate() on a large messages dictionary"""
+    messages = messages_dict(int(100000 * scale) or 1)
+    size = sum(len(k) + len(v) for k, v in messages.items())
+    return Case(lambda: msgfmt.generate(messages, hash=True), size, "bytes")
+
+
+def _languages(scale: float, shared: bool) -> Case:
+    # generate() for the same domain in 10 languages
+    keys = messages_dict(int(10000 * scale) or 1)
+    catalogs = [{k: v + b" %d" % i for k, v in keys.items()} for i in range(10)]
+    size = sum(len(k) + len(v) for c in catalogs for k, v in c.items())
+
+    def run() -> None:
+        layout = msgfmt.KeyLayout(keys, hash=True) if shared else None
+        for messages in catalogs:
+            msgfmt.generate(messages, hash=True, layout=layout)
+
+    return Case(run, size, "bytes")
+
+
+@benchmark("generate-languages")
+def generate_languages(tmp: Path, scale: float) -> Case:
+    """generate() on 10 languages of a domain, laying out the keys every time"""
+    return _languages(scale, False)
+
+
+@benchmark("generate-shared")
+def generate_shared(tmp: Path, scale: float) -> Case:
+    """generate() on 10 languages of a domain sharing their key layout"""
+    return _languages(scale, True)
+
+
+@benchmark("make")
+def make(tmp: Path, scale: float) -> Case:
+    """make() from a .po file to a .mo file"""
+    po = tmp / "bench.po"
+    content = po_content(int(20000 * scale) or 1)
+    po.write_bytes(content)
+    return Case(lambda: msgfmt.make(str(po), str(tmp / "bench.mo")), len(content),
+                "bytes")
+
+
+@benchmark("make-streaming")
+def make_streaming(tmp: Path, scale: float) -> Case:
+    """The constant-memory compilation of a .po file to a .mo file"""
+    from hatch_msgfmt import streaming
+
+    po = tmp / "bench.po"
+    content = po_content(int(20000 * scale) or 1)
+    po.write_bytes(content)
+    return Case(lambda: streaming.compile_to_file([po], tmp / "bench.mo"),
+                len(content), "bytes")
+
+
+def _tree_hook(tmp: Path, scale: float):
+    files = locale_tree(
+        tmp / "messages", languages=int(20 * scale) or 1, domains=3, entries=500
+    )
+    return files, _hook(tmp, {"domain": "bench", "jobs": 1})
+
+
+@benchmark("hook-cold")
+def hook_cold(tmp: Path, scale: float) -> Case:
+    """MsgFmtBuildHook.initialize compiling a whole tree from scratch"""
+    files, hook = _tree_hook(tmp, scale)
+
+    def reset() -> None:
+        shutil.rmtree(tmp / "locale", ignore_errors=True)
+
+    return Case(
+        lambda: hook.initialize("standard", {"force_include": {}}),
+        len(files), "files", reset,
+    )
+
+
+@benchmark("hook-noop")
+def hook_noop(tmp: Path, scale: float) -> Case:
+    """MsgFmtBuildHook.initialize when everything is up to date (stamp)"""
+    files, hook = _tree_hook(tmp, scale)
+    hook.initialize("standard", {"force_include": {}})
+    return Case(
+        lambda: hook.initialize("standard", {"force_include": {}}), len(files), "files"
+    )
+
+
+@benchmark("hook-noop-full")
+def hook_noop_full(tmp: Path, scale: float) -> Case:
+    """MsgFmtBuildHook.initialize when everything is up to date, without stamp"""
+    files, hook = _tree_hook(tmp, scale)
+    hook.initialize("standard", {"force_include": {}})
+
+    def reset() -> None:
+        hook.stamp_file.unlink(missing_ok=True)
+
+    return Case(
+        lambda: hook.initialize("standard", {"force_include": {}}),
+        len(files), "files", reset,
+    )
+
+
+@benchmark("hook-import")
+def hook_import(tmp: Path, scale: float) -> Case:
+    """A fresh interpreter importing the hook (the startup paid by hatch)"""
+    import subprocess
+    import sys
+
+    def run() -> None:
+        subprocess.run([sys.executable, "-c", "import hatch_msgfmt.plugin"], check=True)
+
+    return Case(run, 1, "imports")
+
+
+@benchmark("gettext-load")
+def gettext_load(tmp: Path, scale: float) -> Case:
+    """Loading a generated .mo file with the standard gettext module"""
+    import gettext
+
+    data = msgfmt.generate(messages_dict(int(50000 * scale) or 1), hash=True)
+    return Case(lambda: gettext.GNUTranslations(io.BytesIO(data)), len(data), "bytes")
+
+
+@benchmark("mapped-load")
+def mapped_load(tmp: Path, scale: float) -> Case:
+    """Loading the same .mo file with MappedTranslations and one lookup"""
+    from hatch_msgfmt.mapped import MappedTranslations
+
+    messages = messages_dict(int(50000 * scale) or 1)
+    path = tmp / "bench.mo"
+    path.write_bytes(msgfmt.generate(messages, hash=True))
+    msgid = max(messages).decode()
+
+    def run() -> None:
+        with MappedTranslations(path) as t:
+            t.gettext(msgid)
+
+    return Case(run, path.stat().st_size, "bytes")
+
+
+def _lookups(tmp: Path, scale: float, mapped: bool) -> Case:
+    # 1000 gettext calls over the messages of a loaded catalog
+    import gettext
+
+    from hatch_msgfmt.mapped import MappedTranslations
+
+    messages = messages_dict(int(50000 * scale) or 1)
+    path = tmp / "bench.mo"
+    path.write_bytes(msgfmt.generate(messages, hash=True))
+    keys = sorted(messages)
+    msgids = [keys[i * len(keys) // 1000].decode() for i in range(1000)]
+    if mapped:
+        # a cache smaller than the lookups measures the decoding too
+        t = MappedTranslations(path, cache_size=100)
+    else:
+        with open(path, "rb") as f:
+            t = gettext.GNUTranslations(f)
+    return Case(lambda: [t.gettext(msgid) for msgid in msgids], 1000, "lookups")
+
+
+@benchmark("gettext-lookup")
+def gettext_lookup(tmp: Path, scale: float) -> Case:
+    """Lookups in a catalog loaded by the standard gettext module"""
+    return _lookups(tmp, scale, False)
+
+
+@benchmark("mapped-lookup")
+def mapped_lookup(tmp: Path, scale: float) -> Case:
+    """Lookups in a catalog loaded by MappedTranslations"""
+    return _lookups(tmp, scale, True)
+
+
+POLISH = (
+    "(n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2)"
+)
+
+
+@benchmark("plural-compile")
+def plural_compile(tmp: Path, scale: float) -> Case:
+    """Compiling a plural expression as gettext does for every loaded catalog"""
+    import gettext
+
+    count = int(100 * scale) or 1
+    return Case(lambda: [gettext.c2py(POLISH) for _ in range(count)], count, "loads")
+
+
+@benchmark("plural-precompiled")
+def plural_precompiled(tmp: Path, scale: float) -> Case:
+    """Getting the registered evaluator of a precompiled plural table"""
+    from hatch_msgfmt import plurals
+
+    plurals.register({POLISH: (3, plurals.check(f"nplurals=3; plural={POLISH};")[2])})
+    count = int(100 * scale) or 1
+    return Case(
+        lambda: [plurals.evaluator(POLISH)(n) for n in range(count)], count, "loads"
+    )
@@ -0,0 +1,11 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+Allows `python -m hatch_msgfmt`
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
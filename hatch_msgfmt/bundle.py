@@ -0,0 +1,212 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module writes and reads catalog bundles.
+
+A bundle is a single file embedding the .mo images of many (lang, domain)
+pairs behind an index, so that a wheel can ship one file instead of one
+file per language and domain. Its layout (little endian) is:
+
+- a header: the magic b"HMOBNDL\\0", the format version and the number of
+  catalogs (struct "<8sII")
+- one index entry per catalog: the byte lengths of the lang and domain
+  names, the offset and the length of the .mo image (struct "<HHQQ")
+  followed by the UTF-8 names
+- the .mo images, each one starting on an 8 bytes boundary
+
+This module only depends on the standard library so that an application
+can read its bundle at run time.
+"""
+
+import copy
+import gettext
+import io
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from .mapped import MappedTranslations
+
+MAGIC = b"HMOBNDL\0"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<HHQQ")
+_ALIGN = 8
+
+
+def build(catalogs: Iterable[tuple[str, str, bytes]]) -> bytes:
+    """
+    Build the content of a bundle
+
+    :param catalogs: tuples (lang, domain, content of the .mo file)
+    :return: the content of the bundle
+    """
+    catalogs = sorted(catalogs)
+    names = [(lang.encode(), domain.encode()) for lang, domain, _ in catalogs]
+    pos = _HEADER.size + sum(_ENTRY.size + len(lg) + len(dm) for lg, dm in names)
+    index = [_HEADER.pack(MAGIC, VERSION, len(catalogs))]
+    images = []
+    for (lang, domain), (_, _, data) in zip(names, catalogs):
+        padding = -pos % _ALIGN
+        images.append(b"\0" * padding)
+        pos += padding
+        index += [_ENTRY.pack(len(lang), len(domain), pos, len(data)), lang, domain]
+        images.append(data)
+        pos += len(data)
+    return b"".join(index + images)
+
+
+class Bundle:
+    """
+    A reader of a bundle file.
+
+    The index is read at creation time, and a catalog is only read (once)
+    when a translation using it is requested.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        """
+        :param path: the bundle file
+        :raise ValueError: if the file is not a bundle
+        """
+        self.path = Path(path)
+        self.index: dict[tuple[str, str], tuple[int, int]] = {}
+        self._translations: dict[tuple, gettext.NullTranslations] = {}
+        self._lock = threading.Lock()
+        with open(self.path, "rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                raise ValueError(f"{path}: not a catalog bundle")
+            magic, version, count = _HEADER.unpack(head)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path}: not a catalog bundle")
+            for _ in range(count):
+                lang_len, domain_len, offset, length = _ENTRY.unpack(
+                    f.read(_ENTRY.size)
+                )
+                lang = f.read(lang_len).decode()
+                domain = f.read(domain_len).decode()
+                self.index[lang, domain] = (offset, length)
+
+    def catalogs(self) -> list[tuple[str, str]]:
+        """
+        :return: the sorted (lang, domain) pairs of the bundle
+        """
+        return sorted(self.index)
+
+    def read(self, lang: str, domain: str) -> bytes:
+        """
+        The .mo image of a catalog
+
+        :param lang: the language code
+        :param domain: the domain
+        :return: the content of the .mo file
+        :raise KeyError: if the bundle has no such catalog
+        """
+        offset, length = self.index[lang, domain]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def find(
+        self, domain: str, languages: Optional[Iterable[str]] = None
+    ) -> list[str]:
+        """
+        The languages of the bundle to use for a domain, as gettext.find
+        does for a localedir.
+
+        :param domain: the domain
+        :param languages: the requested languages (default: from the
+            LANGUAGE, LC_ALL, LC_MESSAGES and LANG environment variables)
+        :return: the matching languages, best one first
+        """
+        if languages is None:
+            languages = []
+            for envar in ("LANGUAGE", "LC_ALL", "LC_MESSAGES", "LANG"):
+                val = os.environ.get(envar)
+                if val:
+                    languages = val.split(":")
+                    break
+        # the same normalization and expansion as gettext.find
+        expanded: list[str] = []
+        for lang in languages:
+            # noinspection PyUnresolvedReferences,PyProtectedMember
+            for nelang in gettext._expand_lang(lang):  # type: ignore[attr-defined]
+                if nelang not in expanded:
+                    expanded.append(nelang)
+        if "C" in expanded:
+            expanded = expanded[: expanded.index("C")]
+        return [lang for lang in expanded if (lang, domain) in self.index]
+
+    def translation(
+        self,
+        domain: str,
+        languages: Optional[Iterable[str]] = None,
+        class_: Optional[type[gettext.NullTranslations]] = None,
+        fallback: bool = False,
+    ) -> gettext.NullTranslations:
+        """
+        A translations object for a domain, as gettext.translation returns
+        for a localedir. The translations are cached by the bundle.
+
+        :param domain: the domain
+        :param languages: the requested languages (default: from the
+            environment)
+        :param class_: the translations class (default GNUTranslations). A
+            MappedTranslations subclass maps the catalog from the bundle file
+        :param fallback: return a NullTranslations instead of raising an
+            error when no catalog is found
+        :return: the translations of the best language, falling back to
+            the next ones
+        :raise FileNotFoundError: if no catalog is found and not fallback
+        """
+        class_ = class_ or gettext.GNUTranslations
+        found = self.find(domain, languages)
+        if not found:
+            if fallback:
+                return gettext.NullTranslations()
+            raise FileNotFoundError(
+                f"No translation in {self.path} for domain {domain}"
+            )
+        result: Optional[gettext.NullTranslations] = None
+        for lang in found:
+            key = (class_, lang, domain)
+            with self._lock:
+                t = self._translations.get(key)
+                if t is None:
+                    if issubclass(class_, MappedTranslations):
+                        # maps the catalog in place instead of reading it
+                        t = class_(self.path, self.index[lang, domain][0])
+                    else:
+                        t = class_(io.BytesIO(self.read(lang, domain)))
+                    self._translations[key] = t
+            # as gettext.translation, chain copies of the cached objects
+            t = copy.copy(t)
+            if result is None:
+                result = t
+            else:
+                result.add_fallback(t)
+        assert result is not None  # found is not empty
+        return result
+
+
+def translation(
+    path: Union[str, os.PathLike],
+    domain: str,
+    languages: Optional[Iterable[str]] = None,
+    fallback: bool = False,
+) -> gettext.NullTranslations:
+    """
+    A shortcut for Bundle(path).translation(domain, languages, fallback=fallback)
+
+    :param path: the bundle file
+    :param domain: the domain
+    :param languages: the requested languages (default: from the environment)
+    :param fallback: return a NullTranslations if no catalog is found
+    :return: the translations
+    """
+    return Bundle(path).translation(domain, languages, fallback=fallback)
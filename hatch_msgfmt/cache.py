@@ -0,0 +1,188 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module implements a content-addressed cache of compiled catalogs.
+
+The cache can be shared by many checkouts and build environments: an entry
+is keyed by a hash of the .po contents and of the compiler fingerprint,
+entries are inserted atomically and a lock file serializes the
+insertions and the evictions of concurrent builds.
+"""
+
+import hashlib
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+LOCK_NAME = ".lock"
+DEFAULT_SIZE = 256  # default maximum size of the cache in MiB
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a file for the duration of a with block
+
+    :param path: the lock file (created if it does not exist)
+    """
+    with open(path, "a+b") as f:
+        if sys.platform == "win32":  # no cov
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class CompileCache:
+    """
+    A folder of compiled .mo contents indexed by the hash of their inputs.
+
+    Entries are stored as <dir>/<2 first hex digits>/<key>.mo and their
+    mtime is refreshed on every hit so that the least recently used ones
+    are evicted first when the cache grows over its maximum size.
+    """
+
+    def __init__(self, directory: Path, max_size: int) -> None:
+        """
+        :param directory: the folder of the cache
+        :param max_size: the maximum size of the cache in bytes
+        """
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict[str, Any],
+        root: Path,
+        environ: Optional[Mapping[str, str]] = None,
+    ) -> Optional["CompileCache"]:
+        """
+        Build the cache declared by the HATCH_MSGFMT_CACHE environment variable
+        or the cache_dir and cache_size hook options.
+
+        :param config: the hook configuration
+        :param root: the project root (relative folders are relative to it)
+        :param environ: the environment (default os.environ)
+        :return: the cache or None if no cache is configured
+        """
+        environ = os.environ if environ is None else environ
+        directory = environ.get("HATCH_MSGFMT_CACHE") or config.get("cache_dir")
+        if not directory:
+            return None
+        size = environ.get("HATCH_MSGFMT_CACHE_SIZE") or config.get(
+            "cache_size", DEFAULT_SIZE
+        )
+        return cls(root / Path(directory).expanduser(), int(size) << 20)
+
+    @staticmethod
+    def key(contents: Iterable[bytes], fingerprint: str) -> str:
+        """
+        Compute the key of the compiled output of some .po contents
+
+        :param contents: the contents of the .po files
+        :param fingerprint: the compiler fingerprint (including the options)
+        :return: the hex key
+        """
+        h = hashlib.sha256(fingerprint.encode())
+        for content in contents:
+            h.update(b"\0%d\0" % len(content))
+            h.update(content)
+        return h.hexdigest()
+
+    def path(self, key: str) -> Path:
+        """
+        The file storing an entry
+
+        :param key: the key of the entry
+        :return: its path
+        """
+        return self.directory / key[:2] / f"{key}.mo"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get the content of an entry and mark it as recently used
+
+        :param key: the key of the entry
+        :return: the content of the .mo file or None on a miss
+        """
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Atomically insert an entry. Errors are ignored: the cache is only
+        an optimization.
+
+        :param key: the key of the entry
+        :param data: the content of the .mo file
+        """
+        path = self.path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            with file_lock(self.directory / LOCK_NAME):
+                os.replace(tmp, path)
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries until the cache fits in
+        its maximum size
+
+        :return: the number of removed entries
+        """
+        if not self.directory.is_dir():
+            return 0
+        removed = 0
+        try:
+            with file_lock(self.directory / LOCK_NAME):
+                entries = []
+                total = 0
+                for path in self.directory.glob("??/*.mo"):
+                    try:
+                        st = path.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, path))
+                    total += st.st_size
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= self.max_size:
+                        break
+                    try:
+                        path.unlink()
+                    except OSError:
+                        continue
+                    total -= size
+                    removed += 1
+        except OSError:
+            pass
+        return removed
+
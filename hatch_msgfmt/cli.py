@@ -0,0 +1,194 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module implements the command line interface of the plugin.
+
+`python -m hatch_msgfmt build` compiles the catalogs of a project into its
+locale folder, as the hook does for an editable install, and records them
+in the manifest: a later build of the wheel (even in another environment
+sharing that folder) only compiles the stale catalogs.
+`python -m hatch_msgfmt watch` does the same, then polls the .po files and
+recompiles the changed catalogs. Both read the hook configuration from the
+pyproject.toml file of the project.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from hatchling.bridge.app import Application
+from hatchling.metadata.core import ProjectMetadata
+
+from .plugin import MsgFmtBuildHook
+
+DEFAULT_INTERVAL = 0.2  # seconds between two scans of the .po files
+
+
+class CliApplication(Application):
+    """An Application that reports errors without exiting"""
+
+    def __init__(self, verbosity: int = 0) -> None:
+        super().__init__()
+        self.verbosity_level = verbosity
+        self.failed = False
+
+    @property
+    def verbosity(self) -> int:
+        return self.verbosity_level
+
+    def display_debug(self, message: str = "", level: int = 1, **kwargs: Any) -> None:
+        if self.verbosity_level >= level:
+            self.display(message)
+
+    def abort(self, message: str = "", code: int = 1, **kwargs: Any) -> None:
+        self.failed = True
+        self.display_error(message)
+
+
+class CliBuildHook(MsgFmtBuildHook):
+    """The hook run by the command line, reporting to a CliApplication"""
+
+    @property
+    def app(self) -> CliApplication:
+        app = super().app
+        assert isinstance(app, CliApplication)
+        return app
+
+
+def hook_config(metadata: ProjectMetadata[Any]) -> dict[str, Any]:
+    """
+    The configuration of the hook declared in pyproject.toml
+
+    :param metadata: the metadata of the project
+    :return: as for hatchling, the wheel target hook options if they are
+        declared, else the global ones
+    """
+    build = metadata.config.get("tool", {}).get("hatch", {}).get("build", {})
+    wheel = build.get("targets", {}).get("wheel", {}).get("hooks", {})
+    if "msgfmt" in wheel:
+        return dict(wheel["msgfmt"])
+    return dict(build.get("hooks", {}).get("msgfmt", {}))
+
+
+def make_hook(root: Path, app: CliApplication) -> CliBuildHook:
+    """
+    Build the hook of a project, as hatchling does for an editable install
+
+    :param root: the project root (containing pyproject.toml)
+    :param app: the application displaying the messages
+    :return: the configured hook
+    """
+    metadata: ProjectMetadata[Any] = ProjectMetadata(str(root), None)
+    return CliBuildHook(
+        str(root), hook_config(metadata), None, metadata, str(root / "dist"),
+        "wheel", app,
+    )
+
+
+def snapshot(hook: MsgFmtBuildHook) -> dict[Path, tuple[int, int]]:
+    """
+    The state of the .po files of a project
+
+    :param hook: the hook of the project
+    :return: a dict mapping every .po file to its (mtime_ns, size)
+    """
+    state = {}
+    for path, _, _ in hook.source_files():
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        state[path] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def build(hook: CliBuildHook, clean: bool = False) -> bool:
+    """
+    Compile the stale catalogs of a project into its locale folder
+
+    :param hook: the hook of the project
+    :param clean: remove the previously generated files first
+    :return: True if every catalog was compiled
+    """
+    if clean:
+        hook.clean([])
+    # as for an editable install, the locale folder is used without staging
+    hook.initialize("editable", {"force_include": {}})
+    return not hook.app.failed
+
+
+def watch(
+    hook: MsgFmtBuildHook,
+    interval: float = DEFAULT_INTERVAL,
+    stop: Callable[[], bool] = lambda: False,
+) -> None:
+    """
+    Compile the catalogs of a project, then recompile the changed ones
+    until stop() returns True
+
+    :param hook: the hook of the project
+    :param interval: the delay between two scans in seconds
+    :param stop: a callable called after every scan
+    """
+    hook.initialize("editable", {"force_include": {}})
+    previous = snapshot(hook)
+    while not stop():
+        time.sleep(interval)
+        current = snapshot(hook)
+        if current != previous:
+            changed = sorted(
+                str(p) for p, state in current.items() if previous.get(p) != state
+            )
+            if changed:
+                hook.app.display_info("Changed: " + ", ".join(changed))
+            hook.compile_all({"force_include": {}})
+            previous = current
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    The entry point of `python -m hatch_msgfmt`
+
+    :param argv: the command line arguments (default sys.argv[1:])
+    :return: the exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m hatch_msgfmt",
+        description="Compile the gettext catalogs of a project",
+    )
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="display more messages (may be repeated)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    cmd = commands.add_parser(
+        "build", help="compile the stale catalogs into the locale folder"
+    )
+    cmd.add_argument("root", nargs="?", type=Path, default=Path("."),
+                     help="the project folder (default: current folder)")
+    cmd.add_argument("-j", "--jobs", type=int,
+                     help="maximum number of worker processes")
+    cmd.add_argument("--clean", action="store_true",
+                     help="remove the previously generated files first")
+    cmd = commands.add_parser(
+        "watch", help="compile the catalogs and recompile them on every change"
+    )
+    cmd.add_argument("root", nargs="?", type=Path, default=Path("."),
+                     help="the project folder (default: current folder)")
+    cmd.add_argument("-i", "--interval", type=float, default=DEFAULT_INTERVAL,
+                     help="seconds between two scans (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    app = CliApplication(args.verbose)
+    hook = make_hook(args.root, app)
+    if args.command == "build":
+        if args.jobs is not None:
+            hook.config["jobs"] = args.jobs
+        return 0 if build(hook, args.clean) else 1
+    hook.build_conf()
+    app.display_info(f"Watching {hook.src} (Ctrl-C to stop)")
+    try:
+        watch(hook, args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,426 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module wraps the vendored msgfmt.py for the needs of the plugin.
+
+It compiles catalogs in memory so that the caller can decide whether
+the resulting .mo file has to be (re-)written, and can fan the
+compilation of many catalogs out to a pool of worker processes.
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Collection, Iterable, NamedTuple, Optional
+
+from .__about__ import __version__
+from . import plurals, streaming
+from .cache import CompileCache
+from .manifest import file_hash
+from .options import Options
+from .parse_cache import ParseCache
+from .vendor import msgfmt
+
+# identifies the code generating the .mo files: a change invalidates them
+COMPILER = f"hatch-msgfmt {__version__}/msgfmt.py {msgfmt.__version__}"
+
+
+def fingerprint(options: Options) -> str:
+    """
+    Identify the compiler and the options that produced a .mo file
+
+    :param options: the compilation options
+    :return: a string to store in the manifest
+    """
+    return " ".join(
+        [COMPILER] + [f"{name}={value}" for name, value in options._asdict().items()]
+    )
+
+
+def compile_catalog(
+    sources: Iterable[Path],
+    options: Options = Options(),
+    stats: Optional[dict[str, Any]] = None,
+    layouts: Optional[dict[Optional[str], msgfmt.KeyLayout]] = None,
+    group: Optional[str] = None,
+    fragments: Optional[Collection[Path]] = None,
+    parse_cache: Optional[ParseCache] = None,
+) -> bytes:
+    """
+    Compile one or more .po files into the content of a single .mo file.
+
+    When more than one source is given, they are merged and the last
+    one wins for repeated keys (including the header). They must declare
+    the same charset.
+
+    :param sources: the paths of the .po files
+    :param options: the compilation options
+    :param stats: if given, receives the parse and generate times, the
+        number of messages, of skipped fuzzy entries, of input bytes and,
+        with the dedupe option, of bytes saved by the deduplication
+    :param layouts: if given, the key layouts shared by the catalogs of a
+        batch: the layout of the group is reused when the keys are the same
+        and replaced by the new one when it has more keys
+    :param group: the group (domain) of the catalog in layouts
+    :param fragments: if given, the sources that are fragments of the same
+        catalog: stats receives the "duplicates" messages for the keys that
+        more than one of them translates (the header excepted)
+    :param parse_cache: if given, the cache of the parsed entries: only the
+        changed blocks of the sources are parsed, and stats receives the
+        numbers of parsed and of cached blocks
+    :return: the content of the .mo file
+    """
+    start = time.perf_counter()
+    messages: dict[bytes, bytes] = {}
+    fuzzy = size = 0
+    charset = None
+    owners: dict[bytes, Path] = {}  # the fragment translating a key
+    duplicates: list[str] = []
+    blocks = (0, 0) if parse_cache is None else (parse_cache.parsed, parse_cache.reused)
+    for source in sources:
+        try:
+            with open(source, "rb") as f:
+                entries = (
+                    msgfmt.parse(f, str(source))
+                    if parse_cache is None
+                    else parse_cache.parse(source, f.read())
+                )
+                for ctxt, id, string, is_fuzzy in entries:
+                    if not id and ctxt is None:
+                        charset = msgfmt.check_charset(charset, string, str(source))
+                        if not is_fuzzy:
+                            check_plurals(string, source, options.plurals_range)
+                    elif fragments is not None and source in fragments:
+                        if string and not is_fuzzy:
+                            key = id if ctxt is None else b"%b\x04%b" % (ctxt, id)
+                            owner = owners.setdefault(key, source)
+                            if owner != source:
+                                duplicates.append(
+                                    f"{source}: {describe_key(key)} already"
+                                    f" translated in {owner}"
+                                )
+                    fuzzy += bool(is_fuzzy and string)
+                    msgfmt.add(ctxt, id, string, is_fuzzy, messages)
+                size += f.tell()
+        except OSError as e:
+            raise msgfmt.MsgfmtError(e) from e
+    parsed = time.perf_counter()
+    counters: dict[str, int] = {}
+    layout = None if layouts is None else layouts.get(group)
+    shared = layout is not None and layout.matches(messages, options.hash_table)
+    if layouts is not None and not shared:
+        # a missing or different key set: lay out the keys of this catalog
+        new_layout = msgfmt.KeyLayout(messages.keys(), options.hash_table)
+        if layout is None or len(new_layout.keys) > len(layout.keys):
+            layouts[group] = new_layout
+        layout = new_layout
+    output = msgfmt.generate(
+        messages,
+        hash=options.hash_table,
+        dedupe=options.dedupe,
+        stats=counters,
+        layout=layout,
+    )
+    if stats is not None:
+        stats.update(
+            parse=parsed - start,
+            generate=time.perf_counter() - parsed,
+            messages=len(messages),
+            fuzzy=fuzzy,
+            input_bytes=size,
+            **(counters if options.dedupe else {}),
+            **({} if layouts is None else {"shared_keys": shared}),
+            **({} if fragments is None else {"duplicates": duplicates}),
+            **(
+                {}
+                if parse_cache is None
+                else {
+                    "parsed_blocks": parse_cache.parsed - blocks[0],
+                    "cached_blocks": parse_cache.reused - blocks[1],
+                }
+            ),
+        )
+    return output
+
+
+def check_plurals(
+    header: bytes, source: Path, limit: int = plurals.DEFAULT_RANGE
+) -> None:
+    """
+    Validate the Plural-Forms of a header entry
+
+    :param header: the msgstr of the header entry
+    :param source: the .po file
+    :param limit: the number of values of n to check
+    :raise MsgfmtError: if the Plural-Forms value is invalid
+    """
+    try:
+        plurals.check_header(header, limit)
+    except ValueError as e:
+        raise msgfmt.MsgfmtError(f"{source}: {e}") from None
+
+
+def describe_key(key: bytes) -> str:
+    """
+    Format a key of a catalog for a diagnostic
+
+    :param key: the key, possibly with a context and a plural msgid
+    :return: a readable representation (msgctxt|msgid)
+    """
+    return repr(key.split(b"\0", 1)[0].replace(b"\x04", b"|").decode("latin-1"))
+
+
+def write_if_changed(path: Path, output: bytes) -> bool:
+    """
+    Write a .mo file unless it already has the very same content.
+
+    Leaving identical files untouched keeps their mtime stable for the
+    downstream caches. The file is written atomically (through a temporary
+    file renamed over it) so that a concurrent build or reader never sees
+    a truncated file.
+
+    :param path: the path of the .mo file
+    :param output: its expected content
+    :return: True if the file was written
+    """
+    try:
+        if path.stat().st_size == len(output) and path.read_bytes() == output:
+            return False
+    except OSError:
+        pass
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(output)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def digest(output: bytes) -> str:
+    """
+    The content hash of a generated .mo file as stored in the manifest
+
+    :param output: the content of the .mo file
+    :return: its sha256 hex digest
+    """
+    return hashlib.sha256(output).hexdigest()
+
+
+def stream_if_changed(
+    path: Path, sources: list[Path], options: Options, stats: dict[str, Any]
+) -> tuple[str, bool]:
+    """
+    Compile large .po files with a bounded memory into a .mo file, unless
+    it already has the very same content.
+
+    :param path: the path of the .mo file
+    :param sources: the paths of the .po files
+    :param options: the compilation options
+    :param stats: receives the timings and sizes for the report
+    :return: the content hash of the .mo file and True if it was written
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        streaming.compile_to_file(
+            sources, tmp, options.hash_table, stats,
+            plurals_range=options.plurals_range,
+        )
+        start = time.perf_counter()
+        output_digest = file_hash(tmp)
+        size = tmp.stat().st_size
+        try:
+            same = path.stat().st_size == size and file_hash(path) == output_digest
+        except OSError:
+            same = False
+        if same:
+            tmp.unlink()
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    stats.update(write=time.perf_counter() - start, output_bytes=size)
+    return output_digest, not same
+
+
+class Job(NamedTuple):
+    """The compilation of some .po files into one .mo file"""
+
+    target: str  # posix path of the .mo file relative to locale
+    output: str  # path of the .mo file
+    sources: list[str]  # paths of the .po files
+    options: Options = Options()
+    cache: Optional[CompileCache] = None  # shared cache of compiled outputs
+    # size of the sources (in bytes) from which they are compiled in
+    #  streaming mode (None to never stream)
+    streaming_threshold: Optional[int] = None
+    group: Optional[str] = None  # domain sharing its key layout in a batch
+    # paths of the sources that are fragments of the catalog (their repeated
+    #  keys are reported)
+    fragments: Optional[list[str]] = None
+    parse_cache: Optional[str] = None  # folder of the cache of parsed entries
+
+
+class Result(NamedTuple):
+    """The outcome of a Job, as sent back from a worker"""
+
+    digest: Optional[str] = None  # hash of the .mo content
+    written: bool = False  # False if the .mo file was already up-to-date
+    error: Optional[str] = None  # the error message if the compilation failed
+    cached: Optional[bool] = None  # True on a cache hit, None without cache
+    stats: Optional[dict[str, Any]] = None  # timings and sizes for the report
+
+
+def run_job(
+    job: Job, layouts: Optional[dict[Optional[str], msgfmt.KeyLayout]] = None
+) -> Result:
+    """
+    Compile a Job and write its .mo file if it has changed.
+
+    Errors are reported in the Result instead of being raised.
+
+    :param job: the Job to process
+    :param layouts: the key layouts shared by the jobs of a batch
+    :return: its Result
+    """
+    stats: dict[str, Any] = {}
+    try:
+        if job.streaming_threshold is not None and sum(
+            os.stat(s).st_size for s in job.sources
+        ) >= job.streaming_threshold:
+            # too large for the cache, that holds contents in memory (and
+            #  for the dedupe option, that interns the strings in memory)
+            output_digest, written = stream_if_changed(
+                Path(job.output), [Path(s) for s in job.sources], job.options, stats
+            )
+            stats["streamed"] = True
+            return Result(output_digest, written, stats=stats)
+        output = key = None
+        if job.cache is not None:
+            key = job.cache.key(
+                (Path(s).read_bytes() for s in job.sources), fingerprint(job.options)
+            )
+            output = job.cache.get(key)
+        cached = None if key is None else output is not None
+        if output is None:
+            output = compile_catalog(
+                [Path(s) for s in job.sources], job.options, stats,
+                layouts, job.group,
+                None if job.fragments is None else {Path(s) for s in job.fragments},
+                None if job.parse_cache is None else ParseCache(Path(job.parse_cache)),
+            )
+            if job.cache is not None and key is not None:
+                job.cache.put(key, output)
+        start = time.perf_counter()
+        written = write_if_changed(Path(job.output), output)
+        stats.update(write=time.perf_counter() - start, output_bytes=len(output))
+    except Exception as e:  # every error must be reported to the parent
+        return Result(error=f"{', '.join(job.sources)}: {e}", stats=stats)
+    return Result(digest(output), written, cached=cached, stats=stats)
+
+
+def run_batch(batch: list[Job]) -> list[Result]:
+    """
+    Process Jobs sharing the key layouts of their groups.
+
+    This is the entry point of the worker processes.
+
+    :param batch: the Jobs to process
+    :return: their Results
+    """
+    layouts: dict[Optional[str], msgfmt.KeyLayout] = {}
+    return [run_job(job, layouts) for job in batch]
+
+
+def batches(jobs: list[Job], workers: int) -> list[list[int]]:
+    """
+    Split the Jobs into batches of the same group.
+
+    Every group gets a share of the workers proportional to its number of
+    jobs, and is split in as many batches. A job without group is a batch
+    of its own.
+
+    :param jobs: the Jobs to process
+    :param workers: the maximum number of worker processes
+    :return: the lists of the indexes of the jobs of every batch
+    """
+    groups: dict[Optional[str], list[int]] = {}
+    result = []
+    for i, job in enumerate(jobs):
+        if job.group is None:
+            result.append([i])
+        else:
+            groups.setdefault(job.group, []).append(i)
+    for indexes in groups.values():
+        count = min(len(indexes), max(1, -(-workers * len(indexes) // len(jobs))))
+        result.extend(indexes[k::count] for k in range(count))
+    return result
+
+
+def run_jobs(jobs: list[Job], workers: int) -> list[Result]:
+    """
+    Process a list of Jobs, in parallel if more than one worker is allowed.
+
+    The jobs are processed by batches of the same group (domain), that
+    share their key layouts. The largest batches are submitted first to
+    make the best use of the pool, but the results are returned in the
+    order of the jobs. The jobs of a batch whose worker died (for example
+    killed by the OOM killer) get an error Result.
+
+    :param jobs: the Jobs to process
+    :param workers: the maximum number of worker processes
+    :return: the list of the Results
+    """
+    parts = batches(jobs, max(1, workers))
+    results: list[Optional[Result]] = [None] * len(jobs)
+    workers = min(workers, len(parts))
+    if workers <= 1:
+        for part in parts:
+            for i, result in zip(part, run_batch([jobs[i] for i in part])):
+                results[i] = result
+        return results  # type: ignore[return-value]
+
+    def size(part: list[int]) -> int:
+        total = 0
+        for i in part:
+            for source in jobs[i].sources:
+                try:
+                    total += os.stat(source).st_size
+                except OSError:
+                    pass  # the worker will report the error
+        return total
+
+    parts.sort(key=size, reverse=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+
+        def submit(part: list[int]) -> "Future[list[Result]]":
+            try:
+                return pool.submit(run_batch, [jobs[i] for i in part])
+            except BrokenProcessPool as e:  # a worker died while submitting
+                failed: Future[list[Result]] = Future()
+                failed.set_exception(e)
+                return failed
+
+        futures = [submit(part) for part in parts]
+        for part, future in zip(parts, futures):
+            try:
+                batch = future.result()
+            except BrokenProcessPool as e:
+                batch = [
+                    Result(error=f"{', '.join(jobs[i].sources)}: {e}") for i in part
+                ]
+            for i, result in zip(part, batch):
+                results[i] = result
+    return results  # type: ignore[return-value]
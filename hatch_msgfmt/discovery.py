@@ -0,0 +1,262 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module finds the .po files of a messages folder.
+
+The walk only enters the top-level folders whose name is a locale name
+(LANG folders), never follows symbolic links below them, and prunes the
+folders excluded by the configuration or by .gitignore files, so that a
+messages folder can safely be the project root. The languages and domains
+allow-lists are applied on the names, before a file is opened or stat'd.
+"""
+
+import os
+import re
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Generator, Iterable, Mapping, Optional, Union
+
+from pathspec import GitIgnoreSpec
+
+# a language code, possibly with a territory: 'de' or 'fr_FR'
+LANG = r"[a-z]{2,3}(?:_[A-Z]+)?"
+# a flat .po file stem: ('foo-fr_FR' -> ('foo', 'fr_FR') or 'de' -> (None, 'de'))
+FLAT_RX = re.compile(rf"^(?:(.+)-)?({LANG})$")
+# a LANG folder: a locale name, possibly with a script, a territory, a
+#  charset and a modifier: 'zh_Hant', 'es_419', 'pt_BR.UTF-8' or 'sr@latin'
+LANG_RX = re.compile(
+    r"^[a-z]{2,3}(?:_[A-Z][a-z]{3})?(?:_(?:[A-Z]+|[0-9]{3}))?"
+    r"(?:\.[\w-]+)?(?:@[a-z0-9]+)?$"
+)
+GITIGNORE = ".gitignore"
+
+
+def selection(
+    name: str,
+    config: dict[str, Any],
+    environ: Optional[Mapping[str, str]] = None,
+) -> Optional[list[str]]:
+    """
+    The glob patterns of an allow-list declared by a hook option or by the
+    HATCH_MSGFMT_<NAME> environment variable (which takes precedence).
+
+    The value is a list of patterns or a string of comma separated patterns.
+
+    :param name: the name of the hook option (languages or domains)
+    :param config: the hook configuration
+    :param environ: the environment (default os.environ)
+    :return: the patterns or None if everything is selected
+    """
+    environ = os.environ if environ is None else environ
+    value: Union[str, list[str], None] = environ.get(f"HATCH_MSGFMT_{name.upper()}")
+    if value is None:
+        value = config.get(name)
+    if isinstance(value, str):
+        value = value.split(",")
+    if value is None:
+        return None
+    patterns = [p.strip() for p in value if p.strip()]
+    return patterns or None
+
+
+def selected(name: str, patterns: Optional[list[str]]) -> bool:
+    """
+    Test a language or domain against an allow-list
+
+    :param name: the language code or domain
+    :param patterns: the glob patterns (None selects everything)
+    :return: True if one of the patterns matches the name
+    """
+    return patterns is None or any(fnmatchcase(name, p) for p in patterns)
+
+
+def group_fragments(
+    sources: Iterable[tuple[Path, str, str]],
+    src: Path,
+    rule: Union[bool, Mapping[str, str]],
+) -> list[tuple[list[Path], str, str]]:
+    """
+    Group the fragments of the catalogs found in LANG folders.
+
+    With a True rule, the first folder below LC_MESSAGES (or below the LANG
+    folder) is the domain of the .po files it contains: the fragments
+    fr/LC_MESSAGES/app/*.po give the app domain. A mapping rule gives the
+    domain of the files matching glob patterns relative to the LANG folder
+    (the first matching pattern wins). The other files keep their domain.
+
+    :param sources: tuples (file_path, lang, domain) of the .po files
+    :param src: the messages folder
+    :param rule: True, False (no grouping) or a mapping {pattern: domain}
+    :return: tuples (file_paths, lang, domain), the file paths of a group
+        and the groups being sorted
+    """
+    groups: dict[tuple[str, str], list[Path]] = {}
+    for path, lang, domain in sources:
+        parts = Path(os.path.relpath(path, src)).parts
+        if rule and len(parts) > 1 and parts[0] == lang:
+            rel = parts[1:]
+            if isinstance(rule, Mapping):
+                posix = "/".join(rel)
+                domain = next(
+                    (d for p, d in rule.items() if fnmatchcase(posix, p)), domain
+                )
+            else:
+                if rel[0] == "LC_MESSAGES":
+                    rel = rel[1:]
+                if len(rel) > 1:
+                    domain = rel[0]
+        groups.setdefault((lang, domain), []).append(path)
+    return [
+        (sorted(paths), lang, domain)
+        for (lang, domain), paths in sorted(groups.items())
+    ]
+
+
+class Ignores:
+    """
+    The gitignore-style specs applying to a walk, each one relative to the
+    folder containing it
+    """
+
+    def __init__(self) -> None:
+        self.specs: list[tuple[str, GitIgnoreSpec]] = []
+
+    def load(self, folder: str) -> Optional[str]:
+        """
+        Add the spec of the .gitignore file of a folder if it exists
+
+        :param folder: the folder
+        :return: the path of the loaded .gitignore file or None
+        """
+        path = os.path.join(folder, GITIGNORE)
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.specs.append((folder + os.sep, GitIgnoreSpec.from_lines(f)))
+        except OSError:
+            return None
+        return path
+
+    def match(self, path: str, is_dir: bool) -> bool:
+        """
+        Test whether a path is ignored
+
+        :param path: the path (below the folders of the specs)
+        :param is_dir: True for a folder
+        :return: True if one of the specs ignores the path
+        """
+        for base, spec in self.specs:
+            if path.startswith(base):
+                rel = path[len(base):].replace(os.sep, "/")
+                if spec.match_file(rel + "/" if is_dir else rel):
+                    return True
+        return False
+
+
+def find_sources(
+    src: Path,
+    domain: str,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    max_depth: Optional[int] = None,
+    root: Optional[Path] = None,
+    languages: Optional[list[str]] = None,
+    domains: Optional[list[str]] = None,
+    watched: Optional[list[str]] = None,
+) -> Generator[tuple[Path, str, str], None, None]:
+    """
+    Yield tuples (file_path, lang, domain) of the .po files of a folder
+
+    :param src: the messages folder
+    :param domain: the domain of LANG.po files
+    :param include: if given, gitignore-style patterns (relative to src)
+        that a .po file must match
+    :param exclude: gitignore-style patterns (relative to src) of the files
+        and folders to skip
+    :param max_depth: if given, the maximum depth of a .po file (1 for
+        the files directly in src)
+    :param root: if given, honor the .gitignore files of this folder, of the
+        folders down to src and of the walked folders (src must be below root)
+    :param languages: if given, glob patterns that a language must match
+        (the other LANG folders are not entered)
+    :param domains: if given, glob patterns that a domain must match
+    :param watched: if given, receives the paths of the scanned folders and
+        of the loaded .gitignore files: the result is the same as long as
+        they are unchanged (and the filters are the same)
+    :return: a generator of tuples (file_path, lang, domain)
+    """
+    included = GitIgnoreSpec.from_lines(include) if include else None
+    excluded = GitIgnoreSpec.from_lines(exclude or [])
+    ignores = None
+    if root is not None:
+        ignores = Ignores()
+        top = os.path.abspath(root)
+        base = os.path.abspath(src)
+        if base != top and base.startswith(top + os.sep):
+            # the folders from root to the parent of src
+            folders = [top]
+            for part in Path(os.path.relpath(base, top)).parts[:-1]:
+                folders.append(os.path.join(folders[-1], part))
+            for folder in folders:
+                loaded = ignores.load(folder)
+                if loaded is not None and watched is not None:
+                    watched.append(loaded)
+    prefix = len(os.path.abspath(src)) + 1
+
+    def skipped(path: str, is_dir: bool) -> bool:
+        # excluded, not included or ignored
+        rel = path[prefix:].replace(os.sep, "/")
+        if excluded.match_file(rel + "/" if is_dir else rel):
+            return True
+        if not is_dir and included is not None and not included.match_file(rel):
+            return True
+        return ignores is not None and ignores.match(path, is_dir)
+
+    # stack of the folders to scan: (path, depth, lang)
+    stack: list[tuple[str, int, Optional[str]]] = [(os.path.abspath(src), 0, None)]
+    while stack:
+        folder, depth, lang = stack.pop()
+        if ignores is not None:
+            loaded = ignores.load(folder)
+            if loaded is not None and watched is not None:
+                watched.append(loaded)
+        try:
+            with os.scandir(folder) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        if watched is not None:
+            watched.append(folder)
+        for entry in entries:
+            if lang is None:
+                # the messages folder: LANG folders and flat .po files
+                if entry.is_dir():
+                    if (
+                        LANG_RX.match(entry.name)
+                        and (max_depth is None or max_depth > 1)
+                        and selected(entry.name, languages)
+                        and not skipped(entry.path, True)
+                    ):
+                        stack.append((entry.path, 1, entry.name))
+                elif entry.name.endswith(".po"):
+                    m = FLAT_RX.match(entry.name[:-3])
+                    if not m:
+                        continue
+                    flat_domain = domain if m.group(1) is None else m.group(1)
+                    if (
+                        selected(m.group(2), languages)
+                        and selected(flat_domain, domains)
+                        and not skipped(entry.path, False)
+                    ):
+                        yield Path(src, entry.name), m.group(2), flat_domain
+            elif entry.is_dir(follow_symlinks=False):
+                if (max_depth is None or depth + 1 < max_depth) and not skipped(
+                    entry.path, True
+                ):
+                    stack.append((entry.path, depth + 1, lang))
+            elif (
+                entry.name.endswith(".po")
+                and selected(entry.name[:-3], domains)
+                and not skipped(entry.path, False)
+            ):
+                yield Path(src, entry.path[prefix:]), lang, entry.name[:-3]
@@ -0,0 +1,321 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module manages the build manifest stored in the locale folder.
+
+For every generated .mo file, the manifest records the source files it was
+compiled from (path, size, mtime and content hash), the compiler that
+produced it and the state of the output file. It allows a later build to
+only recompile the catalogs that are stale or missing. It also records the
+folders created by the hook, so that a clean can remove exactly what the
+builds produced. A manifest shipped in an sdist with the compiled files
+always checks the content hashes of the files.
+
+After a build, a stamp written in the build directory records the
+fingerprint of the configuration, the state of the files and folders the
+build depended on (relative to the project root), the hash of the manifest
+and the files it included, so that the next identical build can reuse them
+after a stat of each of those paths, without walking the messages folder or
+loading the compiler.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+MANIFEST_NAME = ".hatch-msgfmt.json"
+STAMP_NAME = "stamp.json"  # in the output folder of the build directory
+FORMAT = 1  # version of the manifest format
+
+
+def file_hash(path: Path) -> str:
+    """
+    Compute the sha256 hex digest of a file content
+
+    :param path: the file to hash
+    :return: the hex digest
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_state(path: Path, digest: Optional[str] = None) -> dict[str, Any]:
+    """
+    Build the record describing the current state of a file
+
+    :param path: the file to describe
+    :param digest: the content hash if already known
+    :return: a dict with size, mtime_ns and sha256 keys
+    """
+    st = path.stat()
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": digest if digest is not None else file_hash(path),
+    }
+
+
+def path_state(path: str) -> Optional[list[int]]:
+    """
+    The stat state of a file or a folder, as recorded in a stamp
+
+    :param path: the path
+    :return: [size, mtime_ns] or None if the path does not exist
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def read_stamp(
+    path: Path, key: str, root: Path, manifest: Path
+) -> Optional[dict[str, str]]:
+    """
+    Read a stamp and check that it is still valid
+
+    :param path: the stamp file
+    :param key: the fingerprint of the current configuration
+    :param root: the project root
+    :param manifest: the manifest of the locale folder
+    :return: the included files of the stamped build, or None if the stamp
+        is missing, for another configuration, if a path has changed or if
+        the manifest is not the one of the stamped build
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("format") != FORMAT or data.get("key") != key:
+            return None
+        for name, state in data["paths"].items():
+            if path_state(os.path.join(root, name)) != state:
+                return None
+        # a manifest replaced by another one (for example the manifest of
+        #  an sdist unpacked over the project) has to check the files
+        if file_hash(manifest) != data["manifest"]:
+            return None
+        return dict(data["include"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_stamp(
+    path: Path,
+    key: str,
+    root: Path,
+    paths: Iterable[str],
+    include: dict[str, str],
+    manifest: Path,
+) -> None:
+    """
+    Write the stamp of a build (a missing path disables the stamp)
+
+    :param path: the stamp file
+    :param key: the fingerprint of the configuration of the build
+    :param root: the project root, the recorded paths are relative to it
+    :param paths: the files and folders the build depended on or produced
+    :param include: the included files (source path -> path in the wheel)
+    :param manifest: the manifest of the locale folder
+    """
+    digest: Optional[str] = None
+    try:
+        states = {os.path.relpath(p, root): path_state(p) for p in paths}
+        digest = file_hash(manifest)
+    except (OSError, ValueError):  # ValueError: not on the drive of root
+        states = {}
+    if digest is None or None in states.values():
+        path.unlink(missing_ok=True)
+        return
+    data = {
+        "format": FORMAT,
+        "key": key,
+        "paths": states,
+        "include": include,
+        "manifest": digest,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Manifest._write(path, data)
+
+
+class Manifest:
+    """
+    The set of records describing the .mo files generated in a locale folder.
+
+    Records are indexed by the posix path of the .mo file relative to the
+    locale folder, while source paths are relative to the project root.
+    """
+
+    def __init__(self, locale: Path, root: Path) -> None:
+        self.path = locale / MANIFEST_NAME
+        self.locale = locale
+        self.root = root
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.folders: set[str] = set()  # created folders relative to locale
+        self.verify = False  # always compare the content hashes
+        self.dirty = False
+
+    @classmethod
+    def load(cls, locale: Path, root: Path) -> "Manifest":
+        """
+        Load the manifest of a locale folder.
+
+        A missing, unreadable or incompatible manifest gives an empty one.
+
+        :param locale: the locale folder
+        :param root: the project root
+        :return: the loaded manifest
+        """
+        manifest = cls(locale, root)
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return manifest
+        if isinstance(data, dict) and data.get("format") == FORMAT:
+            manifest.entries = data.get("entries", {})
+            manifest.folders = set(data.get("folders", []))
+            manifest.verify = bool(data.get("verify", False))
+        return manifest
+
+    def save(self) -> None:
+        """
+        Write the manifest if it has changed (through a temporary file).
+        """
+        if not self.dirty:
+            return
+        self.make_dirs(".")
+        data = {
+            "format": FORMAT,
+            "entries": self.entries,
+            "folders": sorted(self.folders),
+        }
+        if self.verify:
+            data["verify"] = True
+        self._write(self.path, data)
+        self.dirty = False
+
+    def export(self, path: Path, targets: Iterable[str]) -> None:
+        """
+        Write the records of some files to be shipped with their sources
+        (in an sdist). The exported manifest always compares the content
+        hashes, and records no folder since they belong to the archive.
+
+        :param path: the file to write
+        :param targets: the posix paths of the files relative to locale
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entries = {t: self.entries[t] for t in targets if t in self.entries}
+        self._write(
+            path, {"format": FORMAT, "entries": entries, "folders": [], "verify": True}
+        )
+
+    @staticmethod
+    def _write(path: Path, data: dict[str, Any]) -> None:
+        # Write a JSON file through a temporary file
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def make_dirs(self, folder: str) -> None:
+        """
+        Create a folder below locale (and its parents), recording the ones
+        that did not exist
+
+        :param folder: the posix path of the folder relative to locale
+            ("." for the locale folder itself)
+        """
+        if (self.locale / folder).is_dir():
+            return
+        parts = [] if folder == "." else folder.split("/")
+        for i in range(len(parts) + 1):
+            rel = "/".join(parts[:i]) or "."
+            try:
+                (self.locale / rel).mkdir(parents=i == 0)
+            except FileExistsError:
+                continue
+            self.folders.add(rel)
+            self.dirty = True
+
+    def source_key(self, path: Path) -> str:
+        """
+        The key used to store a source path in the manifest
+
+        :param path: the path of a source file
+        :return: its posix path relative to the project root when possible
+        """
+        try:
+            return path.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return path.resolve().as_posix()
+
+    def _check(self, path: Path, state: dict[str, Any]) -> bool:
+        # Tell whether a file still matches its recorded state. The
+        # cheap stat comparison is tried first and the content hash is
+        # only computed when the size is unchanged but the mtime differs
+        # (or always in verify mode)
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        if st.st_size != state["size"]:
+            return False
+        if st.st_mtime_ns == state["mtime_ns"] and not self.verify:
+            return True
+        if file_hash(path) != state["sha256"]:
+            return False
+        if st.st_mtime_ns != state["mtime_ns"]:
+            state["mtime_ns"] = st.st_mtime_ns
+            self.dirty = True
+        return True
+
+    def is_fresh(self, target: str, sources: Iterable[Path], compiler: str) -> bool:
+        """
+        Tell whether a .mo file is up-to-date
+
+        :param target: the posix path of the .mo file relative to locale
+        :param sources: the source files of the .mo file
+        :param compiler: the fingerprint of the compiler and its options
+        :return: True if the .mo file needs not be recompiled
+        """
+        entry = self.entries.get(target)
+        if entry is None or entry.get("compiler") != compiler:
+            return False
+        sources = list(sources)
+        if [self.source_key(s) for s in sources] != [
+            s["path"] for s in entry["sources"]
+        ]:
+            return False
+        if not self._check(self.locale / target, entry["output"]):
+            return False
+        return all(
+            self._check(path, state) for path, state in zip(sources, entry["sources"])
+        )
+
+    def record(
+        self,
+        target: str,
+        sources: Iterable[Path],
+        compiler: str,
+        output_digest: Optional[str] = None,
+    ) -> None:
+        """
+        Record the state of a freshly generated .mo file
+
+        :param target: the posix path of the .mo file relative to locale
+        :param sources: the source files of the .mo file
+        :param compiler: the fingerprint of the compiler and its options
+        :param output_digest: the hash of the .mo file content if known
+        """
+        self.entries[target] = {
+            "compiler": compiler,
+            "sources": [
+                dict(file_state(s), path=self.source_key(s)) for s in sources
+            ],
+            "output": file_state(self.locale / target, output_digest),
+        }
+        self.dirty = True
@@ -0,0 +1,234 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module implements a lazy, memory-mapped reader of .mo files.
+
+gettext.GNUTranslations reads a whole .mo file and decodes every entry in a
+dict when it is loaded. MappedTranslations maps the file in memory instead,
+looks the messages up in the GNU hash table (or by a binary search in the
+sorted key table when there is no hash table) and only decodes the
+translations that are used, keeping the most recent ones in a bounded LRU
+cache. The mapped pages are shared by all the processes (including forked
+workers) that read the same file.
+
+This module only depends on the standard library so that an application
+can use it at run time.
+"""
+
+import gettext
+import mmap
+import os
+import struct
+from functools import lru_cache
+from typing import BinaryIO, Optional, Union
+
+from . import plurals
+from .vendor.msgfmt import hashpjw
+
+LE_MAGIC = 0x950412DE
+BE_MAGIC = 0xDE120495
+DEFAULT_CACHE_SIZE = 4096  # decoded messages kept by every translations object
+
+
+class MappedTranslations(gettext.NullTranslations):
+    """
+    A gettext translations class reading a .mo file through mmap.
+
+    It implements the gettext, ngettext, pgettext and npgettext methods with
+    the same results (and the same fallback rules) as GNUTranslations.
+    """
+
+    CONTEXT = "%s\x04%s"
+
+    # the attributes of NullTranslations used here
+    _info: dict[str, str]
+    _fallback: Optional[gettext.NullTranslations]
+
+    def __init__(
+        self,
+        source: Union[str, os.PathLike, BinaryIO],
+        offset: int = 0,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        """
+        :param source: a .mo file (or a file embedding a .mo image), either
+            as a path or as an open binary file, as gettext.translation
+            passes it
+        :param offset: the position of the .mo image in the file
+        :param cache_size: the maximum number of decoded messages to keep
+        :raise OSError: if the file is not a valid .mo file
+        """
+        super().__init__()
+        if isinstance(source, (str, os.PathLike)):
+            self.path = os.fspath(source)
+            with open(source, "rb") as f:
+                self._map = self._mmap(f)
+        else:
+            # the mapping stays valid when the file is closed
+            self.path = getattr(source, "name", "<file>")
+            self._map = self._mmap(source)
+        self._base = offset
+        try:
+            magic = struct.unpack_from("<I", self._map, offset)[0]
+            if magic not in (LE_MAGIC, BE_MAGIC):
+                raise OSError(0, "Bad magic number", self.path)
+            self._end = "<" if magic == LE_MAGIC else ">"
+            version, count, keys, values, hash_size, hash_offset = struct.unpack_from(
+                self._end + "6I", self._map, offset + 4
+            )
+            if version >> 16 not in gettext.GNUTranslations.VERSIONS:
+                raise OSError(0, f"Bad version number {version >> 16}", self.path)
+        except struct.error:
+            self._map.close()
+            raise OSError(0, "File is corrupt", self.path) from None
+        except OSError:
+            self._map.close()
+            raise
+        self._count = count
+        self._keys = offset + keys
+        self._values = offset + values
+        self._hash_size = hash_size if hash_size > 2 else 0
+        self._hash = offset + hash_offset
+        self._pair = struct.Struct(self._end + "II")
+        self._word = struct.Struct(self._end + "I")
+        self.plural = lambda n: int(n != 1)  # germanic plural by default
+        self._charset: Optional[str] = None
+        self._find = lru_cache(maxsize=cache_size)(self._lookup)
+        header = self._raw(b"")
+        if header is not None:
+            self._parse_header(header[1])
+
+    def _mmap(self, f: BinaryIO) -> mmap.mmap:
+        # A read-only mapping of a whole file
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            raise OSError(0, "File is corrupt", self.path) from None
+
+    def close(self) -> None:
+        """
+        Release the mapping of the file
+        """
+        self._map.close()
+
+    def __enter__(self) -> "MappedTranslations":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _parse_header(self, header: bytes) -> None:
+        # Same processing of the metadata as GNUTranslations._parse
+        charset, plural = plurals.read_header(header, self._info)
+        if charset is not None:
+            self._charset = charset
+        if plural is not None:
+            # a precompiled table or a compilation shared by the catalogs
+            self.plural = plurals.evaluator(plural)
+
+    def _string(self, table: int, index: int) -> bytes:
+        # The string at an index of the key or value table
+        length, offset = self._pair.unpack_from(self._map, table + 8 * index)
+        start = self._base + offset
+        return self._map[start:start + length]
+
+    def _index(self, key: bytes) -> int:
+        # The index of a key (compared up to its first NUL, as libintl
+        # does, so that a msgid finds its plural entry) or -1
+        if self._hash_size:
+            size = self._hash_size
+            hval = hashpjw(key)
+            idx = hval % size
+            incr = 1 + hval % (size - 2)
+            while True:
+                nstr = self._word.unpack_from(self._map, self._hash + 4 * idx)[0]
+                if nstr == 0:
+                    return -1
+                found = self._string(self._keys, nstr - 1)
+                if found == key or found.split(b"\0", 1)[0] == key:
+                    return nstr - 1
+                idx = idx - (size - incr) if idx >= size - incr else idx + incr
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = self._string(self._keys, mid).split(b"\0", 1)[0]
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def _raw(self, key: bytes) -> Optional[tuple[bool, bytes]]:
+        # The raw translation of a key and whether it is a plural entry
+        index = self._index(key)
+        if index < 0:
+            return None
+        plural = b"\0" in self._string(self._keys, index)
+        return plural, self._string(self._values, index)
+
+    def _lookup(self, message: str) -> Union[str, tuple[str, ...], None]:
+        # The decoded translation of a message: a string, the tuple of the
+        # forms of a plural entry or None if not found (cached by _find)
+        charset = self._charset or "ascii"
+        try:
+            key = message.encode(charset)
+        except UnicodeEncodeError:
+            return None
+        raw = self._raw(key)
+        if raw is None:
+            return None
+        plural, value = raw
+        if plural:
+            return tuple(str(form, charset) for form in value.split(b"\0"))
+        return str(value, charset)
+
+    def _plural(self, msgid1: str, n: int) -> Optional[str]:
+        # The plural form of a message for n or None
+        found = self._find(msgid1)
+        if not isinstance(found, tuple):
+            return None
+        index = self.plural(n)
+        return found[index] if 0 <= index < len(found) else None
+
+    def _singular(self, message: str) -> Optional[str]:
+        # The translation of a message or None. As GNUTranslations does, a
+        # plural entry gives its form for n=1
+        found = self._find(message)
+        if isinstance(found, tuple):
+            return self._plural(message, 1)
+        return found
+
+    def gettext(self, message: str) -> str:
+        tmsg = self._singular(message)
+        if tmsg is None:
+            if self._fallback:
+                return self._fallback.gettext(message)
+            return message
+        return tmsg
+
+    def ngettext(self, msgid1: str, msgid2: str, n: int) -> str:
+        tmsg = self._plural(msgid1, n)
+        if tmsg is None:
+            if self._fallback:
+                return self._fallback.ngettext(msgid1, msgid2, n)
+            return msgid1 if n == 1 else msgid2
+        return tmsg
+
+    def pgettext(self, context: str, message: str) -> str:
+        tmsg = self._singular(self.CONTEXT % (context, message))
+        if tmsg is None:
+            if self._fallback:
+                return self._fallback.pgettext(context, message)
+            return message
+        return tmsg
+
+    def npgettext(self, context: str, msgid1: str, msgid2: str, n: int) -> str:
+        tmsg = self._plural(self.CONTEXT % (context, msgid1), n)
+        if tmsg is None:
+            if self._fallback:
+                return self._fallback.npgettext(context, msgid1, msgid2, n)
+            return msgid1 if n == 1 else msgid2
+        return tmsg
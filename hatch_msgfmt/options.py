@@ -0,0 +1,46 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module holds the compilation options and the defaults of the hook.
+
+It is kept apart from the compiler (and only depends on the standard
+library) so that the hook can read its configuration, and decide that
+there is nothing to compile, without importing msgfmt.py and the worker
+pool.
+"""
+
+import os
+from typing import NamedTuple
+
+from .plurals import DEFAULT_RANGE
+
+BUNDLE_NAME = "catalogs.bundle"  # default name of the bundle in the locale folder
+DEFAULT_THRESHOLD = 64  # default size of the sources (MiB) triggering streaming
+POOL_THRESHOLD = 2  # size of the pending sources (MiB) worth a pool of workers
+STALE_STAGING = 24 * 60 * 60  # age (seconds) of a staging folder surely abandoned
+
+
+class Options(NamedTuple):
+    """The options controlling the generated .mo files and their checks"""
+
+    hash_table: bool = True  # generate the GNU hash table
+    dedupe: bool = False  # store identical strings only once
+    plurals_range: int = DEFAULT_RANGE  # the values of n checked in Plural-Forms
+
+
+def default_jobs(count: int, size: int) -> int:
+    """
+    The default number of worker processes for the pending catalogs.
+
+    Starting a pool costs more than compiling a few small catalogs, so they
+    are compiled in the build process. Otherwise, every CPU is used, up to
+    one worker per catalog.
+
+    :param count: the number of catalogs to compile
+    :param size: the total size of their sources in bytes
+    :return: the number of worker processes (1 to compile in process)
+    """
+    if count < 2 or size < POOL_THRESHOLD << 20:
+        return 1
+    return min(os.cpu_count() or 1, count)
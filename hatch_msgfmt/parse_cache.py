@@ -0,0 +1,235 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module implements a cache of the parsed entries of .po files.
+
+A .po file is split into blocks at its blank lines. The cache of a file
+maps the digest of every block to the (msgctxt, msgid, msgstr, fuzzy)
+tuples that msgfmt.parse gives for it, so that a new version of the file
+only parses the blocks that have changed. As msgfmt.parse carries the
+msgctxt and the fuzzy flag of an entry to the next one when no comment
+line separates them, a block is parsed with the state left by the
+previous one, which is part of its key, and the state the parser leaves
+after it is cached with its entries. The first block (holding the
+header, and thus the charset) is recorded too: a change of it discards the
+whole cache of the file. A file whose blocks cannot be parsed one by one
+exactly as the whole file is parsed (an entry spanning a blank line, a
+fuzzy mark before a blank line, a header that is not the first entry...)
+is simply parsed as a whole.
+"""
+
+import hashlib
+import io
+import marshal
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Optional
+
+from .__about__ import __version__
+from .vendor import msgfmt
+
+FORMAT = 3  # version of the cache files
+BLANK_LINES = re.compile(rb"\n(?:[ \t\r]*\n)+")
+KEYWORD = re.compile(rb"msg(?:id|ctxt)\b")  # the first line of an entry
+
+Entry = tuple[Optional[bytes], bytes, bytes, int]
+State = tuple[Optional[bytes], int]  # the msgctxt and fuzzy flag carried
+# the digest of a block and the state it inherits
+Key = tuple[bytes, Optional[bytes], int]
+# the entries of a block and the state it leaves
+Parsed = tuple[tuple[Entry, ...], State]
+
+
+def _digest(block: bytes) -> bytes:
+    # The key of a block in the cache
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+
+def _parse(
+    block: bytes, source: Path, encoding: str, state: State
+) -> Parsed:
+    # The entries of a block and the state the parser leaves after them
+    parser = msgfmt.parse(io.BytesIO(block), str(source), encoding, *state)
+    entries = []
+    while True:
+        try:
+            entries.append(next(parser))
+        except StopIteration as stop:
+            return tuple(entries), stop.value
+
+
+def _first_keyword(lines: list[bytes]) -> Optional[bytes]:
+    # The first line of a block that is neither a comment nor blank
+    for line in lines:
+        if line[:1] != b"#" and line.strip():
+            return line
+    return None
+
+
+def independent(block: bytes) -> bool:
+    """
+    Tell whether a block gives the same entries when it is parsed alone as
+    when it is parsed in its file
+
+    :param block: the lines of a block, without blank lines around it
+    :return: True if the block starts an entry (after its comments), gives
+        it a msgid before its first msgstr and ends inside a msgstr without
+        a fuzzy mark for the next block
+    """
+    lines = block.split(b"\n")
+    first = _first_keyword(lines)
+    strs = [i for i, line in enumerate(lines) if line.startswith(b"msgstr")]
+    if first is None:
+        # only comments: a fuzzy mark would apply to the next block
+        return not any(line.startswith(b"#,") for line in lines)
+    # a msgstr without a msgid would complete the msgid of the previous block
+    ids = (i for i, line in enumerate(lines) if line.startswith(b"msgid"))
+    return (
+        KEYWORD.match(first) is not None
+        and bool(strs)
+        and next(ids, len(lines)) < strs[0]
+        and not any(line.startswith(b"#,") for line in lines[strs[-1] + 1:])
+    )
+
+
+class ParseCache:
+    """
+    A folder of the parsed entries of .po files, one file per .po file.
+
+    The parsed and reused counters accumulate the number of blocks parsed
+    and taken from the cache.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """
+        :param directory: the folder of the cache
+        """
+        self.directory = Path(directory)
+        self.parsed = 0
+        self.reused = 0
+
+    def path(self, source: Path) -> Path:
+        """
+        The file storing the entries of a .po file
+
+        :param source: the .po file
+        :return: its cache file
+        """
+        name = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()[:32]
+        return self.directory / f"{name}.entries"
+
+    def _load(
+        self, source: Path, head: tuple[bytes, str]
+    ) -> dict[Key, Parsed]:
+        # The cached blocks of a file if its first block is unchanged
+        try:
+            # loads() on the whole content is far faster than load() on a file
+            data = marshal.loads(self.path(source).read_bytes())
+            if data["version"] == self._version() and data["head"] == head:
+                return data["blocks"]
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            pass
+        return {}
+
+    def _save(
+        self,
+        source: Path,
+        head: tuple[bytes, str],
+        blocks: dict[Key, Parsed],
+    ) -> None:
+        # Atomically write the cache of a file, ignoring errors: the cache
+        # is only an optimization
+        path = self.path(source)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(
+                marshal.dumps(
+                    {"version": self._version(), "head": head, "blocks": blocks}
+                )
+            )
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _version() -> str:
+        # The cache files depend on the parser and on the marshal format
+        return f"{FORMAT} {__version__} {msgfmt.__version__} {sys.version_info[:2]}"
+
+    def parse(self, source: Path, data: bytes) -> list[Entry]:
+        """
+        The entries of a .po file, parsing only the blocks that are not
+        in the cache
+
+        :param source: the .po file
+        :param data: its content
+        :return: the (msgctxt, msgid, msgstr, fuzzy) tuples of msgfmt.parse
+        :raise MsgfmtError: if the file is invalid
+        """
+        blocks = [b for b in BLANK_LINES.split(data) if b.strip()]
+        entries = self._blocks(source, blocks)
+        if entries is None:
+            # the blocks are not independent: parse the whole file
+            self.parsed += len(blocks)
+            return list(msgfmt.parse(io.BytesIO(data), str(source)))
+        return entries
+
+    def _blocks(self, source: Path, blocks: list[bytes]) -> Optional[list[Entry]]:
+        # The entries of the blocks of a file or None if they cannot be
+        # parsed one by one
+        if not blocks or not independent(blocks[0]):
+            return None
+        try:
+            first, state = _parse(blocks[0], source, "latin-1", (None, 0))
+        except Exception:  # the whole file gives the right error
+            return None
+        entries = list(first)
+        if any(not msgid for _, msgid, _, _ in entries[1:]):
+            return None  # a late header
+        encoding = "latin-1"
+        if entries and not entries[0][1] and len(blocks) > 1:
+            # the parser switches to the charset of the header only when the
+            # line following its msgstr is a msgid
+            if len(entries) > 1:
+                return None
+            if blocks[1].startswith(b"msgid"):
+                encoding = msgfmt.check_charset(None, entries[0][2]) or encoding
+        head = (_digest(blocks[0]), encoding)
+        cached = self._load(source, head)
+        current: dict[Key, Parsed] = {}
+        parsed = 0
+        for block in blocks[1:]:
+            # (a block starts with a line that is not blank)
+            if block.startswith(b"#"):
+                state = (None, 0)  # a comment line starts a new entry
+            elif block.startswith(b"msgctxt"):
+                state = (None, state[1])
+            key = (_digest(block), *state)
+            found = current.get(key)
+            if found is None:
+                found = cached.get(key)
+            if found is None:
+                if not independent(block):
+                    return None
+                try:
+                    found = _parse(block, source, encoding, state)
+                except Exception:
+                    return None
+                if any(not msgid for _, msgid, _, _ in found[0]):
+                    return None  # a late header
+                parsed += 1
+            current[key] = found
+            entries.extend(found[0])
+            state = found[1]
+        self.parsed += parsed + 1
+        self.reused += len(blocks) - 1 - parsed
+        if parsed or len(current) != len(cached):
+            self._save(source, head, current)
+        return entries
@@ -6,15 +6,45 @@ This module contains the implementation of a hatchling hook plugin.
 
 This plugin allows compiling gettext .po files to .mo ones when building
 a wheel and installing them under an appropriate (but local) directory.
+
+The modules compiling the catalogs (and msgfmt.py) are only imported when
+something has to be compiled: a build whose stamp is still valid only
+reads its configuration and stats the recorded files.
 """
 
-import re
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
 from pathlib import Path
-from typing import Any, Generator
+from typing import Any, Generator, Optional, Union
 
 from hatchling.builders.hooks.plugin.interface import BuildHookInterface
 
-from .vendor.msgfmt import make
+from . import plurals
+from .__about__ import __version__
+from .cache import CompileCache
+from .discovery import find_sources, group_fragments, selected, selection
+from .manifest import MANIFEST_NAME, STAMP_NAME, Manifest, read_stamp, write_stamp
+from .options import (
+    BUNDLE_NAME,
+    DEFAULT_THRESHOLD,
+    STALE_STAGING,
+    Options,
+    default_jobs,
+)
+from .report import (
+    OUTPUT_FOLDER,
+    PROFILE_NAME,
+    REPORT_NAME,
+    PARSE_CACHE_NAME,
+    STAGING_NAME,
+    BuildReport,
+    output_path,
+)
 
 
 class MsgFmtBuildHook(BuildHookInterface):
@@ -26,17 +56,45 @@ class MsgFmtBuildHook(BuildHookInterface):
     #  of attributes in a method other than __init__
     locale: Path  # local folder for the gettext localedir folder
     src: Path  # local folder for the source .po files
+    jobs: Optional[int]  # maximum number of worker processes (None: automatic)
+    options: Options  # options of the generated .mo files
+    cache: Optional[CompileCache]  # shared cache of compiled catalogs
+    streaming_threshold: int  # size of the sources (bytes) triggering streaming
+    report: Optional[Path]  # JSON build report (None if not wanted)
+    profile: Optional[Path]  # cProfile output (None if not wanted)
+    staging: Optional[Path]  # parent of the staging folders (None if not wanted)
+    parse_cache: Optional[Path]  # cache of the parsed entries (None if not wanted)
+    staged: Optional[Path] = None  # staging folder of the current build
+    exported: Optional[Path] = None  # folder of the manifest shipped in an sdist
+    bundle: Optional[str]  # name of the bundle in locale (None if not wanted)
+    sdist: bool  # ship the compiled catalogs in the sdist
+    fragments: Union[bool, dict[str, str]]  # the grouping rule of the fragments
+    plurals: Optional[str]  # path in the wheel of the precompiled plural forms
+    plurals_range: int  # the values of n of the precompiled plural tables
+    languages: Optional[list[str]]  # allow-list of languages (None for all)
+    domains: Optional[list[str]]  # allow-list of domains (None for all)
+    stamp: Optional[str] = None  # configuration fingerprint of a stamped build
+    stamp_file: Path  # stamp of the last wheel build
 
     def clean(self, _versions: list[str]) -> None:
         # Described in BuildHookInterface
-        # This implementation tries to remove .mo files (or any file if
-        #  the direction force_clean=True is given) and empty directories
+        # This implementation removes the files and folders recorded in the
+        #  manifest. Without a manifest (or if the direction force_clean=True
+        #  is given) it tries to remove .mo files (or any file if force_clean)
+        #  and empty directories
         # In any case a remove error is not fatal and will not abort the build
         self.build_conf()
+        self.stamp_file.unlink(missing_ok=True)
+
+        if self.staging is not None and self.staging.is_dir():
+            self.clean_staging(self.staging)
 
-        self.app.display_debug("Cleaning everything in " + self.config["locale"], 2)
         force = self.config.get("force_clean")
+        if not force and (self.locale / MANIFEST_NAME).is_file():
+            self.clean_recorded()
+            return
 
+        self.app.display_debug("Cleaning everything in " + self.config["locale"], 2)
         for name in sorted(self.locale.rglob("*"), reverse=True):
             if name.is_dir():
                 try:
@@ -45,19 +103,93 @@ class MsgFmtBuildHook(BuildHookInterface):
                     self.app.display_warning(
                         f"Folder {name.name} not removed (not empty?)"
                     )
-            elif force or name.suffix == ".mo":
+            elif force or name.suffix == ".mo" or name.name == MANIFEST_NAME:
                 try:
                     name.unlink()
                 except OSError:
                     self.app.display_warning(f"File {name.name} not removed")
 
-    def initialize(self, _version: str, build_data: dict[str, Any]) -> None:
+    def clean_staging(self, staging: Path) -> None:
+        """
+        Remove the staging folders left by interrupted builds, keeping the
+        ones of the builds still running
+
+        :param staging: the parent of the staging folders
+        """
+        for folder in staging.iterdir():
+            if folder.is_dir() and self.abandoned(folder):
+                shutil.rmtree(folder, ignore_errors=True)
+                self.app.display_debug(f"Removed {folder}", 2)
+        try:
+            staging.rmdir()
+        except OSError:
+            pass  # in use by a concurrent build
+
+    @staticmethod
+    def abandoned(folder: Path) -> bool:
+        """
+        Tell whether the build owning a staging folder is over: its process
+        (whose pid is in the name of the folder) is gone, or the folder is
+        older than STALE_STAGING
+
+        :param folder: a staging folder
+        :return: True if it can be removed
+        """
+        try:
+            if time.time() - folder.stat().st_mtime > STALE_STAGING:
+                return True
+        except OSError:
+            return False
+        if sys.platform == "win32":  # no cov
+            return False  # os.kill would terminate the process
+        parts = folder.name.split("-", 2)  # locale-<pid>-<random>
+        if len(parts) < 3 or not parts[1].isdigit():
+            return False
+        try:
+            os.kill(int(parts[1]), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass  # alive, but owned by another user
+        return False
+
+    def clean_recorded(self) -> None:
+        """
+        Remove the files and the folders recorded in the manifest
+        """
+        manifest = Manifest.load(self.locale, Path(self.root))
+        self.app.display_debug(
+            f"Cleaning {len(manifest.entries)} file(s) recorded in "
+            + self.config["locale"],
+            2,
+        )
+        for target in list(manifest.entries) + [MANIFEST_NAME]:
+            try:
+                (self.locale / target).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                self.app.display_warning(f"File {target} not removed")
+        # bottom-up: the deepest folders first
+        depth_first = sorted(manifest.folders, key=lambda f: (f == ".", -f.count("/")))
+        for folder in depth_first:
+            try:
+                (self.locale / folder).rmdir()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                self.app.display_warning(f"Folder {folder} not removed (not empty?)")
+
+    def initialize(self, version: str, build_data: dict[str, Any]) -> None:
         # Described in BuildHookInterface
         self.build_conf()
         self.app.display_debug(f"hatch-msgfmt-s-ball building {self.target_name}")
-        if self.target_name != "wheel":
-            # The plugin only makes sense when building a wheel
-            # but calling it for another target does not deserve an abort
+        if self.target_name != "wheel" and not (
+            self.target_name == "sdist" and self.sdist
+        ):
+            # The plugin only makes sense when building a wheel (or an sdist
+            # shipping precompiled catalogs) but calling it for another
+            # target does not deserve an abort
             self.app.display_warning(
                 f"{self.target_name}: unexpected target - call ignored"
             )
@@ -68,17 +200,423 @@ class MsgFmtBuildHook(BuildHookInterface):
             )
             return
 
-        for path, lang, domain in self.source_files():
-            (self.locale / lang / "LC_MESSAGES").mkdir(parents=True, exist_ok=True)
-            mo = str(self.locale / lang / "LC_MESSAGES" / (domain + ".mo"))
-            make(str(path), mo)
-            mox = "locale/{lang}/LC_MESSAGES/{domain}.mo".format(
-                lang=lang, domain=domain
+        if version == "editable":
+            # an editable install uses the files of the project folder
+            self.staging = None
+        self.stamp = self.stamp_key(version)
+        if self.stamp is not None:
+            included = read_stamp(
+                self.stamp_file,
+                self.stamp,
+                Path(self.root),
+                self.locale / MANIFEST_NAME,
+            )
+            if included is not None:
+                self.app.display_debug("Nothing to compile: the stamp is valid", 1)
+                build_data["force_include"].update(included)
+                return
+        if self.staging is not None:
+            # a private folder per build: concurrent builds never share files
+            self.staging.mkdir(parents=True, exist_ok=True)
+            self.staged = self.locale = Path(
+                tempfile.mkdtemp(prefix=f"locale-{os.getpid()}-", dir=self.staging)
+            )
+            self.app.display_debug(f"Staging the .mo files in {self.staged}", 2)
+
+        profiler = None
+        if self.profile is not None:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            self.compile_all(build_data)
+        finally:
+            if profiler is not None and self.profile is not None:
+                profiler.disable()
+                self.profile.parent.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(str(self.profile))
+                self.app.display_debug(f"Profile written to {self.profile}")
+
+    def compile_all(self, build_data: dict[str, Any]) -> None:
+        """
+        Compile the stale catalogs and register all the .mo files
+
+        :param build_data: the build data of the hook
+        """
+        from . import compiler
+
+        start = time.perf_counter()
+        manifest = Manifest.load(self.locale, Path(self.root))
+        fingerprint = compiler.fingerprint(self.options)
+        if self.parse_cache is not None:
+            # the catalogs compiled from cached entries are recompiled with
+            #  a full parse when the cache is turned off, and conversely
+            from .parse_cache import FORMAT
+
+            fingerprint = f"{fingerprint} parse_cache={FORMAT}"
+        # catalogs compiled beforehand in the project locale folder (for
+        #  example by python -m hatch_msgfmt build) are reused when staging
+        precompiled = (
+            None
+            if self.staged is None
+            else Manifest.load(Path(self.root) / self.config["locale"], Path(self.root))
+        )
+        report = BuildReport(self.target_name, fingerprint, self.jobs)
+        watched: list[str] = []  # the scanned folders and .gitignore files
+        sources = sorted(self.source_files(watched))
+        report.discovery = time.perf_counter() - start
+        if self.languages is not None or self.domains is not None:
+            self.app.display_debug(
+                f"Selected {len(sources)} catalog(s) for languages"
+                f" {','.join(self.languages or ['*'])} and domains"
+                f" {','.join(self.domains or ['*'])}"
+            )
+        for path, lang, domain in sources:
+            self.app.display_debug(f"Including {path} ({lang}, {domain})", 2)
+        catalogs = self.merge_fallbacks(self.group_fragments(sources))
+        jobs = []
+        included = {}  # the force_include entries of the .mo files
+        # an sdist ships the files where the project has them
+        prefix = (
+            Path(self.config["locale"]).as_posix()
+            if self.target_name == "sdist"
+            else "locale"
+        )
+        for paths, lang, domain, fragments in catalogs:
+            target = "{lang}/LC_MESSAGES/{domain}.mo".format(lang=lang, domain=domain)
+            mox = f"{prefix}/{target}"
+            if manifest.is_fresh(target, paths, fingerprint):
+                self.app.display_debug(
+                    "{locale} is up to date".format(locale=mox), 1
+                )
+                report.add(target, paths, "up-to-date")
+            elif precompiled is not None and precompiled.is_fresh(
+                target, paths, fingerprint
+            ):
+                self.app.display_debug(f"{mox} is precompiled", 1)
+                manifest.make_dirs(f"{lang}/LC_MESSAGES")
+                shutil.copyfile(precompiled.locale / target, self.locale / target)
+                manifest.record(
+                    target,
+                    paths,
+                    fingerprint,
+                    precompiled.entries[target]["output"]["sha256"],
+                )
+                report.add(target, paths, "precompiled")
+            else:
+                manifest.make_dirs(f"{lang}/LC_MESSAGES")
+                jobs.append(
+                    compiler.Job(
+                        target,
+                        str(self.locale / target),
+                        [str(p) for p in paths],
+                        self.options,
+                        self.cache,
+                        self.streaming_threshold,
+                        domain,
+                        fragments,
+                        None if self.parse_cache is None else str(self.parse_cache),
+                    )
+                )
+            included[mox if self.staged is None else str(self.staged / target)] = mox
+
+        errors = []
+        hits = 0
+        workers = self.jobs
+        if workers is None:
+            size = 0
+            for job in jobs:
+                for source in job.sources:
+                    try:
+                        size += os.stat(source).st_size
+                    except OSError:
+                        pass  # the worker will report the error
+            workers = default_jobs(len(jobs), size)
+        report.jobs = workers
+        for job, result in zip(jobs, compiler.run_jobs(jobs, workers)):
+            if result.error is not None:
+                errors.append(result.error)
+                report.add(
+                    job.target, job.sources, "failed", result.stats, error=result.error
+                )
+                continue
+            hits += bool(result.cached)
+            report.add(
+                job.target,
+                job.sources,
+                "cached" if result.cached else "compiled",
+                result.stats,
+                written=result.written,
+            )
+            mox = f"{prefix}/{job.target}"
+            self.app.display_debug(
+                "Compiling {src} to {locale}".format(
+                    src=" + ".join(job.sources), locale=mox
+                ),
+                1,
+            )
+            if not result.written:
+                self.app.display_debug(f"{mox} unchanged - not rewritten", 2)
+            for duplicate in (result.stats or {}).get("duplicates", []):
+                self.app.display_warning(duplicate)
+            if self.options.dedupe and (result.stats or {}).get("streamed"):
+                self.app.display_warning(
+                    f"{mox} compiled in streaming mode: not deduplicated"
+                )
+            manifest.record(
+                job.target, [Path(s) for s in job.sources], fingerprint, result.digest
+            )
+        if self.bundle is not None and not errors:
+            # the bundle replaces the .mo files in the wheel
+            name = self.write_bundle(manifest, fingerprint, catalogs)
+            if self.target_name != "sdist":
+                included = {}
+            mox = f"{prefix}/{name}"
+            included[mox if self.staged is None else str(self.staged / name)] = mox
+        if self.plurals is not None and self.target_name != "sdist" and not errors:
+            try:
+                included[str(self.write_plurals(manifest, fingerprint, catalogs))] = (
+                    self.plurals
+                )
+            except ValueError as e:
+                errors.append(str(e))
+        if self.target_name == "sdist" and not errors:
+            # the wheel built from the sdist will reuse the compiled files.
+            #  The exported manifest is written outside the project, so that
+            #  hatchling does not also archive the one of the locale folder
+            self.exported = Path(tempfile.mkdtemp(prefix="hatch-msgfmt-"))
+            shipped = self.exported / MANIFEST_NAME
+            manifest.export(
+                shipped, [mox[len(prefix) + 1:] for mox in included.values()]
             )
-            build_data["force_include"][mox] = mox
+            included[str(shipped)] = f"{prefix}/{MANIFEST_NAME}"
+        build_data["force_include"].update(included)
+        manifest.save()
+        if self.stamp is not None and not errors and not manifest.verify:
+            root = Path(self.root)
+            write_stamp(
+                self.stamp_file,
+                self.stamp,
+                root,
+                watched
+                + [str(p) for paths, _, _, _ in catalogs for p in paths]
+                + [str(root / src) for src in included]
+                + [str(manifest.path)],
+                included,
+                manifest.path,
+            )
+        if self.cache is not None:
+            evicted = self.cache.evict()
+            self.app.display_debug(
+                f"Compile cache {self.cache.directory}: {hits} hit(s),"
+                f" {len(jobs) - len(errors) - hits} miss(es), {evicted} evicted"
+            )
+        if self.options.dedupe:
+            saved = report.as_dict()["totals"].get("deduped_bytes", 0)
+            self.app.display_debug(f"Deduplication saved {saved} byte(s)")
+        if self.parse_cache is not None:
+            totals = report.as_dict()["totals"]
             self.app.display_debug(
-                "Compiling {src} to {locale}".format(src=str(path), locale=mox), 1
+                f"Parse cache {self.parse_cache}:"
+                f" {totals.get('parsed_blocks', 0)} block(s) parsed,"
+                f" {totals.get('cached_blocks', 0)} reused"
             )
+        report.total = time.perf_counter() - start
+        self.app.display_debug(report.summary(), 2)
+        if self.report is not None:
+            report.save(self.report)
+            self.app.display_debug(f"Build report written to {self.report}")
+        if errors:
+            self.app.abort("\n".join(["Compilation failed:"] + errors))
+
+    def write_bundle(
+        self,
+        manifest: Manifest,
+        fingerprint: str,
+        sources: list[tuple[list[Path], str, str, Optional[list[str]]]],
+    ) -> str:
+        """
+        Write the bundle of the compiled catalogs unless it is up to date
+
+        :param manifest: the manifest of the locale folder
+        :param fingerprint: the compiler fingerprint
+        :param sources: the catalogs, as returned by merge_fallbacks
+        :return: the name of the bundle in the locale folder
+        """
+        from . import bundle, compiler
+
+        name = self.bundle
+        assert name is not None  # only called when a bundle is wanted
+        catalogs = [
+            (lang, domain, self.locale / f"{lang}/LC_MESSAGES/{domain}.mo")
+            for _, lang, domain, _ in sources
+        ]
+        mo_files = [mo for _, _, mo in catalogs]
+        if manifest.is_fresh(name, mo_files, fingerprint):
+            self.app.display_debug(f"locale/{name} is up to date", 1)
+            return name
+        self.app.display_debug(
+            f"Bundling {len(catalogs)} catalog(s) in locale/{name}", 1
+        )
+        output = bundle.build(
+            (lang, domain, mo.read_bytes()) for lang, domain, mo in catalogs
+        )
+        compiler.write_if_changed(self.locale / name, output)
+        manifest.record(name, mo_files, fingerprint, compiler.digest(output))
+        return name
+
+    def write_plurals(
+        self,
+        manifest: Manifest,
+        fingerprint: str,
+        sources: list[tuple[list[Path], str, str, Optional[list[str]]]],
+    ) -> Path:
+        """
+        Write the module of the precompiled plural forms of the catalogs
+        unless it is up to date
+
+        :param manifest: the manifest of the locale folder
+        :param fingerprint: the compiler fingerprint
+        :param sources: the catalogs, as returned by merge_fallbacks
+        :return: the path of the module
+        :raise ValueError: if the Plural-Forms of a catalog is invalid
+        """
+        from . import compiler
+        from .mapped import MappedTranslations
+
+        name = plurals.PLURALS_NAME
+        mo_files = [
+            self.locale / f"{lang}/LC_MESSAGES/{domain}.mo"
+            for _, lang, domain, _ in sources
+        ]
+        if manifest.is_fresh(name, mo_files, fingerprint):
+            self.app.display_debug(f"locale/{name} is up to date", 1)
+            return self.locale / name
+        values = []
+        for mo in mo_files:
+            with MappedTranslations(mo, cache_size=0) as t:
+                value = t.info().get("plural-forms")
+            if value:
+                try:
+                    plurals.check(value, self.plurals_range)
+                except ValueError as e:
+                    raise ValueError(f"{mo}: {e}") from None
+                values.append(value)
+        output = plurals.module_source(values, self.plurals_range).encode()
+        self.app.display_debug(
+            f"Precompiling the plural forms of {len(mo_files)} catalog(s)"
+            f" in locale/{name}", 1
+        )
+        compiler.write_if_changed(self.locale / name, output)
+        manifest.record(name, mo_files, fingerprint, compiler.digest(output))
+        return self.locale / name
+
+    def group_fragments(
+        self, sources: list[tuple[Path, str, str]]
+    ) -> list[tuple[list[Path], str, str]]:
+        """
+        The source files of every catalog: with the fragments option, the
+        .po files that the grouping rule maps to the same (lang, domain)
+        are the fragments of a single catalog
+
+        :param sources: the (file_path, lang, domain) tuples of the .po files
+        :return: tuples (file_paths, lang, domain)
+        """
+        if not self.fragments:
+            return [([path], lang, domain) for path, lang, domain in sources]
+        result = []
+        for paths, lang, domain in group_fragments(sources, self.src, self.fragments):
+            # the domains allow-list applies to the grouped catalogs
+            if selected(domain, self.domains):
+                if len(paths) > 1:
+                    self.app.display_debug(
+                        f"Grouping {len(paths)} fragments into {lang}/{domain}", 2
+                    )
+                result.append((paths, lang, domain))
+        return result
+
+    def merge_fallbacks(
+        self, catalogs: list[tuple[list[Path], str, str]]
+    ) -> list[tuple[list[Path], str, str, Optional[list[str]]]]:
+        """
+        The source files of every catalog: with the merge_fallbacks option,
+        a regional catalog (fr_CA) is compiled from the catalog of its base
+        language (fr) of the same domain followed by its own, which
+        overrides it (header included)
+
+        :param catalogs: the (file_paths, lang, domain) tuples of the catalogs
+        :return: tuples (file_paths, lang, domain, fragments), fragments
+            being the paths of the fragments of a grouped catalog or None
+        """
+        merge = self.config.get("merge_fallbacks", False)
+        bases = {
+            (lang, domain): paths
+            for paths, lang, domain in catalogs
+            if merge and "_" not in lang
+        }
+        result = []
+        for paths, lang, domain in catalogs:
+            fragments = [str(p) for p in paths] if len(paths) > 1 else None
+            base = bases.get((lang.split("_")[0], domain))
+            if "_" in lang and base is not None:
+                self.app.display_debug(
+                    f"Merging {' + '.join(map(str, base))} into {lang}/{domain}", 2
+                )
+                result.append(([*base, *paths], lang, domain, fragments))
+            else:
+                result.append((paths, lang, domain, fragments))
+        return result
+
+    def stamp_key(self, version: str) -> Optional[str]:
+        """
+        The fingerprint of the configuration of a build that can use a stamp
+
+        A staged build, a build writing a report or a profile and an sdist
+        always run in full.
+
+        :param version: the version of the build (standard or editable)
+        :return: a digest of everything the build depends on besides the
+            files, or None if the build cannot be stamped
+        """
+        if (
+            self.target_name != "wheel"
+            or self.staging is not None
+            or self.report is not None
+            or self.profile is not None
+        ):
+            return None
+        environ = {k: v for k, v in os.environ.items() if k.startswith("HATCH_MSGFMT_")}
+        data = [
+            __version__,
+            self.target_name,
+            version,
+            os.path.abspath(self.root),
+            self.config,
+            environ,
+        ]
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def finalize(
+        self, _version: str, _build_data: dict[str, Any], _artifact_path: str
+    ) -> None:
+        # Described in BuildHookInterface
+        # The staging folder (and the manifest exported for an sdist) are no
+        #  longer needed once the archive is built
+        if self.exported is not None:
+            shutil.rmtree(self.exported, ignore_errors=True)
+            self.exported = None
+        if self.staged is not None:
+            shutil.rmtree(self.staged, ignore_errors=True)
+            self.app.display_debug(f"Removed {self.staged}", 2)
+            self.staged = None
+            if self.staging is not None:
+                try:
+                    self.staging.rmdir()
+                except OSError:
+                    pass  # in use by a concurrent build
 
     def build_conf(self) -> None:
         """
@@ -88,6 +626,60 @@ class MsgFmtBuildHook(BuildHookInterface):
             self.config["messages"] = "messages"
         if "locale" not in self.config:
             self.config["locale"] = "locale"
+        jobs = self.config.get("jobs")
+        self.jobs = None if jobs is None else int(jobs)
+        self.options = Options(
+            hash_table=bool(self.config.get("hash_table", True)),
+            dedupe=bool(self.config.get("dedupe", False)),
+            plurals_range=int(
+                self.config.get("plurals_range", plurals.DEFAULT_RANGE)
+            ),
+        )
+        self.cache = CompileCache.from_config(self.config, Path(self.root))
+        bundle_name = self.config.get("bundle")
+        self.bundle = (
+            (BUNDLE_NAME if bundle_name is True else str(bundle_name))
+            if bundle_name
+            else None
+        )
+        self.streaming_threshold = (
+            int(self.config.get("streaming_threshold", DEFAULT_THRESHOLD))
+            << 20
+        )
+        output = Path(self.directory) / OUTPUT_FOLDER
+        self.report = output_path(
+            "report", self.config, output / REPORT_NAME, Path(self.root)
+        )
+        self.profile = output_path(
+            "profile", self.config, output / PROFILE_NAME, Path(self.root)
+        )
+        self.staging = output_path(
+            "staging", self.config, output / STAGING_NAME, Path(self.root)
+        )
+        self.parse_cache = output_path(
+            "parse_cache", self.config, output / PARSE_CACHE_NAME, Path(self.root)
+        )
+        self.stamp_file = output / STAMP_NAME
+        self.sdist = bool(self.config.get("sdist", False))
+        plurals_path = self.config.get("plurals")
+        self.plurals = (
+            (
+                f"locale/{plurals.PLURALS_NAME}"
+                if plurals_path is True
+                else str(plurals_path)
+            )
+            if plurals_path
+            else None
+        )
+        self.plurals_range = self.options.plurals_range
+        fragments = self.config.get("fragments", False)
+        self.fragments = (
+            {str(k): str(v) for k, v in fragments.items()}
+            if isinstance(fragments, dict)
+            else bool(fragments)
+        )
+        self.languages = selection("languages", self.config)
+        self.domains = selection("domains", self.config)
         self.locale = Path(self.root) / self.config["locale"]
         self.src = Path(self.root) / self.config["messages"]
 
@@ -98,20 +690,25 @@ class MsgFmtBuildHook(BuildHookInterface):
                 else self.src.name
             )
 
-    def source_files(self) -> Generator[tuple[Path, str, str], None, None]:
+    def source_files(
+        self, watched: Optional[list[str]] = None
+    ) -> Generator[tuple[Path, str, str], None, None]:
         """
         Yield tuples (file_path, lang, domain) of po files.
+
+        :param watched: if given, receives the paths of the scanned folders
+            and of the loaded .gitignore files
         """
-        # a compiled regex to extract the domain if present and the lang code
-        #  ('foo-fr_FR' -> ('foo', 'fr_FR') or 'de' -> (None, 'de'))
-        rx = re.compile(r"^(?:(.+)-)?([a-z]{2,3}(?:_[A-Z]+)?)$")
-        for child in self.src.iterdir():
-            if child.is_dir():
-                # found a LANG folder
-                for po in child.rglob(r"*.po"):
-                    yield po, child.name, po.stem
-            elif child.suffix == ".po":
-                m = rx.match(child.stem)
-                if m:
-                    domain = self.config["domain"] if m.group(1) is None else m.group(1)
-                    yield child, m.group(2), domain
+        max_depth = self.config.get("max_depth")
+        return find_sources(
+            self.src,
+            self.config["domain"],
+            self.config.get("include"),
+            self.config.get("exclude"),
+            None if max_depth is None else int(max_depth),
+            Path(self.root) if self.config.get("gitignore", False) else None,
+            self.languages,
+            # the domain of a fragment is only known once grouped
+            None if self.fragments else self.domains,
+            watched,
+        )
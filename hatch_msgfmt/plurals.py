@@ -0,0 +1,284 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module validates and precompiles the Plural-Forms of the catalogs.
+
+gettext compiles the plural expression of a catalog with c2py every time
+the catalog is loaded. The build validates the expressions and can emit a
+Python module whose TABLES give, for every expression, its number of forms
+and the plural form of every n below a limit. At run time, load() or
+register() makes the tables known, and MappedTranslations and
+PluralTranslations use them when they load a catalog instead of c2py: the
+expression is only compiled (once per process) for an n out of the table.
+
+This module only depends on the standard library so that an application
+can use it at run time.
+"""
+
+import gettext
+import os
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Mapping, Optional, Union
+
+DEFAULT_RANGE = 1000  # the values of n of a precompiled table
+PLURALS_NAME = "plurals.py"  # default name of the generated module
+
+_evaluators: dict[str, "Evaluator"] = {}
+
+
+def split(value: str) -> tuple[str, str]:
+    """
+    Split a Plural-Forms value as gettext does
+
+    :param value: the value, for example "nplurals=2; plural=(n != 1);"
+    :return: the nplurals part and the plural expression
+    :raise ValueError: if there is no plural expression
+    """
+    parts = value.split(";")
+    if len(parts) < 2 or "plural=" not in parts[1]:
+        raise ValueError(f"no plural expression in Plural-Forms: {value}")
+    return parts[0], parts[1].split("plural=")[1]
+
+
+def header_value(header: bytes) -> Optional[str]:
+    """
+    The Plural-Forms value of the header entry of a catalog
+
+    :param header: the msgstr of the header entry
+    :return: the stripped value or None without Plural-Forms
+    """
+    for line in header.split(b"\n"):
+        key, sep, value = line.partition(b":")
+        if sep and key.strip().lower() == b"plural-forms":
+            return value.decode("latin-1").strip()
+    return None
+
+
+@lru_cache(maxsize=256)
+def check(value: str, limit: int = DEFAULT_RANGE) -> tuple[int, str, bytes]:
+    """
+    Validate a Plural-Forms value and compute its table (cached, as the
+    catalogs of a language share their value)
+
+    :param value: the value of the Plural-Forms header
+    :param limit: the number of values of n in the table
+    :return: the number of forms, the plural expression and the forms of
+        n in range(limit)
+    :raise ValueError: if the value is malformed or if the expression gives
+        a form out of range
+    """
+    count, expression = split(value)
+    name, sep, number = count.partition("=")
+    try:
+        if name.strip() != "nplurals" or not sep:
+            raise ValueError
+        nplurals = int(number)
+    except ValueError:
+        raise ValueError(f"invalid nplurals in Plural-Forms: {value}") from None
+    if not 0 < nplurals < 256:
+        raise ValueError(f"nplurals out of range in Plural-Forms: {value}")
+    try:
+        func = gettext.c2py(expression)
+        forms = [func(n) for n in range(limit)]
+    except (ValueError, ArithmeticError) as e:
+        raise ValueError(f"invalid plural expression {expression!r}: {e}") from None
+    for n, form in enumerate(forms):
+        if not 0 <= form < nplurals:
+            raise ValueError(
+                f"plural expression {expression!r} gives form {form} for n={n}"
+                f" but nplurals={nplurals}"
+            )
+    return nplurals, expression, bytes(forms)
+
+
+def check_header(
+    header: bytes, limit: int = DEFAULT_RANGE
+) -> Optional[tuple[int, str, bytes]]:
+    """
+    Validate the Plural-Forms of the header entry of a catalog
+
+    :param header: the msgstr of the header entry
+    :param limit: the number of values of n to check
+    :return: the result of check() or None without Plural-Forms
+    :raise ValueError: if the Plural-Forms value is invalid
+    """
+    value = header_value(header)
+    return None if value is None else check(value, limit)
+
+
+def module_source(values: Iterable[str], limit: int = DEFAULT_RANGE) -> str:
+    """
+    The source of a module of precompiled plural tables
+
+    :param values: the Plural-Forms values of the catalogs
+    :param limit: the number of values of n in every table
+    :return: a Python module defining TABLES
+    :raise ValueError: if a value is malformed
+    """
+    tables = {}
+    for value in values:
+        nplurals, expression, table = check(value, limit)
+        tables[expression] = (nplurals, table)
+    lines = [
+        '"""Plural forms precompiled by hatch-msgfmt-s-ball - do not edit"""',
+        "",
+        "# plural expression: (nplurals, plural form of every n < len(table))",
+        "TABLES = {",
+    ]
+    for expression, (nplurals, table) in sorted(tables.items()):
+        lines.append(f"    {expression!r}: ({nplurals}, {table!r}),")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+class Evaluator:
+    """
+    A plural function reading a precompiled table and only compiling its
+    expression for the values of n out of the table
+    """
+
+    def __init__(self, expression: str, table: bytes) -> None:
+        """
+        :param expression: the C plural expression
+        :param table: the plural forms of n in range(len(table))
+        """
+        self.expression = expression
+        self.table = table
+
+    def __call__(self, n: int) -> int:
+        if type(n) is int and 0 <= n < len(self.table):
+            return self.table[n]
+        return _compile(self.expression)(n)
+
+
+@lru_cache(maxsize=None)
+def _compile(expression: str) -> Callable[[int], int]:
+    # c2py once per expression and per process
+    return gettext.c2py(expression)
+
+
+def register(tables: Mapping[str, tuple[int, bytes]]) -> None:
+    """
+    Make precompiled tables known to evaluator()
+
+    :param tables: the TABLES of a generated module
+    """
+    for expression, (_, table) in tables.items():
+        _evaluators[expression] = Evaluator(expression, table)
+
+
+def load(path: Union[str, os.PathLike]) -> None:
+    """
+    Register the tables of a generated module given by its path
+
+    :param path: the module file, for example shipped next to the catalogs
+    """
+    import runpy
+
+    register(runpy.run_path(os.fspath(path))["TABLES"])
+
+
+def evaluator(expression: str) -> Callable[[int], int]:
+    """
+    The plural function of an expression
+
+    :param expression: the C plural expression
+    :return: its registered Evaluator or its (cached) compiled function
+    """
+    found = _evaluators.get(expression)
+    return _compile(expression) if found is None else found
+
+
+def read_header(
+    header: bytes, info: dict[str, str]
+) -> tuple[Optional[str], Optional[str]]:
+    """
+    Read the metadata of the header entry of a .mo file as
+    GNUTranslations._parse does
+
+    :param header: the msgstr of the header entry
+    :param info: the metadata by lower case key, updated in place
+    :return: the charset and the plural expression (None if not declared)
+    """
+    charset = plural = None
+    lastk: Optional[str] = None
+    for b_item in header.split(b"\n"):
+        item = b_item.decode().strip()
+        if not item:
+            continue
+        if item.startswith("#-#-#-#-#") and item.endswith("#-#-#-#-#"):
+            continue
+        if ":" not in item:
+            if lastk:
+                info[lastk] += "\n" + item
+            continue
+        k, v = item.split(":", 1)
+        k = k.strip().lower()
+        v = v.strip()
+        info[k] = v
+        lastk = k
+        if k == "content-type":
+            charset = v.split("charset=")[1]
+        elif k == "plural-forms":
+            plural = v.split(";")[1].split("plural=")[1]
+    return charset, plural
+
+
+class PluralTranslations(gettext.GNUTranslations):
+    """
+    A GNUTranslations using the registered evaluators (the expression of a
+    catalog is not compiled by c2py when it is loaded). Given as class_ to
+    gettext.translation, it also applies to the fallback catalogs.
+    """
+
+    # the attributes of GNUTranslations set here
+    _info: dict[str, str]
+    _charset: Optional[str]
+    _catalog: dict[Any, str]
+
+    def _parse(self, fp: Any) -> None:
+        # Documented extension point of NullTranslations: the parse of
+        #  GNUTranslations, except for the plural function
+        import struct
+
+        filename = getattr(fp, "name", "")
+        catalog: dict[Any, str] = {}
+        self._catalog = catalog
+        self.plural = lambda n: int(n != 1)  # germanic plural by default
+        buf = fp.read()
+        buflen = len(buf)
+        magic = struct.unpack("<I", buf[:4])[0]
+        if magic == self.LE_MAGIC:
+            ii = "<II"
+        elif magic == self.BE_MAGIC:
+            ii = ">II"
+        else:
+            raise OSError(0, "Bad magic number", filename)
+        version, msgcount, masteridx, transidx = struct.unpack(
+            ii[0] + "4I", buf[4:20]
+        )
+        if version >> 16 not in self.VERSIONS:
+            raise OSError(0, f"Bad version number {version >> 16}", filename)
+        for _ in range(msgcount):
+            mlen, moff = struct.unpack(ii, buf[masteridx:masteridx + 8])
+            tlen, toff = struct.unpack(ii, buf[transidx:transidx + 8])
+            if moff + mlen >= buflen or toff + tlen >= buflen:
+                raise OSError(0, "File is corrupt", filename)
+            msg = buf[moff:moff + mlen]
+            tmsg = buf[toff:toff + tlen]
+            if mlen == 0:
+                charset, plural = read_header(tmsg, self._info)
+                if charset is not None:
+                    self._charset = charset
+                if plural is not None:
+                    self.plural = evaluator(plural)
+            charset = self._charset or "ascii"
+            if b"\0" in msg:
+                msgid1 = str(msg.split(b"\0")[0], charset)
+                for i, form in enumerate(tmsg.split(b"\0")):
+                    catalog[(msgid1, i)] = str(form, charset)
+            else:
+                catalog[str(msg, charset)] = str(tmsg, charset)
+            masteridx += 8
+            transidx += 8
@@ -0,0 +1,166 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module collects the per-catalog instrumentation of a build.
+
+The report records, for every catalog, the decision taken (up to date,
+served from the cache, compiled or failed), the time spent parsing,
+generating and writing it, and its sizes. It can be saved as a JSON file
+and summarized as a table for the debug output.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional, Union
+
+REPORT_NAME = "report.json"
+PROFILE_NAME = "profile.pstats"
+STAGING_NAME = "staging"  # parent of the per-build staging folders
+PARSE_CACHE_NAME = "parse-cache"  # folder of the cache of parsed entries
+OUTPUT_FOLDER = ".hatch-msgfmt"  # sub-folder of the build directory
+FORMAT = 1  # version of the report format
+
+FALSE = ("", "0", "false", "no", "off")
+TRUE = ("1", "true", "yes", "on")
+
+
+def output_path(
+    name: str,
+    config: dict[str, Any],
+    default: Path,
+    root: Path,
+    environ: Optional[Mapping[str, str]] = None,
+) -> Optional[Path]:
+    """
+    Resolve an opt-in output file or folder declared by a hook option or by
+    the HATCH_MSGFMT_<NAME> environment variable (which takes precedence).
+
+    The value can be a boolean (or "1", "true"...) to use the default path
+    or a path relative to the project root.
+
+    :param name: the name of the hook option
+    :param config: the hook configuration
+    :param default: the path used for a true value
+    :param root: the project root
+    :param environ: the environment (default os.environ)
+    :return: the path or None if it is not wanted
+    """
+    environ = os.environ if environ is None else environ
+    value: Union[str, bool, None] = environ.get(f"HATCH_MSGFMT_{name.upper()}")
+    if value is None:
+        value = config.get(name)
+    if isinstance(value, str) and value.lower() in FALSE + TRUE:
+        value = value.lower() in TRUE
+    if not value:
+        return None
+    return default if value is True else root / Path(str(value)).expanduser()
+
+
+class BuildReport:
+    """The instrumentation of one run of the hook"""
+
+    def __init__(self, target: str, fingerprint: str, jobs: Optional[int]) -> None:
+        """
+        :param target: the name of the build target
+        :param fingerprint: the compiler fingerprint
+        :param jobs: the maximum number of worker processes (None if it
+            depends on the catalogs to compile)
+        """
+        self.target = target
+        self.fingerprint = fingerprint
+        self.jobs = jobs
+        self.discovery = 0.0
+        self.total = 0.0
+        self.catalogs: list[dict[str, Any]] = []
+
+    def add(
+        self,
+        target: str,
+        sources: Iterable[Union[str, Path]],
+        decision: str,
+        stats: Optional[Mapping[str, Any]] = None,
+        **extra: Any,
+    ) -> None:
+        """
+        Record the processing of a catalog
+
+        :param target: the .mo file relative to the locale folder
+        :param sources: its .po files
+        :param decision: "up-to-date", "precompiled", "cached", "compiled"
+            or "failed"
+        :param stats: the timings and sizes measured by the compiler
+        :param extra: other fields (written, error...)
+        """
+        entry = {
+            "target": target,
+            "sources": [str(s) for s in sources],
+            "decision": decision,
+        }
+        entry.update(stats or {})
+        entry.update(extra)
+        self.catalogs.append(entry)
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        :return: the report as a JSON serializable dict
+        """
+        totals: dict[str, Any] = {}
+        for entry in self.catalogs:
+            for key in ("parse", "generate", "write", "messages", "fuzzy",
+                        "input_bytes", "output_bytes", "deduped_bytes",
+                        "parsed_blocks", "cached_blocks"):
+                if key in entry:
+                    totals[key] = totals.get(key, 0) + entry[key]
+            totals[entry["decision"]] = totals.get(entry["decision"], 0) + 1
+        return {
+            "format": FORMAT,
+            "target": self.target,
+            "compiler": self.fingerprint,
+            "jobs": self.jobs,
+            "discovery": self.discovery,
+            "total": self.total,
+            "totals": totals,
+            "catalogs": sorted(self.catalogs, key=lambda c: c["target"]),
+        }
+
+    def save(self, path: Path) -> None:
+        """
+        Write the report as a JSON file
+
+        :param path: the file (its folder is created if needed)
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.as_dict(), indent=1), encoding="utf-8")
+
+    def summary(self) -> str:
+        """
+        Format the report as a table
+
+        :return: one line per catalog followed by a total line
+        """
+        def ms(entry: Mapping[str, Any], key: str) -> str:
+            return f"{entry[key] * 1000:9.1f}" if key in entry else " " * 9
+
+        def num(entry: Mapping[str, Any], key: str) -> str:
+            return f"{entry[key]:>9}" if key in entry else " " * 9
+
+        report = self.as_dict()
+        lines = [
+            f"{'catalog':<32} {'decision':<10} {'parse ms':>9} {'gen ms':>9}"
+            f" {'write ms':>9} {'messages':>9} {'fuzzy':>9} {'in':>9} {'out':>9}"
+        ]
+        for entry in report["catalogs"] + [
+            dict(report["totals"], target="total", decision="")
+        ]:
+            lines.append(
+                f"{entry['target']:<32} {entry['decision']:<10}"
+                f" {ms(entry, 'parse')} {ms(entry, 'generate')} {ms(entry, 'write')}"
+                f" {num(entry, 'messages')} {num(entry, 'fuzzy')}"
+                f" {num(entry, 'input_bytes')} {num(entry, 'output_bytes')}"
+            )
+        lines.append(
+            f"discovery {self.discovery * 1000:.1f} ms, total {self.total * 1000:.1f} ms"
+        )
+        return "\n".join(lines)
@@ -0,0 +1,217 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This module compiles very large catalogs with a bounded memory.
+
+The entries are parsed one at a time: their values are spilled to a
+temporary file and their keys are sorted by runs that are merged from
+disk (an external sort). The .mo file is then written in a second pass.
+Only per-message integers (lengths and hashes) are kept in memory, so the
+memory scales with the number of messages and not with their size. The
+output is identical to the one of msgfmt.generate.
+"""
+
+import array
+import heapq
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator, Optional
+
+from . import plurals
+from .vendor import msgfmt
+
+RUN_SIZE = 16 << 20  # bytes of keys sorted in memory before spilling a run
+BUFFER = 1 << 16  # size of the file buffers
+
+# a sorted record: key length, sequence number, value offset and length
+_RECORD = struct.Struct("<IQQI")
+
+
+def _write_run(records: list[tuple[bytes, int, int, int]], f: IO[bytes]) -> None:
+    # Sort a run of records and write it to a file
+    records.sort()
+    for key, seq, offset, length in records:
+        f.write(_RECORD.pack(len(key), seq, offset, length))
+        f.write(key)
+
+
+def _read_run(path: Path) -> Iterator[tuple[bytes, int, int, int]]:
+    # Read back the records of a run file
+    with open(path, "rb", buffering=BUFFER) as f:
+        while True:
+            head = f.read(_RECORD.size)
+            if not head:
+                return
+            size, seq, offset, length = _RECORD.unpack(head)
+            yield f.read(size), seq, offset, length
+
+
+def _spill(
+    sources: Iterable[Path],
+    folder: Path,
+    values: IO[bytes],
+    run_size: int,
+    plurals_range: int,
+) -> tuple[list[Path], int, int, int]:
+    # Parse the sources, write the values to the values file and the keys
+    # to sorted run files. Returns the runs and the numbers of entries,
+    # of skipped fuzzy entries and of input bytes
+    runs: list[Path] = []
+    records: list[tuple[bytes, int, int, int]] = []
+    pending = seq = fuzzy = size = 0
+    offset = 0
+    charset = None
+
+    def flush() -> None:
+        run = folder / f"run{len(runs)}"
+        with open(run, "wb", buffering=BUFFER) as f:
+            _write_run(records, f)
+        runs.append(run)
+        records.clear()
+
+    for source in sources:
+        try:
+            with open(source, "rb", buffering=BUFFER) as f:
+                for ctxt, id, string, is_fuzzy in msgfmt.parse(f, str(source)):
+                    if not id and ctxt is None:
+                        charset = msgfmt.check_charset(charset, string, str(source))
+                        if not is_fuzzy:
+                            try:
+                                plurals.check_header(string, plurals_range)
+                            except ValueError as e:
+                                raise msgfmt.MsgfmtError(f"{source}: {e}") from None
+                    # same rules as msgfmt.add
+                    if is_fuzzy or not string:
+                        fuzzy += bool(is_fuzzy and string)
+                        continue
+                    key = id if ctxt is None else b"%b\x04%b" % (ctxt, id)
+                    values.write(string)
+                    records.append((key, seq, offset, len(string)))
+                    offset += len(string)
+                    seq += 1
+                    pending += len(key)
+                    if pending >= run_size:
+                        flush()
+                        pending = 0
+                size += f.tell()
+        except OSError as e:
+            raise msgfmt.MsgfmtError(e) from e
+    if records or not runs:
+        flush()
+    return runs, seq, fuzzy, size
+
+
+def _unique(
+    records: Iterator[tuple[bytes, int, int, int]],
+) -> Iterator[tuple[bytes, int, int]]:
+    # Keep the last record (highest sequence number) of every key
+    previous = None
+    for record in records:
+        if previous is not None and previous[0] != record[0]:
+            yield previous[0], previous[2], previous[3]
+        previous = record
+    if previous is not None:
+        yield previous[0], previous[2], previous[3]
+
+
+def compile_to_file(
+    sources: Iterable[Path],
+    output: Path,
+    hash_table: bool = True,
+    stats: Optional[dict[str, Any]] = None,
+    run_size: int = RUN_SIZE,
+    plurals_range: int = plurals.DEFAULT_RANGE,
+) -> None:
+    """
+    Compile one or more .po files into a .mo file with a bounded memory.
+
+    The temporary files are created next to the output file, since the
+    temporary folder of a CI container often lives in memory.
+
+    :param sources: the paths of the .po files (the last one wins for
+        repeated keys)
+    :param output: the .mo file to write
+    :param hash_table: generate the GNU hash table
+    :param stats: if given, receives the parse and generate times, the
+        number of messages, of skipped fuzzy entries and of input bytes
+    :param run_size: the bytes of keys sorted in memory before being
+        spilled to disk
+    :param plurals_range: the values of n checked in the Plural-Forms
+    """
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=output.parent, prefix=".msgfmt-") as d:
+        folder = Path(d)
+        with open(folder / "values", "w+b", buffering=BUFFER) as values:
+            runs, _, fuzzy, size = _spill(
+                sources, folder, values, run_size, plurals_range
+            )
+            parsed = time.perf_counter()
+
+            # first pass: merge the runs into a file of unique sorted keys
+            key_lengths = array.array("I")
+            value_lengths = array.array("I")
+            hashes = array.array("I")
+            merged = folder / "merged"
+            with open(merged, "wb", buffering=BUFFER) as f:
+                for key, offset, length in _unique(
+                    heapq.merge(*(_read_run(run) for run in runs))
+                ):
+                    f.write(_RECORD.pack(len(key), 0, offset, length))
+                    f.write(key)
+                    key_lengths.append(len(key))
+                    value_lengths.append(length)
+                    if hash_table:
+                        hashes.append(msgfmt.hashpjw(key))
+            for run in runs:
+                run.unlink()
+
+            # second pass: the same layout as msgfmt.generate
+            count = len(key_lengths)
+            table = (
+                msgfmt.hash_table_from_hashes(hashes) if hash_table
+                else array.array("I")
+            )
+            del hashes
+            offsets = array.array("i", bytes(16 * count))
+            pos = 7 * 4 + 16 * count + 4 * len(table)
+            i = 0
+            for lengths in (key_lengths, value_lengths):
+                for length in lengths:
+                    offsets[i] = length
+                    offsets[i + 1] = pos
+                    pos += length + 1
+                    i += 2
+            with open(output, "wb", buffering=BUFFER) as out:
+                out.write(
+                    struct.pack(
+                        "Iiiiiii",
+                        0x950412DE,  # Magic
+                        0,  # Version
+                        count,  # number of entries
+                        7 * 4,  # start of key index
+                        7 * 4 + count * 8,  # start of value index
+                        len(table),  # size and offset of hash table
+                        7 * 4 + count * 16 if hash_table else 0,
+                    )
+                )
+                out.write(offsets.tobytes())
+                del offsets
+                out.write(table.tobytes())
+                for key, _, _, _ in _read_run(merged):
+                    out.write(key)
+                    out.write(b"\0")
+                for _, _, offset, length in _read_run(merged):
+                    values.seek(offset)
+                    out.write(values.read(length))
+                    out.write(b"\0")
+    if stats is not None:
+        stats.update(
+            parse=parsed - start,
+            generate=time.perf_counter() - parsed,
+            messages=count,
+            fuzzy=fuzzy,
+            input_bytes=size,
+        )
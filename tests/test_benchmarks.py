@@ -0,0 +1,103 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module runs the benchmarks as a smoke test, and tests their
+generators and their baseline comparison.
+
+Setting HATCH_MSGFMT_BENCH_BASELINE to a baseline file written by
+`python -m benchmarks --save` runs the full benchmarks and fails on a
+regression.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks import __main__ as cli
+from benchmarks import runner
+from benchmarks.catalogs import locale_tree, po_content
+from hatch_msgfmt.vendor import msgfmt
+
+
+@pytest.mark.parametrize("charset", ["UTF-8", "ISO-8859-1", "KOI8-R"])
+def test_po_content(tmp_path, charset) -> None:
+    """
+    Ensures that the synthetic catalogs are deterministic and valid
+    """
+    content = po_content(200, seed=3, charset=charset, multiline=0.5)
+    assert content == po_content(200, seed=3, charset=charset, multiline=0.5)
+    po = tmp_path / "x.po"
+    po.write_bytes(content)
+    messages = {}
+    msgfmt.process(str(po), messages)
+    assert len(messages) > 150
+
+
+def test_locale_tree(tmp_path) -> None:
+    """
+    Ensures that the generated trees use the plugin naming rules
+    """
+    files = locale_tree(tmp_path, languages=6, domains=2, entries=1, noise=1)
+    assert len(files) == 12
+    assert tmp_path / "ae_AA" / "LC_MESSAGES" / "domain1.po" in files
+    flat = locale_tree(tmp_path / "flat", languages=2, domains=1, entries=1,
+                       layout="flat")
+    assert flat == [tmp_path / "flat" / "domain0-aa.po",
+                    tmp_path / "flat" / "domain0-ab.po"]
+
+
+def test_quick(capsys) -> None:
+    """
+    Runs every benchmark on tiny catalogs
+    """
+    assert cli.main(["--quick", "--scale", "0.5"]) == 0
+    out = capsys.readouterr().out
+    for name in runner.BENCHMARKS:
+        assert name in out
+
+
+def test_compare(tmp_path) -> None:
+    """
+    Ensures that only time or memory increases beyond the threshold are
+    reported as regressions
+    """
+    baseline = tmp_path / "baseline.json"
+    runner.save([runner.Measure("a", 1.0, 10.0, "files", 1000),
+                 runner.Measure("b", 1.0, 10.0, "files", 1000)], baseline)
+    assert json.loads(baseline.read_text())["a"]["seconds"] == 1.0
+    results = [runner.Measure("a", 1.2, 8.3, "files", 1200),
+               runner.Measure("b", 1.5, 6.7, "files", 2000),
+               runner.Measure("c", 9.0, 1.0, "files", 9000)]
+    regressions = runner.compare(results, baseline, 0.25)
+    assert len(regressions) == 2
+    assert all(r.startswith("b: ") for r in regressions)
+    assert runner.compare(results, baseline, 1.0) == []
+
+
+def test_exit_code(tmp_path) -> None:
+    """
+    Ensures that the command line fails on a regression
+    """
+    baseline = tmp_path / "baseline.json"
+    assert cli.main(["--quick", "-k", "^parse$", "--save", str(baseline)]) == 0
+    assert cli.main(["--quick", "-k", "^parse$", "--baseline", str(baseline),
+                     "--threshold", "1000"]) == 0
+    data = json.loads(baseline.read_text())
+    data["parse"]["seconds"] = 0.0
+    baseline.write_text(json.dumps(data))
+    assert cli.main(["--quick", "-k", "^parse$", "--baseline", str(baseline)]) == 1
+
+
+@pytest.mark.skipif("HATCH_MSGFMT_BENCH_BASELINE" not in os.environ,
+                    reason="no benchmark baseline")
+def test_baseline() -> None:
+    """
+    Runs the full benchmarks against the baseline given in the environment
+    """
+    results = runner.run()
+    assert runner.compare(
+        results, Path(os.environ["HATCH_MSGFMT_BENCH_BASELINE"])
+    ) == []
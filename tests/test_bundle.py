@@ -0,0 +1,84 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the catalog bundles.
+"""
+
+import gettext
+
+import pytest
+
+from hatch_msgfmt import bundle
+from hatch_msgfmt.vendor import msgfmt
+
+
+def catalog(**messages: str) -> bytes:
+    """
+    The .mo image of some messages
+
+    :param messages: the translations by msgid
+    :return: the content of the .mo file
+    """
+    data = {b"": b"Content-Type: text/plain; charset=UTF-8\n"}
+    data.update({k.encode(): v.encode() for k, v in messages.items()})
+    return msgfmt.generate(data, hash=True)
+
+
+@pytest.fixture
+def path(tmp_path):
+    """
+    A pytest fixture providing a bundle of 3 catalogs
+
+    :param tmp_path: a folder for temporary files
+    :return: the path of the bundle
+    """
+    path = tmp_path / "catalogs.bundle"
+    path.write_bytes(bundle.build([
+        ("fr", "app", catalog(yes="oui", no="non")),
+        ("fr_CA", "app", catalog(yes="ouais")),
+        ("de", "lib", catalog(yes="ja")),
+    ]))
+    return path
+
+
+def test_index(path) -> None:
+    """
+    Ensures that the images are indexed, aligned and unchanged
+    """
+    b = bundle.Bundle(path)
+    assert b.catalogs() == [("de", "lib"), ("fr", "app"), ("fr_CA", "app")]
+    assert all(offset % 8 == 0 for offset, _ in b.index.values())
+    assert b.read("fr", "app") == catalog(yes="oui", no="non")
+    with pytest.raises(KeyError):
+        b.read("de", "app")
+
+
+def test_translation(path, monkeypatch) -> None:
+    """
+    Ensures that the translations follow the rules of gettext.translation
+    """
+    b = bundle.Bundle(path)
+    t = b.translation("app", ["fr_CA.UTF-8"])
+    assert isinstance(t, gettext.GNUTranslations)
+    assert t.gettext("yes") == "ouais"
+    assert t.gettext("no") == "non"  # from the fr fallback
+    assert b.translation("app", ["de", "fr"]).gettext("yes") == "oui"
+    monkeypatch.setenv("LANGUAGE", "de:fr")
+    monkeypatch.setenv("LANG", "fr_CA")
+    assert bundle.translation(path, "lib").gettext("yes") == "ja"
+    assert b.translation("app", ["C", "fr"], fallback=True).gettext("yes") == "yes"
+    with pytest.raises(FileNotFoundError):
+        b.translation("app", ["es"])
+    # the catalogs are parsed once
+    assert b.translation("app", ["fr"])._catalog is t._fallback._catalog
+
+
+def test_not_bundle(tmp_path) -> None:
+    """
+    Ensures that a file which is not a bundle is rejected
+    """
+    for content in (b"", b"HMOBNDL\0\2\0\0\0\0\0\0\0", catalog()):
+        (tmp_path / "x").write_bytes(content)
+        with pytest.raises(ValueError):
+            bundle.Bundle(tmp_path / "x")
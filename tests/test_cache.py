@@ -0,0 +1,116 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the shared cache of compiled catalogs.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from hatch_msgfmt.cache import CompileCache
+
+
+@pytest.fixture
+def cache(tmp_path) -> CompileCache:
+    """
+    A pytest fixture providing an empty cache limited to 100 bytes
+
+    :param tmp_path: a folder for temporary files
+    :return: a CompileCache
+    """
+    return CompileCache(tmp_path / "cache", 100)
+
+
+def test_key() -> None:
+    """
+    Ensures that the key depends on the contents and the fingerprint
+    """
+    key = CompileCache.key([b"ab", b"c"], "v1")
+    assert key == CompileCache.key([b"ab", b"c"], "v1")
+    assert key != CompileCache.key([b"a", b"bc"], "v1")
+    assert key != CompileCache.key([b"ab", b"c"], "v2")
+
+
+def test_put_get(cache) -> None:
+    """
+    Ensures that an inserted entry is found and that a missing one is not
+
+    :param cache: an empty cache
+    """
+    key = CompileCache.key([b"po"], "v1")
+    assert cache.get(key) is None
+    cache.put(key, b"mo")
+    assert cache.get(key) == b"mo"
+    assert [p.name for p in cache.directory.rglob("*.mo")] == [f"{key}.mo"]
+    assert not list(cache.directory.rglob("*.tmp"))
+
+
+def test_evict(cache) -> None:
+    """
+    Ensures that the least recently used entries are evicted first
+
+    :param cache: an empty cache limited to 100 bytes
+    """
+    keys = [CompileCache.key([bytes([i])], "v1") for i in range(4)]
+    for age, key in enumerate(keys):
+        cache.put(key, b"x" * 40)
+        mtime = 1_000_000 - 1000 * age
+        os.utime(cache.path(key), (mtime, mtime))
+    cache.get(keys[3])  # the oldest becomes the most recently used
+    assert cache.evict() == 2
+    assert [cache.get(key) is not None for key in keys] == [True, False, False, True]
+    assert cache.evict() == 0
+
+
+def test_evict_missing(tmp_path) -> None:
+    """
+    Ensures that evicting from a cache that does not exist is harmless
+
+    :param tmp_path: a folder for temporary files
+    """
+    assert CompileCache(tmp_path / "missing", 0).evict() == 0
+
+
+class TestConfig:
+    """
+    Tests for the declaration of the cache
+    """
+
+    def test_none(self, tmp_path) -> None:
+        """
+        Ensures that there is no cache by default
+
+        :param tmp_path: a folder for temporary files
+        """
+        assert CompileCache.from_config({}, tmp_path, {}) is None
+
+    def test_config(self, tmp_path) -> None:
+        """
+        Ensures that the cache can be declared in the hook configuration
+
+        :param tmp_path: a folder for temporary files
+        """
+        cache = CompileCache.from_config(
+            {"cache_dir": "cache", "cache_size": 2}, tmp_path, {}
+        )
+        assert cache is not None
+        assert cache.directory == tmp_path / "cache"
+        assert cache.max_size == 2 << 20
+
+    def test_environ(self, tmp_path) -> None:
+        """
+        Ensures that the environment variables take precedence
+
+        :param tmp_path: a folder for temporary files
+        """
+        cache = CompileCache.from_config(
+            {"cache_dir": "cache"},
+            tmp_path,
+            {"HATCH_MSGFMT_CACHE": "/shared", "HATCH_MSGFMT_CACHE_SIZE": "1"},
+        )
+        assert cache is not None
+        assert cache.directory == Path("/shared")
+        assert cache.max_size == 1 << 20
@@ -0,0 +1,154 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the command line interface of the plugin.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from hatch_msgfmt import cli
+
+PYPROJECT = """
+[project]
+name = "myapp"
+version = "1.0"
+
+[tool.hatch.build.hooks.msgfmt]
+messages = "unused"
+dedupe = true
+
+[tool.hatch.build.targets.wheel.hooks.msgfmt]
+messages = "po"
+jobs = 1
+domain = "app"
+staging = true
+"""
+
+
+@pytest.fixture
+def project(tmp_path) -> Path:
+    """
+    A pytest fixture providing a project with a French catalog
+
+    :param tmp_path: a folder for temporary files
+    :return: the project root
+    """
+    (tmp_path / "pyproject.toml").write_text(PYPROJECT)
+    (tmp_path / "po").mkdir()
+    shutil.copy(Path(__file__).parent / "data" / "foo-fr.po", tmp_path / "po" / "fr.po")
+    return tmp_path
+
+
+def test_config(project) -> None:
+    """
+    Ensures that, as for hatchling, the wheel target options replace the
+    global ones, which are only used without a wheel target hook
+    """
+    hook = cli.make_hook(project, cli.CliApplication())
+    assert hook.config == {"messages": "po", "jobs": 1, "domain": "app",
+                           "staging": True}
+    pyproject = project / "pyproject.toml"
+    pyproject.write_text(PYPROJECT.split("[tool.hatch.build.targets")[0])
+    hook = cli.make_hook(project, cli.CliApplication())
+    assert hook.config == {"messages": "unused", "dedupe": True}
+
+
+def test_watch(project) -> None:
+    """
+    Ensures that the catalogs are compiled in the locale folder (even with
+    staging) and that only a changed catalog is compiled again
+    """
+    (project / "po" / "de.po").write_bytes((project / "po" / "fr.po").read_bytes())
+    app = cli.CliApplication()
+    hook = cli.make_hook(project, app)
+    fr = project / "locale" / "fr" / "LC_MESSAGES" / "app.mo"
+    de = project / "locale" / "de" / "LC_MESSAGES" / "app.mo"
+    scans = []
+
+    def stop() -> bool:
+        scans.append(fr.stat().st_mtime_ns)
+        if len(scans) == 1:
+            assert de.exists()
+            os.utime(de, ns=(0, 0))
+            with open(project / "po" / "fr.po", "a") as f:
+                f.write('\nmsgid "new"\nmsgstr "nouveau"\n')
+        return len(scans) == 2
+
+    cli.watch(hook, 0.01, stop)
+    assert scans[1] > scans[0]
+    assert b"nouveau" in fr.read_bytes()
+    assert de.stat().st_mtime_ns == 0
+    assert not app.failed
+
+
+def test_error(project, capsys) -> None:
+    """
+    Ensures that a compilation error is displayed without stopping the watch
+    """
+    app = cli.CliApplication()
+    hook = cli.make_hook(project, app)
+    (project / "po" / "fr.po").write_text('msgid "x"\nmsgstr "unterminated\n')
+    cli.watch(hook, 0.01, lambda: True)
+    assert app.failed
+    assert "fr.po" in capsys.readouterr().err
+
+
+def test_main(project, monkeypatch) -> None:
+    """
+    Ensures that the watch command stops on Ctrl-C
+    """
+    def interrupt(*_) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cli.time, "sleep", interrupt)
+    assert cli.main(["watch", str(project), "-i", "0"]) == 0
+    assert (project / "locale" / "fr" / "LC_MESSAGES" / "app.mo").exists()
+
+
+def test_build(project, monkeypatch) -> None:
+    """
+    Ensures that the build command compiles the catalogs with a manifest
+    that lets a wheel build (even staged, and after the files were copied
+    elsewhere) skip the compilation
+    """
+    assert cli.main(["build", str(project), "-j", "1"]) == 0
+    mo = project / "locale" / "fr" / "LC_MESSAGES" / "app.mo"
+    assert (project / "locale" / ".hatch-msgfmt.json").exists()
+    content = mo.read_bytes()
+    # a CI artifact does not keep the mtimes
+    os.utime(mo, ns=(10**9, 10**9))
+    os.utime(project / "po" / "fr.po", ns=(10**9, 10**9))
+
+    def no_jobs(jobs, _max_workers):
+        assert jobs == []
+        return []
+
+    monkeypatch.setattr("hatch_msgfmt.compiler.run_jobs", no_jobs)
+    app = cli.CliApplication()
+    hook = cli.make_hook(project, app)
+    build_data = {"force_include": {}}
+    hook.initialize("standard", build_data)
+    assert not app.failed
+    assert hook.staged is not None
+    assert (hook.staged / "fr" / "LC_MESSAGES" / "app.mo").read_bytes() == content
+    assert build_data["force_include"] == {
+        str(hook.staged / "fr" / "LC_MESSAGES" / "app.mo"):
+            "locale/fr/LC_MESSAGES/app.mo"
+    }
+    hook.finalize("standard", build_data, "")
+
+
+def test_build_errors(project, capsys) -> None:
+    """
+    Ensures that the build command reports all the errors and fails
+    """
+    (project / "po" / "fr.po").write_text('msgid "x"\nmsgstr "unterminated\n')
+    (project / "po" / "de.po").write_text('msgid "y\n')
+    assert cli.main(["build", str(project), "--clean"]) == 1
+    err = capsys.readouterr().err
+    assert "fr.po" in err and "de.po" in err
@@ -0,0 +1,255 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the discovery of the .po files.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from hatch_msgfmt.discovery import find_sources, group_fragments, selection
+
+
+def touch(path: Path) -> Path:
+    """
+    Create an empty file and its parent folders
+
+    :param path: the file
+    :return: the file
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("")
+    return path
+
+
+@pytest.fixture
+def tree(tmp_path) -> Path:
+    """
+    A pytest fixture providing a project root used as messages folder
+
+    :param tmp_path: a folder for temporary files
+    :return: the root folder
+    """
+    touch(tmp_path / "fr.po")
+    touch(tmp_path / "foo-de_DE.po")
+    touch(tmp_path / "README.po")
+    touch(tmp_path / "es" / "LC_MESSAGES" / "app.po")
+    touch(tmp_path / "es" / "LC_MESSAGES" / "old" / "legacy.po")
+    touch(tmp_path / "it" / "app.po")
+    touch(tmp_path / ".venv" / "lib" / "fr" / "LC_MESSAGES" / "pip.po")
+    touch(tmp_path / "node_modules" / "x" / "de.po")
+    touch(tmp_path / "build" / "fr.po")
+    return tmp_path
+
+
+def found(src: Path, **kwargs) -> set[tuple[str, str, str]]:
+    """
+    The .po files found in a folder, as posix paths relative to it
+
+    :param src: the messages folder
+    :param kwargs: the options of find_sources
+    :return: a set of tuples (path, lang, domain)
+    """
+    return {
+        (path.relative_to(src).as_posix(), lang, domain)
+        for path, lang, domain in find_sources(src, "dom", **kwargs)
+    }
+
+
+def test_pruned(tree) -> None:
+    """
+    Ensures that only the LANG folders are walked
+    """
+    assert found(tree) == {
+        ("fr.po", "fr", "dom"),
+        ("foo-de_DE.po", "de_DE", "foo"),
+        ("es/LC_MESSAGES/app.po", "es", "app"),
+        ("es/LC_MESSAGES/old/legacy.po", "es", "legacy"),
+        ("it/app.po", "it", "app"),
+    }
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["sr@latin", "ca@valencia", "zh_Hant", "zh_Hant_TW", "es_419", "pt_BR.UTF-8",
+     "sr_RS@latin"],
+)
+def test_locale_names(tmp_path, name) -> None:
+    """
+    Ensures that a LANG folder can have any locale name
+    """
+    touch(tmp_path / name / "LC_MESSAGES" / "app.po")
+    touch(tmp_path / "lib_old" / "LC_MESSAGES" / "app.po")
+    assert found(tmp_path) == {(f"{name}/LC_MESSAGES/app.po", name, "app")}
+
+
+def test_relative(tree, monkeypatch) -> None:
+    """
+    Ensures that the yielded paths are below the given (relative) folder
+    """
+    monkeypatch.chdir(tree)
+    assert Path("es", "LC_MESSAGES", "app.po") in {
+        path for path, _, _ in find_sources(Path("."), "dom")
+    }
+
+
+def test_exclude_include(tree) -> None:
+    """
+    Ensures that exclude prunes files and folders and that include filters
+    the .po files
+    """
+    assert {p for p, _, _ in found(tree, exclude=["old/", "/fr.po"])} == {
+        "foo-de_DE.po", "es/LC_MESSAGES/app.po", "it/app.po"
+    }
+    assert {p for p, _, _ in found(tree, include=["**/LC_MESSAGES/*.po"])} == {
+        "es/LC_MESSAGES/app.po"
+    }
+
+
+def test_max_depth(tree) -> None:
+    """
+    Ensures that the walk stops at the maximum depth
+    """
+    assert {p for p, _, _ in found(tree, max_depth=1)} == {"fr.po", "foo-de_DE.po"}
+    assert {p for p, _, _ in found(tree, max_depth=3)} == {
+        "fr.po", "foo-de_DE.po", "es/LC_MESSAGES/app.po", "it/app.po"
+    }
+
+
+def test_gitignore(tree) -> None:
+    """
+    Ensures that the .gitignore files of the root and of the walked folders
+    are honored when a root is given
+    """
+    (tree / ".gitignore").write_text("legacy.po\n")
+    (tree / "es" / ".gitignore").write_text("# comment\nLC_MESSAGES/app.po\n")
+    assert {p for p, _, _ in found(tree, root=tree)} == {
+        "fr.po", "foo-de_DE.po", "it/app.po"
+    }
+    assert len(found(tree)) == 5
+    # the .gitignore of the project root applies to a messages sub-folder
+    (tree / ".gitignore").write_text("/msgs/de/\n")
+    touch(tree / "msgs" / "de" / "app.po")
+    touch(tree / "msgs" / "fr" / "app.po")
+    assert {p for p, _, _ in found(tree / "msgs", root=tree)} == {"fr/app.po"}
+    # and so do the .gitignore files of the folders down to it
+    (tree / ".gitignore").unlink()
+    touch(tree / "sub" / "msgs" / "de" / "app.po")
+    touch(tree / "sub" / "msgs" / "fr" / "app.po")
+    (tree / "sub" / ".gitignore").write_text("msgs/fr/\n")
+    assert {p for p, _, _ in found(tree / "sub" / "msgs", root=tree)} == {
+        "de/app.po"
+    }
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symbolic links need privileges")
+def test_symlink(tree) -> None:
+    """
+    Ensures that symbolic links to folders are only followed at the top level
+    """
+    (tree / "pt").symlink_to(tree / "it", target_is_directory=True)
+    (tree / "it" / "loop").symlink_to(tree, target_is_directory=True)
+    assert {p for p, _, _ in found(tree)} >= {"pt/app.po"}
+    assert not any("loop" in p for p, _, _ in found(tree))
+
+
+def test_missing(tmp_path) -> None:
+    """
+    Ensures that an unreadable folder is silently skipped
+    """
+    assert found(tmp_path / "missing") == set()
+
+
+def test_languages_domains(tree) -> None:
+    """
+    Ensures that the allow-lists filter the languages and the domains
+    """
+    assert {p for p, _, _ in found(tree, languages=["fr", "de*"])} == {
+        "fr.po", "foo-de_DE.po"
+    }
+    assert {p for p, _, _ in found(tree, domains=["app", "dom"])} == {
+        "fr.po", "es/LC_MESSAGES/app.po", "it/app.po"
+    }
+    assert {p for p, _, _ in found(tree, languages=["es"], domains=["leg*"])} == {
+        "es/LC_MESSAGES/old/legacy.po"
+    }
+
+
+def test_languages_not_walked(tree, monkeypatch) -> None:
+    """
+    Ensures that the folders of the other languages are never scanned
+    """
+    scanned = []
+    scandir = os.scandir
+
+    def spy(path):
+        scanned.append(Path(path).relative_to(tree).as_posix())
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", spy)
+    assert {p for p, _, _ in found(tree, languages=["it"])} == {"it/app.po"}
+    assert sorted(scanned) == [".", "it"]
+
+
+def test_selection() -> None:
+    """
+    Ensures that the environment overrides the configuration
+    """
+    config = {"languages": ["en", " fr "], "domains": "app, lib"}
+    assert selection("languages", config, {}) == ["en", "fr"]
+    assert selection("domains", config, {}) == ["app", "lib"]
+    assert selection("languages", config, {"HATCH_MSGFMT_LANGUAGES": "de"}) == ["de"]
+    assert selection("languages", {}, {}) is None
+    assert selection("languages", config, {"HATCH_MSGFMT_LANGUAGES": ""}) is None
+
+
+def test_group_fragments(tree) -> None:
+    """
+    Ensures that the grouping rules give the domains of the fragments
+    """
+    touch(tree / "es" / "LC_MESSAGES" / "old" / "more.po")
+    touch(tree / "it" / "ui" / "menu.po")
+    sources = list(find_sources(tree, "dom"))
+
+    def groups(rule):
+        return {
+            (lang, domain): [p.relative_to(tree).as_posix() for p in paths]
+            for paths, lang, domain in group_fragments(sources, tree, rule)
+        }
+
+    assert len(groups(False)) == len(sources)
+    assert groups(True) == {
+        ("fr", "dom"): ["fr.po"],
+        ("de_DE", "foo"): ["foo-de_DE.po"],
+        ("es", "app"): ["es/LC_MESSAGES/app.po"],
+        ("es", "old"): ["es/LC_MESSAGES/old/legacy.po", "es/LC_MESSAGES/old/more.po"],
+        ("it", "app"): ["it/app.po"],
+        ("it", "ui"): ["it/ui/menu.po"],
+    }
+    assert groups({"LC_MESSAGES/*": "app", "ui/*.po": "ui"}) == {
+        ("fr", "dom"): ["fr.po"],
+        ("de_DE", "foo"): ["foo-de_DE.po"],
+        ("es", "app"): [
+            "es/LC_MESSAGES/app.po",
+            "es/LC_MESSAGES/old/legacy.po",
+            "es/LC_MESSAGES/old/more.po",
+        ],
+        ("it", "app"): ["it/app.po"],
+        ("it", "ui"): ["it/ui/menu.po"],
+    }
+
+
+def test_watched(tree) -> None:
+    """
+    Ensures that the scanned folders and the loaded .gitignore files are
+    reported
+    """
+    (tree / ".gitignore").write_text("build/\n")
+    watched = []
+    found(tree, root=tree, languages=["es"], watched=watched)
+    assert sorted(Path(p).relative_to(tree).as_posix() for p in watched) == [
+        ".", ".gitignore", "es", "es/LC_MESSAGES", "es/LC_MESSAGES/old"
+    ]
@@ -0,0 +1,193 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the memory-mapped translations reader.
+"""
+
+import array
+import gettext
+import io
+import struct
+
+import pytest
+
+from hatch_msgfmt import bundle
+from hatch_msgfmt.mapped import MappedTranslations
+from hatch_msgfmt.vendor import msgfmt
+
+HEADER = (
+    b"Content-Type: text/plain; charset=UTF-8\n"
+    b"Plural-Forms: nplurals=3; plural=(n==1 ? 0 : n<5 ? 1 : 2);\n"
+)
+
+MESSAGES = {
+    b"": HEADER,
+    b"yes": "oui".encode(),
+    b"caf\xc3\xa9": "caf\xe9 cr\xe8me".encode(),
+    b"file\0files": b"fichier\0fichiers\0beaucoup de fichiers",
+    b"menu\x04open": b"ouvrir",
+    b"menu\x04item\0items": b"article\0articles\0beaucoup d'articles",
+    b"short\0shorts": b"court",  # fewer forms than nplurals
+}
+for i in range(200):
+    MESSAGES[b"msg%d" % i] = b"message %d" % i
+
+
+def swap(data: bytes) -> bytes:
+    """
+    The big endian version of a little endian .mo image
+
+    :param data: a little endian .mo file
+    :return: the same catalog with big endian integers
+    """
+    count, keys, _, hash_size, hash_offset = struct.unpack_from("<5I", data, 8)
+    end = hash_offset + 4 * hash_size if hash_size else keys + 16 * count
+    words = array.array("I", data[:end])
+    words.byteswap()
+    return words.tobytes() + data[end:]
+
+
+@pytest.fixture(params=[True, False], ids=["hash", "bisect"])
+def mo_file(request, tmp_path):
+    """
+    A pytest fixture providing a .mo file with and without a hash table
+
+    :param request: the pytest request
+    :param tmp_path: a folder for temporary files
+    :return: the path of the .mo file
+    """
+    path = tmp_path / "test.mo"
+    path.write_bytes(msgfmt.generate(MESSAGES, hash=request.param))
+    return path
+
+
+def calls(t: gettext.NullTranslations) -> list[str]:
+    """
+    The results of the gettext methods for all the messages and more
+
+    :param t: a translations object
+    :return: the translated strings
+    """
+    results = []
+    for msgid in ["yes", "no", "caf\xe9", "file", "files", "short", "msg42", "menu"]:
+        results.append(t.gettext(msgid))
+        results.append(t.pgettext("menu", msgid))
+    for n in range(7):
+        results.append(t.ngettext("file", "files", n))
+        results.append(t.ngettext("yes", "yeses", n))
+        results.append(t.ngettext("short", "shorts", n))
+        results.append(t.npgettext("menu", "item", "items", n))
+        results.append(t.npgettext("menu", "open", "opens", n))
+    results.append(t.pgettext("other", "open"))
+    return results
+
+
+def test_same_as_gnu(mo_file) -> None:
+    """
+    Ensures that the results are the ones of GNUTranslations
+    """
+    with open(mo_file, "rb") as f:
+        gnu = gettext.GNUTranslations(f)
+    with MappedTranslations(mo_file) as mapped:
+        assert calls(mapped) == calls(gnu)
+        assert mapped.info() == gnu.info()
+        assert mapped.charset() == "UTF-8"
+        assert mapped.gettext("msg199") == "message 199"
+
+
+def test_big_endian(tmp_path) -> None:
+    """
+    Ensures that a big endian file is read
+    """
+    data = msgfmt.generate(MESSAGES, hash=True)
+    path = tmp_path / "be.mo"
+    path.write_bytes(swap(data))
+    gnu = gettext.GNUTranslations(io.BytesIO(swap(data)))
+    with MappedTranslations(path) as mapped:
+        assert calls(mapped) == calls(gnu)
+
+
+def test_no_header(tmp_path) -> None:
+    """
+    Ensures the default rules without a header: ascii and germanic plural
+    """
+    path = tmp_path / "bare.mo"
+    path.write_bytes(msgfmt.generate({b"yes": b"oui", b"a\0b": b"un\0des"}))
+    with MappedTranslations(path) as mapped:
+        assert mapped.gettext("yes") == "oui"
+        assert mapped.ngettext("a", "b", 2) == "des"
+        assert mapped.gettext("\xe9t\xe9") == "\xe9t\xe9"
+
+
+def test_fallback(mo_file) -> None:
+    """
+    Ensures that missing messages are delegated to the fallback
+    """
+    fallback = gettext.GNUTranslations(
+        io.BytesIO(msgfmt.generate({b"no": b"nein", b"x\0y": b"ix\0igrek"}))
+    )
+    with MappedTranslations(mo_file) as mapped:
+        mapped.add_fallback(fallback)
+        assert mapped.gettext("no") == "nein"
+        assert mapped.gettext("yes") == "oui"
+        assert mapped.ngettext("x", "y", 3) == "igrek"
+        assert mapped.pgettext("menu", "no") == "no"
+
+
+def test_lru(mo_file) -> None:
+    """
+    Ensures that the decoded messages are cached in a bounded LRU
+    """
+    with MappedTranslations(mo_file, cache_size=10) as mapped:
+        for i in range(50):
+            mapped.gettext(f"msg{i}")
+        mapped.gettext("msg49")
+        info = mapped._find.cache_info()
+        assert info.currsize == 10
+        assert info.hits == 1
+
+
+@pytest.mark.parametrize(
+    "content", [b"", b"not a mo file", b"\xde\x12\x04\x95" + bytes(10)],
+    ids=["empty", "magic", "truncated"],
+)
+def test_bad_file(tmp_path, content) -> None:
+    """
+    Ensures that an invalid file raises an OSError
+    """
+    path = tmp_path / "bad.mo"
+    path.write_bytes(content)
+    with pytest.raises(OSError):
+        MappedTranslations(path)
+
+
+def test_bundle(tmp_path) -> None:
+    """
+    Ensures that a bundle maps its catalogs in place
+    """
+    path = tmp_path / "catalogs.bundle"
+    path.write_bytes(bundle.build([
+        ("de", "app", msgfmt.generate({b"yes": b"ja"}, hash=True)),
+        ("fr", "app", msgfmt.generate(MESSAGES, hash=True)),
+    ]))
+    t = bundle.Bundle(path).translation(
+        "app", ["fr", "de"], class_=MappedTranslations
+    )
+    assert isinstance(t, MappedTranslations)
+    assert t.gettext("caf\xe9") == "caf\xe9 cr\xe8me"
+    assert t.ngettext("file", "files", 3) == "fichiers"
+    assert t.gettext("msg7") == "message 7"
+
+
+def test_gettext_translation(tmp_path) -> None:
+    """
+    Ensures that gettext.translation accepts the class
+    """
+    folder = tmp_path / "fr" / "LC_MESSAGES"
+    folder.mkdir(parents=True)
+    (folder / "app.mo").write_bytes(msgfmt.generate(MESSAGES, hash=True))
+    t = gettext.translation("app", tmp_path, ["fr"], class_=MappedTranslations)
+    assert isinstance(t, MappedTranslations)
+    assert t.path == str(folder / "app.mo")
+    assert t.npgettext("menu", "item", "items", 1) == "article"
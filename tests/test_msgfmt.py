@@ -0,0 +1,552 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the vendored msgfmt.py module.
+
+The parsed catalogs and the generated .mo files are compared with the
+ones produced by the original (simpler but slower) implementations of
+process and generate.
+"""
+
+import array
+import ast
+import gettext
+import io
+import random
+import struct
+from email.parser import HeaderParser
+from pathlib import Path
+
+import pytest
+
+from hatch_msgfmt.vendor import msgfmt
+
+
+def legacy_generate(messages: dict[bytes, bytes]) -> bytes:
+    """
+    The original implementation of msgfmt.generate, used as a reference
+
+    :param messages: the catalog
+    :return: the content of the .mo file
+    """
+    keys = sorted(messages.keys())
+    offsets = []
+    ids = strs = b""
+    for id in keys:
+        offsets.append((len(ids), len(id), len(strs), len(messages[id])))
+        ids += id + b"\0"
+        strs += messages[id] + b"\0"
+    keystart = 7 * 4 + 16 * len(keys)
+    valuestart = keystart + len(ids)
+    koffsets = []
+    voffsets = []
+    for o1, l1, o2, l2 in offsets:
+        koffsets += [l1, o1 + keystart]
+        voffsets += [l2, o2 + valuestart]
+    offsets = koffsets + voffsets
+    output = struct.pack(
+        "Iiiiiii", 0x950412DE, 0, len(keys), 7 * 4, 7 * 4 + len(keys) * 8, 0, 0
+    )
+    output += array.array("i", offsets).tobytes()
+    output += ids
+    output += strs
+    return output
+
+
+def legacy_process(lines: list[bytes], messages: dict[bytes, bytes]) -> None:
+    """
+    The original implementation of msgfmt.process, used as a reference
+
+    :param lines: the lines of a .po file
+    :param messages: the catalog to populate
+    """
+    ID, STR, CTXT = 1, 2, 3
+    section = msgctxt = None
+    fuzzy = 0
+    encoding = "latin-1"
+    for line in lines:
+        line = line.decode(encoding)
+        if line[0] == "#" and section == STR:
+            msgfmt.add(msgctxt, msgid, msgstr, fuzzy, messages)
+            section = msgctxt = None
+            fuzzy = 0
+        if line[:2] == "#," and "fuzzy" in line:
+            fuzzy = 1
+        if line[0] == "#":
+            continue
+        if line.startswith("msgctxt"):
+            if section == STR:
+                msgfmt.add(msgctxt, msgid, msgstr, fuzzy, messages)
+            section = CTXT
+            line = line[7:]
+            msgctxt = b""
+        elif line.startswith("msgid") and not line.startswith("msgid_plural"):
+            if section == STR:
+                msgfmt.add(msgctxt, msgid, msgstr, fuzzy, messages)
+                if not msgid:
+                    p = HeaderParser()
+                    charset = p.parsestr(msgstr.decode(encoding)).get_content_charset()
+                    if charset:
+                        encoding = charset
+            section = ID
+            line = line[5:]
+            msgid = msgstr = b""
+            is_plural = False
+        elif line.startswith("msgid_plural"):
+            line = line[12:]
+            msgid += b"\0"
+            is_plural = True
+        elif line.startswith("msgstr"):
+            section = STR
+            if line.startswith("msgstr["):
+                line = line.split("]", 1)[1]
+                if msgstr:
+                    msgstr += b"\0"
+            else:
+                line = line[6:]
+        line = line.strip()
+        if not line:
+            continue
+        line = ast.literal_eval(line)
+        if section == CTXT:
+            msgctxt += line.encode(encoding)
+        elif section == ID:
+            msgid += line.encode(encoding)
+        elif section == STR:
+            msgstr += line.encode(encoding)
+    if section == STR:
+        msgfmt.add(msgctxt, msgid, msgstr, fuzzy, messages)
+
+
+def synthetic_po(size: int, seed: int = 0, charset: str = "UTF-8") -> bytes:
+    """
+    Build a pseudo-random .po file using most of the syntax of the format
+
+    :param size: the number of entries
+    :param seed: the seed of the random generator
+    :param charset: the charset of the file
+    :return: the content of the .po file
+    """
+    rnd = random.Random(seed)
+    words = ["foo", "bar", "éè", "àç", "tab\\t", "nl\\n", "q\\\"q", "bs\\\\",
+             "\\x41", "\\101", "\\u00e9", "\\'", "x" * 80, "  "]
+    if charset.lower() == "utf-8":
+        words += ["Ωμέγα", "漢字"]
+
+    def text() -> str:
+        return " ".join(rnd.choice(words) for _ in range(rnd.randint(1, 6)))
+
+    def strings(keyword: str, value: str) -> list[str]:
+        if rnd.random() < 0.3:
+            return [f'{keyword} "{value}"']
+        # split on a space to keep the escape sequences whole
+        spaces = [i for i, c in enumerate(value) if c == " "] or [0]
+        cut = rnd.choice(spaces)
+        return [f'{keyword} ""', f'"{value[:cut]}"', f'  "{value[cut:]}"  ']
+
+    lines = [
+        "# SOME DESCRIPTIVE TITLE.",
+        'msgid ""',
+        'msgstr ""',
+        f'"Content-Type: text/plain; charset={charset}\\n"',
+        '"Plural-Forms: nplurals=2; plural=(n != 1);\\n"',
+        "",
+    ]
+    for i in range(size):
+        kind = i % 7
+        if rnd.random() < 0.5:
+            lines.append(f"#: src/file.py:{i}")
+        if kind == 1:
+            lines.append("#, fuzzy, python-format")
+        if kind == 2:
+            lines += strings("msgctxt", f"ctx {i % 5}")
+        if kind == 3:
+            lines += strings("msgid", f"{text()} {i}")
+            lines += strings("msgid_plural", f"{text()} {i}s")
+            lines += strings("msgstr[0]", text())
+            lines += strings("msgstr[1]", text())
+        elif kind == 4:
+            lines += strings("msgid", f"{text()} {i}")
+            lines.append('msgstr ""')
+        elif kind == 5:
+            lines.append(f'#~ msgid "obsolete {i}"')
+            lines += strings("msgid", f"{text()} {i}")
+            lines.append(f'msgstr "{text()}" "{i}"')
+        else:
+            lines += strings("msgid", f"{text()} {i}")
+            lines += strings("msgstr", text())
+        if rnd.random() < 0.8:
+            lines.append("")
+    return ("\n".join(lines) + "\n").encode(charset)
+
+
+def synthetic_catalog(size: int, seed: int = 0) -> dict[bytes, bytes]:
+    """
+    Build a pseudo-random catalog with plural forms, contexts and
+    non-ASCII strings
+
+    :param size: the number of messages
+    :param seed: the seed of the random generator
+    :return: the catalog as a messages dictionary
+    """
+    rnd = random.Random(seed)
+    words = ["foo", "bar", "baz", "éè", "àç", "ça", "Ωμέγα", "漢字", "x" * 200]
+    messages = {
+        b"": b"Content-Type: text/plain; charset=UTF-8\n"
+        b"Plural-Forms: nplurals=2; plural=(n != 1);\n"
+    }
+    for i in range(size):
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randint(1, 8)))
+        key = f"{text} {i}".encode()
+        kind = i % 4
+        if kind == 1:
+            key = key + b"\0" + key + b"s"
+            value = text.upper().encode() + b"\0" + text.title().encode()
+        elif kind == 2:
+            key = b"ctx%d\x04" % (i % 7) + key
+            value = text[::-1].encode()
+        else:
+            value = text.upper().encode()
+        messages[key] = value
+    return messages
+
+
+@pytest.fixture
+def data_dir() -> Path:
+    """
+    pytest fixtures returning the pathlib.Path of the tests/data folder
+
+    :return: the path of the tests/data folder
+    """
+    return Path(__file__).parent / "data"
+
+
+class TestGenerate:
+    """
+    Tests for the generation of the binary .mo content
+    """
+
+    @pytest.mark.parametrize("size", [0, 1, 10, 1000, 5000])
+    def test_identical(self, size) -> None:
+        """
+        Ensures that the output is byte-identical to the legacy implementation
+
+        :param size: the number of messages of the catalog
+        """
+        messages = synthetic_catalog(size, size)
+        assert msgfmt.generate(messages) == legacy_generate(messages)
+        assert msgfmt.generate(messages, hash=False) == legacy_generate(messages)
+
+    def test_empty(self) -> None:
+        """
+        Ensures that an empty catalog gives a header only file
+        """
+        assert msgfmt.generate({}) == legacy_generate({})
+        assert len(msgfmt.generate({})) == 28
+
+    def test_large(self) -> None:
+        """
+        Ensures that a large catalog is readable by gettext
+        """
+        messages = synthetic_catalog(50000, 1)
+        trans = gettext.GNUTranslations(io.BytesIO(msgfmt.generate(messages)))
+        for key, value in list(messages.items())[1:1000]:
+            if b"\x04" in key:
+                ctxt, key = key.split(b"\x04")
+                assert trans.pgettext(ctxt.decode(), key.decode()) == value.decode()
+            elif b"\0" in key:
+                singular, plural = key.decode().split("\0")
+                values = value.decode().split("\0")
+                assert trans.ngettext(singular, plural, 1) == values[0]
+                assert trans.ngettext(singular, plural, 2) == values[1]
+            else:
+                assert trans.gettext(key.decode()) == value.decode()
+
+
+class TestDedupe:
+    """
+    Tests for the deduplication of the string tables
+    """
+
+    @staticmethod
+    def repeated(size: int) -> dict[bytes, bytes]:
+        """
+        A catalog with many repeated translations, some equal to keys
+
+        :param size: the number of messages
+        :return: the messages dictionary
+        """
+        messages = synthetic_catalog(size, size)
+        for i in range(size):
+            messages[b"button %d" % i] = [b"OK", b"Cancel", b"Apply"][i % 3]
+            messages[b"ctx%d\x04Cancel" % (i % 5)] = b"Cancel"
+        messages[b"Cancel"] = b"Cancel"
+        return messages
+
+    @pytest.mark.parametrize("hash_table", [False, True])
+    def test_gettext(self, hash_table) -> None:
+        """
+        Ensures that gettext reads the deduplicated file identically
+
+        :param hash_table: generate the hash table
+        """
+        messages = self.repeated(1000)
+        stats = {}
+        data = msgfmt.generate(messages, hash_table, dedupe=True, stats=stats)
+        plain = msgfmt.generate(messages, hash_table)
+        assert stats["deduped_bytes"] > 0
+        assert len(plain) - len(data) == stats["deduped_bytes"]
+        # same header, descriptors count and order
+        assert data[:28] == plain[:28]
+        trans = gettext.GNUTranslations(io.BytesIO(data))
+        assert trans._catalog == gettext.GNUTranslations(io.BytesIO(plain))._catalog
+        if hash_table:
+            for key, value in messages.items():
+                assert gnu_lookup(data, key) == value
+
+    def test_descriptors(self) -> None:
+        """
+        Ensures that identical strings share their offset
+        """
+        messages = {b"Cancel": b"Cancel", b"a": b"OK", b"b": b"OK"}
+        stats = {}
+        data = msgfmt.generate(messages, dedupe=True, stats=stats)
+        descriptors = struct.unpack_from("12i", data, 28)
+        keys, values = descriptors[:6], descriptors[6:]
+        assert values[1] == keys[1]  # Cancel -> Cancel
+        assert values[3] == values[5]  # OK, OK
+        assert stats["deduped_bytes"] == 7 + 3
+
+    def test_default(self) -> None:
+        """
+        Ensures that the deduplication is optional
+        """
+        messages = self.repeated(10)
+        stats = {}
+        assert msgfmt.generate(messages, stats=stats) == legacy_generate(messages)
+        assert stats["deduped_bytes"] == 0
+
+
+class TestKeyLayout:
+    """
+    Tests for the key layouts shared by the catalogs of a domain
+    """
+
+    @pytest.mark.parametrize("hash_table", [False, True])
+    def test_shared(self, hash_table) -> None:
+        """
+        Ensures that a shared layout gives the same output, and is ignored
+        when the keys differ
+
+        :param hash_table: generate the hash table
+        """
+        messages = synthetic_catalog(500, 3)
+        layout = msgfmt.KeyLayout(messages.keys(), hash_table)
+        other = {k: v[::-1] for k, v in messages.items()}
+        assert layout.matches(other, hash_table)
+        assert not layout.matches(other, not hash_table)
+        assert msgfmt.generate(other, hash_table, layout=layout) == msgfmt.generate(
+            other, hash_table
+        )
+        del other[next(iter(messages))]
+        other[b"new key"] = b"value"
+        assert not layout.matches(other, hash_table)
+        assert msgfmt.generate(other, hash_table, layout=layout) == msgfmt.generate(
+            other, hash_table
+        )
+
+    def test_dedupe(self) -> None:
+        """
+        Ensures that the deduplication works with a shared layout
+        """
+        messages = {b"Cancel": b"Cancel", b"a": b"OK", b"b": b"OK"}
+        layout = msgfmt.KeyLayout(messages.keys())
+        assert msgfmt.generate(messages, dedupe=True, layout=layout) == (
+            msgfmt.generate(messages, dedupe=True)
+        )
+
+
+def gnu_lookup(data: bytes, key: bytes) -> bytes:
+    """
+    Find a translation through the hash table, the way libintl does
+
+    :param data: the content of a .mo file
+    :param key: the key to search
+    :return: the translation or None if not found
+    """
+    _, _, _, ko, vo, size, offset = struct.unpack_from("7I", data)
+    hval = msgfmt.hashpjw(key)
+    idx = hval % size
+    incr = 1 + hval % (size - 2)
+    while True:
+        nstr = struct.unpack_from("I", data, offset + 4 * idx)[0]
+        if nstr == 0:
+            return None
+        length, pos = struct.unpack_from("ii", data, ko + 8 * (nstr - 1))
+        if data[pos:pos + length] == key:
+            length, pos = struct.unpack_from("ii", data, vo + 8 * (nstr - 1))
+            return data[pos:pos + length]
+        idx = idx - (size - incr) if idx >= size - incr else idx + incr
+
+
+class TestHashTable:
+    """
+    Tests for the GNU hash table
+    """
+
+    # (sorted keys, hash table) from .mo files generated by GNU msgfmt
+    GNU_TABLES = [
+        (
+            [b"", b"Euro", b"Gold", b"Guarani", b"Swiss Franc"],
+            [1, 2, 0, 0, 4, 3, 5],
+        ),
+        (
+            [b"", b"Configuration file", b"None", b"Out of memory", b"none", b"size"],
+            [1, 6, 0, 2, 0, 5, 4, 0, 0, 3, 0],
+        ),
+        (
+            [b"", b"Details", b"Officially supported", b"Restricted copyright"],
+            [1, 3, 0, 2, 4],
+        ),
+    ]
+
+    @pytest.mark.parametrize("keys, table", GNU_TABLES)
+    def test_gnu(self, keys, table) -> None:
+        """
+        Ensures that the hash table is the one GNU msgfmt would generate
+
+        :param keys: the keys of a catalog
+        :param table: the hash table generated by GNU msgfmt
+        """
+        assert msgfmt.hash_table(keys).tolist() == table
+
+    @pytest.mark.parametrize(
+        "count, size", [(0, 3), (1, 3), (2, 5), (3, 5), (10, 13), (100, 137)]
+    )
+    def test_size(self, count, size) -> None:
+        """
+        Ensures that the hash table size is the prime chosen by GNU msgfmt
+
+        :param count: the number of keys
+        :param size: the expected size
+        """
+        assert msgfmt.hash_table_size(count) == size
+
+    def test_hashpjw(self) -> None:
+        """
+        Ensures that the hash value only depends on the key up to its first NUL
+        """
+        assert msgfmt.hashpjw(b"") == 0
+        assert msgfmt.hashpjw(b"a") == 97
+        assert msgfmt.hashpjw(b"file\0files") == msgfmt.hashpjw(b"file")
+        # long keys must stay in 32 bits
+        assert 0 <= msgfmt.hashpjw(bytes(range(1, 256)) * 10) < 2**32
+
+    @pytest.mark.parametrize("size", [0, 1, 10, 5000])
+    def test_lookup(self, size) -> None:
+        """
+        Ensures that every key is found through the hash table and that
+        the file is still correctly read by gettext
+
+        :param size: the number of messages of the catalog
+        """
+        messages = synthetic_catalog(size, size)
+        data = msgfmt.generate(messages, hash=True)
+        for key, value in messages.items():
+            assert gnu_lookup(data, key) == value
+        assert gnu_lookup(data, b"not a key") is None
+        trans = gettext.GNUTranslations(io.BytesIO(data))
+        plain = msgfmt.generate(messages)
+        assert trans._catalog == gettext.GNUTranslations(io.BytesIO(plain))._catalog
+
+
+class TestProcess:
+    """
+    Tests for the parsing of .po files
+    """
+
+    @pytest.mark.parametrize("size", [0, 1, 50, 2000])
+    @pytest.mark.parametrize("charset", ["UTF-8", "ISO-8859-1", "cp1252"])
+    def test_identical(self, tmp_path, size, charset) -> None:
+        """
+        Ensures that the messages are the same as with the legacy parser
+
+        :param tmp_path: a folder for temporary files
+        :param size: the number of entries
+        :param charset: the charset of the .po file
+        """
+        data = synthetic_po(size, size, charset)
+        po = tmp_path / "test.po"
+        po.write_bytes(data)
+        expected: dict[bytes, bytes] = {}
+        legacy_process(data.splitlines(True), expected)
+        messages: dict[bytes, bytes] = {}
+        msgfmt.process(str(po), messages)
+        assert messages == expected
+        assert len(messages) > size // 2
+
+    def test_data(self, data_dir) -> None:
+        """
+        Ensures that the reference .po file gives the same messages
+
+        :param data_dir: the tests/data folder
+        """
+        po = data_dir / "foo-fr.po"
+        expected: dict[bytes, bytes] = {}
+        legacy_process(po.read_bytes().splitlines(True), expected)
+        messages: dict[bytes, bytes] = {}
+        msgfmt.process(str(po), messages)
+        assert messages == expected
+
+    @pytest.mark.parametrize(
+        "literal, value",
+        [
+            ('"abc"', "abc"),
+            ('""', ""),
+            ('"a\\"b\\\\c"', 'a"b\\c'),
+            ('"\\n\\t\\r\\a\\b\\f\\v\\\'"', "\n\t\r\a\b\f\v'"),
+            ('"\\x41\\101\\7\\u00e9"', "AA\7é"),
+            ('"é\\u03a9Ω"', "éΩΩ"),
+            ('"a" "b"', "ab"),
+            ("'single'", "single"),
+            ('"\\N{DEGREE SIGN}\\U0001F600"', "°\U0001F600"),
+        ],
+    )
+    def test_unquote(self, literal, value) -> None:
+        """
+        Ensures that string literals are decoded as Python would do
+
+        :param literal: a string literal
+        :param value: its value
+        """
+        assert msgfmt.unquote(literal) == value == ast.literal_eval(literal)
+
+    @pytest.mark.parametrize(
+        "content, message",
+        [
+            ('msgid "a"\nmsgstr[0] "b"\n', "plural without msgid_plural on"),
+            ('msgid "a"\nmsgid_plural "b"\nmsgstr "c"\n', "indexed msgstr"),
+            ('msgstr "a"\nmsgid_plural "b"\n', "msgid_plural not preceded"),
+            ('"a"\n', "Syntax error on"),
+            ('msgid "a\n', "Syntax error on"),
+        ],
+    )
+    def test_errors(self, content, message) -> None:
+        """
+        Ensures that syntax errors are reported with a MsgfmtError
+
+        :param content: the content of an erroneous .po file
+        :param message: the expected start of the error message
+        """
+        with pytest.raises(msgfmt.MsgfmtError, match=message):
+            list(msgfmt.parse(content.encode().splitlines(True), "test.po"))
+
+    def test_missing(self, tmp_path) -> None:
+        """
+        Ensures that a missing file is reported with a MsgfmtError
+
+        :param tmp_path: a folder for temporary files
+        """
+        with pytest.raises(msgfmt.MsgfmtError):
+            msgfmt.process(str(tmp_path / "missing.po"), {})
@@ -0,0 +1,226 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the cache of the parsed entries of .po files.
+"""
+
+import io
+from pathlib import Path
+
+import pytest
+
+from hatch_msgfmt.parse_cache import ParseCache, independent
+from hatch_msgfmt.vendor import msgfmt
+
+
+def po_file(count: int, charset: str = "UTF-8", edited: int = 0) -> bytes:
+    """
+    The content of a .po file
+
+    :param count: the number of entries after the header
+    :param charset: the charset of the header
+    :param edited: the number of entries whose translation is changed
+    :return: the encoded content
+    """
+    lines = [
+        'msgid ""',
+        f'msgstr "Content-Type: text/plain; charset={charset}\\n"',
+    ]
+    for i in range(count):
+        lines += [
+            "",
+            f"#: src/app.py:{i}",
+            f'msgid "message {i}"',
+            f'msgstr "réponse {i}{" (bis)" if i < edited else ""}"',
+        ]
+    return ("\n".join(lines) + "\n").encode(charset)
+
+
+def full(data: bytes) -> list:
+    """
+    The entries of a .po file parsed as a whole
+
+    :param data: its content
+    :return: the (msgctxt, msgid, msgstr, fuzzy) tuples
+    """
+    return list(msgfmt.parse(io.BytesIO(data), "foo.po"))
+
+
+@pytest.fixture
+def cache(tmp_path) -> ParseCache:
+    """
+    An empty parse cache
+
+    :param tmp_path: a folder for temporary files
+    :return: the cache
+    """
+    return ParseCache(tmp_path / "cache")
+
+
+SOURCE = Path("foo.po")
+
+
+@pytest.mark.parametrize("charset", ["UTF-8", "ISO-8859-1"])
+def test_reuse(cache, charset) -> None:
+    """
+    Ensures that the cached entries are those of a full parse and that
+    a second parse reuses every block
+    """
+    data = po_file(50, charset)
+    assert cache.parse(SOURCE, data) == full(data)
+    assert (cache.parsed, cache.reused) == (51, 0)
+    assert cache.parse(SOURCE, data) == full(data)
+    assert (cache.parsed, cache.reused) == (52, 50)
+
+
+def test_edited(cache) -> None:
+    """
+    Ensures that only the edited entries are parsed again
+    """
+    cache.parse(SOURCE, po_file(50))
+    cache.parsed = 0
+    data = po_file(50, edited=3)
+    assert cache.parse(SOURCE, data) == full(data)
+    assert (cache.parsed, cache.reused) == (1 + 3, 47)
+
+
+def test_header(cache) -> None:
+    """
+    Ensures that a change of the header discards the cache of the file
+    """
+    cache.parse(SOURCE, po_file(10))
+    data = po_file(10).replace(b'UTF-8\\n"', b'UTF-8\\nLanguage: fr\\n"')
+    assert cache.parse(SOURCE, data) == full(data)
+    assert full(data)[0][2].endswith(b"Language: fr\n")
+    assert cache.reused == 0
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # an entry spanning a blank line
+        'msgid ""\nmsgstr "charset=UTF-8\\n"\n\nmsgid "a"\n\nmsgstr "b"\n',
+        # a fuzzy mark applying to the next block
+        'msgid ""\nmsgstr "charset=UTF-8\\n"\n\n#, fuzzy\n\nmsgid "a"\nmsgstr "b"\n',
+        # a header that is not the first entry
+        'msgid "a"\nmsgstr "b"\n\nmsgid ""\nmsgstr "charset=UTF-8\\n"\n',
+    ],
+)
+def test_fallback(cache, text) -> None:
+    """
+    Ensures that a file whose blocks are not independent is parsed as a whole
+    """
+    data = text.encode()
+    assert cache.parse(SOURCE, data) == full(data)
+    assert cache.reused == 0
+    assert not cache.path(SOURCE).exists()
+
+
+CARRIED = (
+    'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\n'
+    '{mark}msgid "a"\nmsgstr "A"\n\nmsgid "b"\nmsgstr "B"\n\n'
+    'msgctxt "menu"\nmsgid "c"\nmsgstr "C"\n\nmsgid "d"\nmsgstr "D"\n'
+)
+
+
+@pytest.mark.parametrize("mark", ["#, fuzzy\n", ""])
+def test_carried(cache, mark) -> None:
+    """
+    Ensures that the fuzzy flag and the context of an entry carry into the
+    next blocks when no comment line separates them, as in a full parse
+    """
+    data = CARRIED.format(mark=mark).encode()
+    assert cache.parse(SOURCE, data) == full(data)
+    assert cache.parse(SOURCE, data) == full(data)
+    assert cache.reused == 4
+    # a comment line ends the carried state
+    data = data.replace(b'\nmsgid "b"', b'\n#: b.py:1\nmsgid "b"')
+    assert cache.parse(SOURCE, data) == full(data)
+
+
+@pytest.mark.parametrize(
+    "mark, expected",
+    [
+        ("#, fuzzy\n", [b""]),
+        ("", [b"", b"a", b"b", b"menu\x04c", b"menu\x04d"]),
+    ],
+)
+def test_carried_keys(cache, mark, expected) -> None:
+    """
+    Ensures that the cached entries give the keys of a full compilation
+    """
+    data = CARRIED.format(mark=mark).encode()
+    for _ in range(2):
+        assert [
+            msgid if ctxt is None else ctxt + b"\x04" + msgid
+            for ctxt, msgid, _, fuzzy in cache.parse(SOURCE, data)
+            if not fuzzy
+        ] == expected
+
+
+def test_comment_after(cache) -> None:
+    """
+    Ensures that a comment line after the msgstr of a block ends the state
+    it leaves to the next one, as in a full parse
+    """
+    data = (
+        'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\n'
+        '#, fuzzy\nmsgctxt "menu"\nmsgid "a"\nmsgstr "b"\n#~ msgid "old"\n\n'
+        'msgid "c"\nmsgstr "d"\n'
+    ).encode()
+    assert full(data)[-1] == (None, b"c", b"d", 0)
+    assert cache.parse(SOURCE, data) == full(data)
+    assert cache.parse(SOURCE, data) == full(data)
+    assert cache.reused == 2
+
+
+def test_header_comment(cache) -> None:
+    """
+    Ensures that a comment after the header keeps the default encoding for
+    the next entries, as in a full parse
+    """
+    data = (
+        'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\n'
+        '# comment\nmsgid "\\303\\251"\nmsgstr "\\303\\251"\n'
+    ).encode()
+    assert cache.parse(SOURCE, data) == full(data)
+    assert cache.parse(SOURCE, data) == full(data)
+
+
+def test_independent() -> None:
+    """
+    Ensures that independent() recognizes the blocks that start and end
+    an entry
+    """
+    assert independent(b'#: a.py:1\nmsgid "a"\nmsgstr "b"')
+    assert independent(b'msgctxt "c"\nmsgid "a"\nmsgstr "b"\n"c"')
+    assert independent(b"# a comment")
+    assert not independent(b'msgstr "b"')
+    assert not independent(b'msgid "a"')
+    assert not independent(b"#, fuzzy")
+    assert not independent(b'msgid "a"\nmsgstr "b"\n#, fuzzy')
+    assert not independent(b'msgctxt "c"\nmsgstr "b"')
+
+
+def test_error(cache) -> None:
+    """
+    Ensures that an invalid file gives the error of a full parse
+    """
+    data = po_file(3) + b'\nmsgid "x"\nmsgstr[0] "y"\n'
+    with pytest.raises(msgfmt.MsgfmtError) as full_error:
+        full(data)
+    with pytest.raises(msgfmt.MsgfmtError) as error:
+        cache.parse(SOURCE, data)
+    assert str(error.value) == str(full_error.value)
+
+
+def test_corrupted(cache) -> None:
+    """
+    Ensures that an unreadable cache file is ignored
+    """
+    data = po_file(5)
+    cache.parse(SOURCE, data)
+    cache.path(SOURCE).write_bytes(b"garbage")
+    assert cache.parse(SOURCE, data) == full(data)
+    assert cache.reused == 0
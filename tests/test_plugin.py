@@ -9,25 +9,35 @@ appropriate parameters
 """
 
 import filecmp
+import gettext
+import json
+import os
+import runpy
 import shutil
+import struct
+import subprocess
+import sys
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Any, Union
-from unittest.mock import Mock, PropertyMock, patch
+from unittest.mock import ANY, Mock, PropertyMock, patch
 
 import pytest
 from hatchling.bridge.app import Application
 from hatchling.metadata.core import ProjectMetadata
 
-from hatch_msgfmt import plugin
+from hatch_msgfmt import compiler, plurals
+from hatch_msgfmt.manifest import MANIFEST_NAME, STAMP_NAME
+from hatch_msgfmt.options import default_jobs
 from hatch_msgfmt.plugin import MsgFmtBuildHook
+from hatch_msgfmt.report import OUTPUT_FOLDER
 
 
 def build_hook(
     config: dict[str, Any] = None,
     target_name: str = "wheel",
     # TODO: replace with str | Path after 3.9 End Of Life (end 2025)
-    directory: Union[str, Path] = ".",
+    directory: Union[str, Path, None] = None,
     root: Union[str, Path] = ".",
 ) -> MsgFmtBuildHook:
     """
@@ -38,7 +48,7 @@ def build_hook(
 
     :param config: a populated config or None
     :param target_name: the target name
-    :param directory: the build directory (should be dist in the real world)
+    :param directory: the build directory (root/dist by default)
     :param root: the root directory (containing pyproject.toml in real)
     :return: a MsgFmtBuildHook
     """
@@ -50,7 +60,7 @@ def build_hook(
         config,
         Mock(BuilderConfig),
         Mock(ProjectMetadata),
-        directory,
+        Path(root) / "dist" if directory is None else directory,
         target_name,
         Mock(Application),
     )
@@ -192,6 +202,64 @@ class TestClean:
         assert len(list(locale.rglob("*"))) == 0
 
 
+class TestCleanRecorded:
+    """
+    Tests for the clean driven by the manifest
+    """
+
+    def test_created(self, data_dir, messages) -> None:
+        """
+        Ensures that clean removes the recorded files and folders and only them
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        """
+        locale = messages.parent / "locale"
+        shutil.rmtree(locale, ignore_errors=True)
+        (locale / "de").mkdir(parents=True)
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-de.po")
+        hook = build_hook({"domain": "foo"}, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        manifest = json.loads((locale / MANIFEST_NAME).read_text())
+        assert manifest["folders"] == ["de/LC_MESSAGES", "fr", "fr/LC_MESSAGES"]
+        (locale / "de" / "other.mo").write_bytes(b"not ours")
+        hook = build_hook({"domain": "foo"}, root=messages.parent)
+        with patch.object(Path, "rglob") as rglob:
+            hook.clean(["standard"])
+        rglob.assert_not_called()
+        assert sorted(p.relative_to(locale).as_posix() for p in locale.rglob("*")) == [
+            "de", "de/other.mo"
+        ]
+        # noinspection PyUnresolvedReferences
+        hook.app.display_warning.assert_not_called()
+
+    def test_locale_created(self, data_dir, messages) -> None:
+        """
+        Ensures that a locale folder created by the hook is removed, but that
+        a folder holding foreign files is kept with a warning
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        """
+        locale = messages.parent / "locale"
+        shutil.rmtree(locale, ignore_errors=True)
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        hook = build_hook({"domain": "foo"}, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        assert "." in json.loads((locale / MANIFEST_NAME).read_text())["folders"]
+        (locale / "fr" / "LC_MESSAGES" / "foo.po").write_text("foreign")
+        hook.clean(["standard"])
+        assert sorted(p.relative_to(locale).as_posix() for p in locale.rglob("*")) == [
+            "fr", "fr/LC_MESSAGES", "fr/LC_MESSAGES/foo.po"
+        ]
+        # noinspection PyUnresolvedReferences
+        assert "fr/LC_MESSAGES" in hook.app.display_warning.call_args_list[0][0][0]
+        (locale / "fr" / "LC_MESSAGES" / "foo.po").unlink()
+        hook.clean(["standard"])  # no manifest left: fallback to the full sweep
+        assert not list(locale.rglob("*"))
+
+
 class TestDefaultDomain:
     """
     Test for detection and usage of a default gettext domain
@@ -299,10 +367,49 @@ class TestPoList:
         assert (po1, "fr_FR", "myapp") in lst
         assert (po2, "de", "myapp") in lst
 
+    def test_gitignore(self, messages) -> None:
+        """
+        Ensures that the .gitignore files are only honored on demand
+
+        :param messages: a messages folder
+        """
+        for name in ("en.po", "fr.po"):
+            (messages / name).write_text("#foo")
+        (messages.parent / ".gitignore").write_text("fr.po\n")
+        hook = build_hook({"domain": "myapp"}, root=messages.parent)
+        hook.build_conf()
+        assert sorted(lang for _, lang, _ in hook.source_files()) == ["en", "fr"]
+        hook.config["gitignore"] = True
+        assert [lang for _, lang, _ in hook.source_files()] == ["en"]
+
+    def test_selection(self, messages, monkeypatch) -> None:
+        """
+        Ensures that the languages and domains options (or their environment
+        variables) select the catalogs, which are reported
+
+        :param messages: a messages folder
+        :param monkeypatch: the pytest monkeypatch fixture
+        """
+        for name in ("en.po", "fr.po", "foo-fr.po", "foo-de.po"):
+            (messages / name).write_text("#foo")
+        hook = build_hook(
+            {"domain": "myapp", "languages": ["fr", "de"], "domains": "myapp"},
+            root=messages.parent,
+        )
+        hook.initialize("standard", {"force_include": {}})
+        messages_debug = [c[0][0] for c in hook.app.display_debug.call_args_list]
+        assert "Selected 1 catalog(s) for languages fr,de and domains myapp" in (
+            messages_debug
+        )
+        assert f"Including {messages / 'fr.po'} (fr, myapp)" in messages_debug
+        monkeypatch.setenv("HATCH_MSGFMT_DOMAINS", "foo")
+        hook.build_conf()
+        assert sorted(lang for _, lang, _ in hook.source_files()) == ["de", "fr"]
+
 
 class TestFmt:
     """
-    Tests for the generation of a .mo file by FmtMsg.py
+    Tests for the generation of a .mo file by msgfmt.py
     """
 
     def test_mocked(self, data_dir, messages) -> None:
@@ -315,13 +422,15 @@ class TestFmt:
         shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
         hook = build_hook({"domain": "foo"}, root=messages.parent)
         build_data = {"force_include": {}}
-        with patch("hatch_msgfmt.plugin.make"):
+        with patch("hatch_msgfmt.compiler.compile_catalog", return_value=b"mo"):
             hook.initialize("standard", build_data)
             # noinspection PyUnresolvedReferences
-            plugin.make.assert_called_with(
-                str(messages / "foo-fr.po"),
-                str(messages.parent / "locale" / "fr" / "LC_MESSAGES" / "foo.mo"),
+            compiler.compile_catalog.assert_called_with(
+                [messages / "foo-fr.po"], hook.options, ANY, ANY, "foo", None, None
             )
+        assert (
+            messages.parent / "locale" / "fr" / "LC_MESSAGES" / "foo.mo"
+        ).read_bytes() == b"mo"
 
     def test_flat(self, data_dir, messages, locale) -> None:
         """
@@ -390,3 +499,1130 @@ class TestGettext:
         assert "àç" == trans.ngettext("bar", "baz", 1)
         assert "ça" == trans.ngettext("bar", "baz", 2)
         assert "ça" == trans.ngettext("bar", "baz", 0)
+
+
+class TestIncremental:
+    """
+    Tests for the build manifest driving the incremental compilation
+    """
+
+    @pytest.fixture
+    def hook(self, data_dir, messages) -> MsgFmtBuildHook:
+        """
+        A specialized fixture providing a MsgFmtBuildHook with a .po file
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :return: a MsgFmtBuildHook
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        return build_hook({"domain": "foo"}, root=messages.parent)
+
+    def test_manifest(self, hook, locale) -> None:
+        """
+        Ensures that a manifest is written next to the generated files
+
+        :param hook: a MsgFmtBuildHook
+        :param locale: the locale folder
+        """
+        hook.initialize("standard", {"force_include": {}})
+        data = json.loads((locale / MANIFEST_NAME).read_text(encoding="utf-8"))
+        entry = data["entries"]["fr/LC_MESSAGES/foo.mo"]
+        assert entry["compiler"] == compiler.fingerprint(hook.options)
+        assert entry["sources"][0]["path"] == "messages/foo-fr.po"
+
+    def test_no_op(self, hook) -> None:
+        """
+        Ensures that nothing is compiled when nothing has changed
+
+        :param hook: a MsgFmtBuildHook
+        """
+        hook.initialize("standard", {"force_include": {}})
+        build_data = {"force_include": {}}
+        with patch("hatch_msgfmt.compiler.compile_catalog") as compile_catalog:
+            hook.initialize("standard", build_data)
+        compile_catalog.assert_not_called()
+        assert ["locale/fr/LC_MESSAGES/foo.mo"] == list(
+            build_data["force_include"]
+        )
+
+    def test_modified(self, hook, messages, locale) -> None:
+        """
+        Ensures that a modified source is recompiled
+
+        :param hook: a MsgFmtBuildHook
+        :param messages: the messages folder
+        :param locale: the locale folder
+        """
+        hook.initialize("standard", {"force_include": {}})
+        po = messages / "foo-fr.po"
+        po.write_bytes(po.read_bytes().replace("éè".encode(), "ée".encode()))
+        hook.initialize("standard", {"force_include": {}})
+        assert "ée".encode() in (locale / "fr" / "LC_MESSAGES" / "foo.mo").read_bytes()
+
+    def test_touched(self, hook, messages) -> None:
+        """
+        Ensures that a source with a new mtime but the same content is
+        not recompiled
+
+        :param hook: a MsgFmtBuildHook
+        :param messages: the messages folder
+        """
+        hook.initialize("standard", {"force_include": {}})
+        po = messages / "foo-fr.po"
+        st = po.stat()
+        os.utime(po, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        with patch("hatch_msgfmt.compiler.compile_catalog") as compile_catalog:
+            hook.initialize("standard", {"force_include": {}})
+        compile_catalog.assert_not_called()
+
+    def test_not_rewritten(self, hook, locale) -> None:
+        """
+        Ensures that a .mo file is not rewritten when its content is unchanged
+
+        :param hook: a MsgFmtBuildHook
+        :param locale: the locale folder
+        """
+        hook.initialize("standard", {"force_include": {}})
+        (locale / MANIFEST_NAME).unlink()
+        mo = locale / "fr" / "LC_MESSAGES" / "foo.mo"
+        st = mo.stat()
+        os.utime(mo, ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+        mtime = mo.stat().st_mtime_ns
+        hook.initialize("standard", {"force_include": {}})
+        assert mo.stat().st_mtime_ns == mtime
+        assert (locale / MANIFEST_NAME).exists()
+
+    def test_options(self, hook, locale) -> None:
+        """
+        Ensures that a change in the compilation options recompiles
+
+        :param hook: a MsgFmtBuildHook
+        :param locale: the locale folder
+        """
+        mo = locale / "fr" / "LC_MESSAGES" / "foo.mo"
+        hook.initialize("standard", {"force_include": {}})
+        assert struct.unpack("7I", mo.read_bytes()[:28])[5] != 0
+        hook.config["hash_table"] = False
+        hook.initialize("standard", {"force_include": {}})
+        assert struct.unpack("7I", mo.read_bytes()[:28])[5] == 0
+
+    def test_missing_output(self, hook, locale) -> None:
+        """
+        Ensures that a removed .mo file is generated again
+
+        :param hook: a MsgFmtBuildHook
+        :param locale: the locale folder
+        """
+        hook.initialize("standard", {"force_include": {}})
+        mo = locale / "fr" / "LC_MESSAGES" / "foo.mo"
+        mo.unlink()
+        hook.initialize("standard", {"force_include": {}})
+        assert mo.exists()
+
+
+class TestParallel:
+    """
+    Tests for the compilation of catalogs by a pool of worker processes
+    """
+
+    def test_default_jobs(self, hook) -> None:
+        """
+        Ensures that the default number of workers depends on the pending
+        catalogs: few or small ones are compiled in process, else every CPU
+        is used up to one worker per catalog
+
+        :param hook: a default MsgFmtBuildHook
+        """
+        hook.build_conf()
+        assert hook.jobs is None
+        assert default_jobs(1, 100 << 20) == 1
+        assert default_jobs(50, 10 << 10) == 1
+        assert default_jobs(50, 100 << 20) == min(50, os.cpu_count() or 1)
+        assert default_jobs(2, 100 << 20) == min(2, os.cpu_count() or 1)
+
+    def test_small_in_process(self, data_dir, messages) -> None:
+        """
+        Ensures that a few small catalogs are compiled without a pool
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        """
+        for lang in ("de", "fr"):
+            shutil.copy(data_dir / "foo-fr.po", messages / f"foo-{lang}.po")
+        hook = build_hook({"domain": "foo"}, root=messages.parent)
+        with patch("hatch_msgfmt.compiler.ProcessPoolExecutor") as pool:
+            hook.initialize("standard", {"force_include": {}})
+        pool.assert_not_called()
+        assert (messages.parent / "locale" / "de" / "LC_MESSAGES" / "foo.mo").exists()
+
+    @pytest.mark.parametrize("jobs", [1, 4])
+    def test_many(self, data_dir, messages, locale, jobs) -> None:
+        """
+        Ensures that many catalogs are correctly compiled in any mode
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        :param jobs: the number of worker processes
+        """
+        langs = ["de", "en", "es", "fr", "it", "pt"]
+        for lang in langs:
+            shutil.copy(data_dir / "foo-fr.po", messages / f"foo-{lang}.po")
+        hook = build_hook({"domain": "foo", "jobs": jobs}, root=messages.parent)
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        expected = [f"locale/{lang}/LC_MESSAGES/foo.mo" for lang in langs]
+        assert expected == list(build_data["force_include"])
+        expected_mo = compiler.compile_catalog([data_dir / "foo-fr.po"])
+        for lang in langs:
+            assert (locale / lang / "LC_MESSAGES" / "foo.mo").read_bytes() == expected_mo
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_errors(self, data_dir, messages, locale, jobs) -> None:
+        """
+        Ensures that errors are reported to the hook and abort the build
+        once the correct catalogs have been compiled
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        :param jobs: the number of worker processes
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        (messages / "foo-de.po").write_text('msgid "a"\nmsgstr[0] "b"\n')
+        (messages / "foo-it.po").write_text('msgid "a"\n"b\n')
+        hook = build_hook({"domain": "foo", "jobs": jobs}, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        hook.app.abort.assert_called_once()
+        # noinspection PyUnresolvedReferences
+        message = hook.app.abort.call_args[0][0]
+        assert "foo-de.po" in message
+        assert "plural without msgid_plural" in message
+        assert "foo-it.po" in message
+        assert "foo-fr.po" not in message
+        assert (locale / "fr" / "LC_MESSAGES" / "foo.mo").exists()
+
+    @pytest.mark.parametrize(
+        "groups, workers, expected",
+        [
+            (["a"] * 4, 1, [[0, 1, 2, 3]]),
+            (["a"] * 4, 2, [[0, 2], [1, 3]]),
+            (["a", "b", "a", None], 4, [[3], [0], [2], [1]]),
+            (["a", "a", "a", "b"], 2, [[0, 2], [1], [3]]),
+        ],
+    )
+    def test_batches(self, groups, workers, expected) -> None:
+        """
+        Ensures that the jobs are split in batches of the same group
+
+        :param groups: the groups of the jobs
+        :param workers: the number of worker processes
+        :param expected: the expected batches
+        """
+        jobs = [compiler.Job(str(i), "", [], group=g) for i, g in enumerate(groups)]
+        assert compiler.batches(jobs, workers) == expected
+
+    def test_shared_keys(self, tmp_path) -> None:
+        """
+        Ensures that the catalogs of a domain share their key layout, except
+        the ones having different keys, and are still correctly compiled
+
+        :param tmp_path: a folder for temporary files
+        """
+        entries = "".join(f'msgid "m{i}"\nmsgstr "{{lang}} {i}"\n' for i in range(50))
+        jobs = []
+        for lang in ("de", "fr", "it"):
+            po = tmp_path / f"{lang}.po"
+            po.write_text(entries.format(lang=lang))
+            jobs.append(compiler.Job(lang, str(tmp_path / f"{lang}.mo"), [str(po)],
+                                     group="app"))
+        # an untranslated entry gives another key set
+        with open(tmp_path / "it.po", "a") as f:
+            f.write('msgid "extra"\nmsgstr ""\n')
+        (tmp_path / "es.po").write_text('msgid "m1"\nmsgstr "es 1"\n')
+        jobs.insert(2, compiler.Job("es", str(tmp_path / "es.mo"),
+                                    [str(tmp_path / "es.po")], group="app"))
+        results = compiler.run_jobs(jobs, 1)
+        assert [r.stats["shared_keys"] for r in results] == [False, True, False, True]
+        for job in jobs:
+            expected = compiler.compile_catalog([Path(s) for s in job.sources])
+            assert Path(job.output).read_bytes() == expected
+
+    def test_broken_pool(self, data_dir, messages) -> None:
+        """
+        Ensures that the catalogs of a killed worker are reported as failed
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        """
+        for lang in ("de", "fr"):
+            shutil.copy(data_dir / "foo-fr.po", messages / f"foo-{lang}.po")
+        hook = build_hook({"domain": "foo", "jobs": 2}, root=messages.parent)
+        with patch("hatch_msgfmt.compiler.run_batch", killed):
+            hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        message = hook.app.abort.call_args[0][0]
+        for lang in ("de", "fr"):
+            assert f"foo-{lang}.po: A process in the process pool" in message
+
+
+def killed(_batch: list[compiler.Job]) -> list[compiler.Result]:
+    """
+    A worker entry point dying as if killed by the OOM killer
+
+    :param _batch: the jobs of the batch
+    :return: nothing
+    """
+    os._exit(1)
+
+
+class TestCache:
+    """
+    Tests for the usage of the shared compile cache by the hook
+    """
+
+    def test_hit(self, data_dir, messages, locale, tmp_path) -> None:
+        """
+        Ensures that a catalog already in the cache is not compiled again
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        :param tmp_path: a folder for temporary files
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        config = {"domain": "foo", "cache_dir": str(tmp_path / "cache")}
+        build_hook(dict(config), root=messages.parent).initialize(
+            "standard", {"force_include": {}}
+        )
+        assert len(list((tmp_path / "cache").rglob("*.mo"))) == 1
+        mo = locale / "fr" / "LC_MESSAGES" / "foo.mo"
+        expected = mo.read_bytes()
+        shutil.rmtree(locale)
+        hook = build_hook(dict(config), root=messages.parent)
+        with patch("hatch_msgfmt.compiler.compile_catalog") as compile_catalog:
+            hook.initialize("standard", {"force_include": {}})
+        compile_catalog.assert_not_called()
+        assert mo.read_bytes() == expected
+        # noinspection PyUnresolvedReferences
+        assert any(
+            "1 hit(s), 0 miss(es)" in c[0][0]
+            for c in hook.app.display_debug.call_args_list
+        )
+
+
+class TestReport:
+    """
+    Tests for the build report and the profiling switch
+    """
+
+    def test_report(self, data_dir, messages, tmp_path) -> None:
+        """
+        Ensures that the report describes the decision taken for every
+        catalog with its timings and sizes
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-de.po")
+        dist = tmp_path / "dist"
+        config = {"domain": "foo", "report": True, "jobs": 1}
+        build_hook(dict(config), directory=dist, root=messages.parent).initialize(
+            "standard", {"force_include": {}}
+        )
+        report = json.loads((dist / ".hatch-msgfmt" / "report.json").read_text())
+        assert [c["decision"] for c in report["catalogs"]] == ["compiled"] * 2
+        catalog = report["catalogs"][1]
+        assert catalog["target"] == "fr/LC_MESSAGES/foo.mo"
+        assert catalog["messages"] > 0
+        assert catalog["written"]
+        assert catalog["input_bytes"] == (data_dir / "foo-fr.po").stat().st_size
+        assert catalog["output_bytes"] == (
+            messages.parent / "locale" / catalog["target"]
+        ).stat().st_size
+        assert report["totals"]["compiled"] == 2
+        with open(messages / "foo-de.po", "a") as f:
+            f.write("# a comment does not change the .mo file\n")
+        hook = build_hook(dict(config), directory=dist, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        report = json.loads((dist / ".hatch-msgfmt" / "report.json").read_text())
+        assert [c["decision"] for c in report["catalogs"]] == [
+            "compiled", "up-to-date"
+        ]
+        assert not report["catalogs"][0]["written"]
+        # noinspection PyUnresolvedReferences
+        assert any(
+            c[0][0].startswith("catalog") for c in hook.app.display_debug.call_args_list
+        )
+
+    def test_dedupe(self, messages, tmp_path) -> None:
+        """
+        Ensures that the dedupe option shrinks the .mo files, which gettext
+        reads identically, that the saved bytes are reported and that a
+        catalog compiled in streaming mode gives a warning
+
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        """
+        lines = ['msgid ""', 'msgstr "Content-Type: text/plain; charset=UTF-8\\n"']
+        for i in range(20):
+            lines += [f'msgid "button {i}"', 'msgstr "Annuler"']
+        (messages / "foo-fr.po").write_text("\n".join(lines) + "\n")
+        dist = tmp_path / "dist"
+        mo = messages.parent / "locale" / "fr" / "LC_MESSAGES" / "foo.mo"
+        sizes = []
+        for dedupe in (False, True):
+            config = {"domain": "foo", "report": True, "jobs": 1, "dedupe": dedupe}
+            hook = build_hook(config, directory=dist, root=messages.parent)
+            hook.initialize("standard", {"force_include": {}})
+            sizes.append(mo.stat().st_size)
+            with open(mo, "rb") as f:
+                assert gettext.GNUTranslations(f).gettext("button 7") == "Annuler"
+        report = json.loads((dist / ".hatch-msgfmt" / "report.json").read_text())
+        assert report["catalogs"][0]["decision"] == "compiled"
+        assert report["totals"]["deduped_bytes"] == sizes[0] - sizes[1] == 19 * 8
+        # noinspection PyUnresolvedReferences
+        hook.app.display_debug.assert_any_call("Deduplication saved 152 byte(s)")
+        # noinspection PyUnresolvedReferences
+        hook.app.display_warning.assert_not_called()
+
+        # a catalog compiled in streaming mode is not deduplicated
+        mo.unlink()
+        config["streaming_threshold"] = 0
+        hook = build_hook(config, directory=dist, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        assert mo.stat().st_size == sizes[0]
+        # noinspection PyUnresolvedReferences
+        hook.app.display_warning.assert_called_once_with(
+            "locale/fr/LC_MESSAGES/foo.mo compiled in streaming mode: not deduplicated"
+        )
+
+    def test_parse_cache(self, messages, tmp_path) -> None:
+        """
+        Ensures that the parse cache only parses the edited entries of a
+        rebuild, which gives the same .mo file as a full parse, and that
+        turning it off recompiles the catalogs
+
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        """
+        po = messages / "foo-fr.po"
+        lines = ['msgid ""', 'msgstr "Content-Type: text/plain; charset=UTF-8\\n"']
+        for i in range(20):
+            lines += ["", f'msgid "button {i}"', f'msgstr "Bouton {i}"']
+        po.write_text("\n".join(lines) + "\n")
+        mo = messages.parent / "locale" / "fr" / "LC_MESSAGES" / "foo.mo"
+        cache = tmp_path / "parse"
+        config = {"domain": "foo", "parse_cache": str(cache), "jobs": 1}
+        hook = build_hook(config, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        assert len(list(cache.iterdir())) == 1
+        po.write_text(po.read_text().replace("Bouton 7", "Bouton sept"))
+        hook = build_hook(config, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        hook.app.display_debug.assert_any_call(
+            f"Parse cache {cache}: 2 block(s) parsed, 19 reused"
+        )
+        cached = mo.read_bytes()
+        # turning the cache off compiles again with a full parse
+        hook = build_hook({"domain": "foo", "jobs": 1}, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        assert not any(
+            "up to date" in str(c) for c in hook.app.display_debug.call_args_list
+        )
+        assert mo.read_bytes() == cached
+        with open(mo, "rb") as f:
+            assert gettext.GNUTranslations(f).gettext("button 7") == "Bouton sept"
+
+    def test_environ(self, data_dir, messages, tmp_path, monkeypatch) -> None:
+        """
+        Ensures that the environment overrides the report option and that
+        a report path is relative to the project root
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        :param monkeypatch: the pytest monkeypatch fixture
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        monkeypatch.setenv("HATCH_MSGFMT_REPORT", "build/report.json")
+        hook = build_hook({"domain": "foo", "report": False}, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        assert (messages.parent / "build" / "report.json").exists()
+        monkeypatch.setenv("HATCH_MSGFMT_REPORT", "0")
+        hook = build_hook({"domain": "foo", "report": True}, root=messages.parent)
+        hook.build_conf()
+        assert hook.report is None
+
+    def test_failed(self, messages, tmp_path) -> None:
+        """
+        Ensures that the report is written even when the build aborts
+
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        """
+        (messages / "foo-fr.po").write_bytes(b'msgid "x"\nmsgstr "unterminated\n')
+        dist = tmp_path / "dist"
+        hook = build_hook({"domain": "foo", "report": "true"}, directory=dist,
+                          root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        hook.app.abort.assert_called_once()
+        report = json.loads((dist / ".hatch-msgfmt" / "report.json").read_text())
+        assert report["catalogs"][0]["decision"] == "failed"
+        assert "foo-fr.po" in report["catalogs"][0]["error"]
+
+    def test_profile(self, data_dir, messages, tmp_path) -> None:
+        """
+        Ensures that the profiling switch writes a cProfile output
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        """
+        import pstats
+
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        dist = tmp_path / "dist"
+        build_hook({"domain": "foo", "profile": True, "jobs": 1}, directory=dist,
+                   root=messages.parent).initialize("standard", {"force_include": {}})
+        stats = pstats.Stats(str(dist / ".hatch-msgfmt" / "profile.pstats"))
+        assert any(func[2] == "compile_all" for func in stats.stats)
+
+
+class TestStaging:
+    """
+    Tests for the compilation in a per-build staging folder
+    """
+
+    def test_staged(self, data_dir, messages, locale, tmp_path) -> None:
+        """
+        Ensures that the .mo files are staged under the build directory,
+        mapped in force_include and removed by finalize
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        :param tmp_path: a folder for temporary files
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        dist = tmp_path / "dist"
+        hook = build_hook({"domain": "foo", "staging": True}, directory=dist,
+                          root=messages.parent)
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        assert not list(locale.rglob("*.mo"))
+        (staged, dest), = build_data["force_include"].items()
+        assert dest == "locale/fr/LC_MESSAGES/foo.mo"
+        assert Path(staged).parent.parent.parent == hook.staged
+        assert hook.staged.parent == dist / ".hatch-msgfmt" / "staging"
+        assert Path(staged).read_bytes() == compiler.compile_catalog(
+            [data_dir / "foo-fr.po"]
+        )
+        assert not list(Path(staged).parent.glob("*.tmp"))
+        staged_dir = hook.staged
+        hook.finalize("standard", build_data, str(dist / "foo.whl"))
+        assert not staged_dir.exists()
+        assert not (dist / ".hatch-msgfmt" / "staging").exists()
+
+    def test_concurrent(self, data_dir, messages, tmp_path) -> None:
+        """
+        Ensures that concurrent builds use distinct staging folders, and
+        that clean only removes the ones of the interrupted builds
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        dist = tmp_path / "dist"
+        hooks = [
+            build_hook({"domain": "foo", "staging": True}, directory=dist,
+                       root=messages.parent)
+            for _ in range(2)
+        ]
+        data = [{"force_include": {}} for _ in hooks]
+        for hook, build_data in zip(hooks, data):
+            hook.initialize("standard", build_data)
+        assert hooks[0].staged != hooks[1].staged
+        hooks[0].finalize("standard", data[0], "")
+        assert all(Path(f).exists() for f in data[1]["force_include"])
+        # clean only removes the leftovers of interrupted builds
+        staging = dist / ".hatch-msgfmt" / "staging"
+        dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                              capture_output=True, text=True, check=True).stdout
+        (staging / f"locale-{dead.strip()}-abc").mkdir()
+        old = staging / f"locale-{os.getpid()}-old"
+        old.mkdir()
+        os.utime(old, (0, 0))
+        hooks[1].clean(["standard"])
+        assert list(staging.iterdir()) == [hooks[1].staged]
+        hooks[1].finalize("standard", data[1], "")
+        assert not staging.exists()
+
+    def test_editable(self, data_dir, messages, locale, tmp_path) -> None:
+        """
+        Ensures that an editable build compiles into the locale folder
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        :param tmp_path: a folder for temporary files
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        hook = build_hook({"domain": "foo", "staging": True},
+                          directory=tmp_path / "dist", root=messages.parent)
+        build_data = {"force_include": {}}
+        hook.initialize("editable", build_data)
+        assert hook.staged is None
+        assert (locale / "fr" / "LC_MESSAGES" / "foo.mo").exists()
+        assert build_data["force_include"] == {
+            "locale/fr/LC_MESSAGES/foo.mo": "locale/fr/LC_MESSAGES/foo.mo"
+        }
+
+    def test_atomic(self, tmp_path) -> None:
+        """
+        Ensures that a failed write leaves neither a truncated file nor a
+        temporary file
+
+        :param tmp_path: a folder for temporary files
+        """
+        mo = tmp_path / "foo.mo"
+        mo.write_bytes(b"old")
+        with patch("os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                compiler.write_if_changed(mo, b"new content")
+        assert mo.read_bytes() == b"old"
+        assert list(tmp_path.iterdir()) == [mo]
+        assert compiler.write_if_changed(mo, b"new content")
+        assert mo.read_bytes() == b"new content"
+
+
+class TestBundle:
+    """
+    Tests for the bundle output
+    """
+
+    def test_bundle(self, data_dir, messages, locale) -> None:
+        """
+        Ensures that the bundle replaces the .mo files in the wheel, is only
+        rebuilt when a catalog changes and is removed by clean
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        """
+        from hatch_msgfmt.bundle import Bundle
+
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        shutil.copy(data_dir / "foo-fr.po", messages / "bar-de.po")
+        config = {"domain": "foo", "bundle": True}
+        hook = build_hook(dict(config), root=messages.parent)
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        assert build_data["force_include"] == {
+            "locale/catalogs.bundle": "locale/catalogs.bundle"
+        }
+        path = locale / "catalogs.bundle"
+        b = Bundle(path)
+        assert b.catalogs() == [("de", "bar"), ("fr", "foo")]
+        assert b.read("fr", "foo") == (
+            locale / "fr" / "LC_MESSAGES" / "foo.mo"
+        ).read_bytes()
+        mtime = path.stat().st_mtime_ns
+        hook = build_hook(dict(config), root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        assert path.stat().st_mtime_ns == mtime
+        with open(messages / "bar-de.po", "a") as f:
+            f.write('\nmsgid "new"\nmsgstr "neu"\n')
+        hook.initialize("standard", {"force_include": {}})
+        assert Bundle(path).translation("bar", ["de"]).gettext("new") == "neu"
+        hook.clean(["standard"])
+        assert not list(locale.rglob("*"))
+
+    def test_staged(self, data_dir, messages, tmp_path) -> None:
+        """
+        Ensures that a named bundle is staged with the .mo files
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        hook = build_hook(
+            {"domain": "foo", "bundle": "all.bundle", "staging": True},
+            directory=tmp_path / "dist", root=messages.parent,
+        )
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        assert build_data["force_include"] == {
+            str(hook.staged / "all.bundle"): "locale/all.bundle"
+        }
+        assert (hook.staged / "all.bundle").exists()
+
+
+class TestSdist:
+    """
+    Tests for the precompiled catalogs shipped in an sdist
+    """
+
+    def test_sdist(self, data_dir, messages, tmp_path) -> None:
+        """
+        Ensures that an sdist ships the .mo files with a manifest that lets
+        the wheel reuse them, unless a source was modified
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param tmp_path: a folder for temporary files
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        config = {"domain": "foo", "sdist": True, "jobs": 1}
+        hook = build_hook(dict(config), "sdist", tmp_path / "dist", messages.parent)
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        shipped = hook.exported / MANIFEST_NAME
+        assert build_data["force_include"] == {
+            "locale/fr/LC_MESSAGES/foo.mo": "locale/fr/LC_MESSAGES/foo.mo",
+            str(shipped): "locale/.hatch-msgfmt.json",
+        }
+        exported = json.loads(shipped.read_text())
+        assert exported["verify"] and exported["folders"] == []
+        assert list(exported["entries"]) == ["fr/LC_MESSAGES/foo.mo"]
+
+        # unpack the sdist elsewhere, with other mtimes
+        unpacked = tmp_path / "unpacked"
+        shutil.copytree(messages, unpacked / "messages")
+        mo = unpacked / "locale" / "fr" / "LC_MESSAGES" / "foo.mo"
+        mo.parent.mkdir(parents=True)
+        shutil.copy(messages.parent / "locale/fr/LC_MESSAGES/foo.mo", mo)
+        shutil.copy(shipped, unpacked / "locale" / MANIFEST_NAME)
+        hook.finalize("standard", build_data, "")
+        assert not shipped.exists()
+
+        hook = build_hook(dict(config), root=unpacked)
+        with patch("hatch_msgfmt.compiler.compile_catalog") as compile_catalog:
+            hook.initialize("standard", {"force_include": {}})
+            compile_catalog.assert_not_called()
+        # a modified source with the same size and mtime is detected
+        po = unpacked / "messages" / "foo-fr.po"
+        st = po.stat()
+        content = po.read_bytes()
+        po.write_bytes(content.replace(b"Language: fr", b"Language: FR"))
+        os.utime(po, ns=(st.st_atime_ns, st.st_mtime_ns))
+        hook = build_hook(dict(config), root=unpacked)
+        hook.initialize("standard", {"force_include": {}})
+        assert b"Language: FR" in mo.read_bytes()
+
+    def test_ignored(self, messages) -> None:
+        """
+        Ensures that the sdist target is still ignored without the option
+
+        :param messages: a messages folder
+        """
+        hook = build_hook({"domain": "foo"}, "sdist", root=messages.parent)
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        assert build_data["force_include"] == {}
+        # noinspection PyUnresolvedReferences
+        hook.app.display_warning.assert_called()
+
+
+class TestMergeFallbacks:
+    """
+    Tests for the regional catalogs merged with their base language
+    """
+
+    @staticmethod
+    def po(charset: str, **messages: str) -> str:
+        """
+        The content of a .po file
+
+        :param charset: the charset declared in its header
+        :param messages: the translations by msgid
+        :return: the content of the file
+        """
+        lines = ['msgid ""', f'msgstr "Content-Type: text/plain; charset={charset}\\n"']
+        for msgid, msgstr in messages.items():
+            lines += [f'msgid "{msgid}"', f'msgstr "{msgstr}"']
+        return "\n".join(lines) + "\n"
+
+    def test_merge(self, messages, locale) -> None:
+        """
+        Ensures that a regional catalog contains its base one with its own
+        overrides and header, and is compiled again when the base changes
+
+        :param messages: a messages folder
+        :param locale: the locale folder
+        """
+        (messages / "app-fr.po").write_text(
+            self.po("UTF-8", yes="oui", car="voiture"), encoding="utf-8"
+        )
+        (messages / "app-fr_CA.po").write_text(
+            self.po("utf8", car="char"), encoding="utf-8"
+        )
+        (messages / "app-de_AT.po").write_text(self.po("UTF-8", yes="ja"))
+        config = {"domain": "app", "merge_fallbacks": True, "jobs": 1}
+        hook = build_hook(dict(config), root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        with open(locale / "fr_CA" / "LC_MESSAGES" / "app.mo", "rb") as f:
+            t = gettext.GNUTranslations(f)
+        assert (t.gettext("yes"), t.gettext("car")) == ("oui", "char")
+        assert t.info()["content-type"] == "text/plain; charset=utf8"
+        with open(locale / "fr" / "LC_MESSAGES" / "app.mo", "rb") as f:
+            assert gettext.GNUTranslations(f).gettext("car") == "voiture"
+        manifest = json.loads((locale / MANIFEST_NAME).read_text())
+        assert [s["path"] for s in manifest["entries"][
+            "fr_CA/LC_MESSAGES/app.mo"]["sources"]] == [
+            "messages/app-fr.po", "messages/app-fr_CA.po"
+        ]
+        assert len(manifest["entries"]["de_AT/LC_MESSAGES/app.mo"]["sources"]) == 1
+
+        (messages / "app-fr.po").write_text(self.po("UTF-8", yes="ouais"))
+        hook = build_hook(dict(config), root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        with open(locale / "fr_CA" / "LC_MESSAGES" / "app.mo", "rb") as f:
+            assert gettext.GNUTranslations(f).gettext("yes") == "ouais"
+
+    def test_charset(self, messages) -> None:
+        """
+        Ensures that catalogs of different charsets are not merged
+
+        :param messages: a messages folder
+        """
+        (messages / "app-pt.po").write_text(self.po("UTF-8", yes="sim"))
+        (messages / "app-pt_BR.po").write_text(self.po("ISO-8859-1", no="n\xe3o"),
+                                               encoding="latin-1")
+        hook = build_hook({"domain": "app", "merge_fallbacks": True, "jobs": 1},
+                          root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        message = hook.app.abort.call_args[0][0]
+        assert "charset iso8859-1 differs from utf-8" in message
+
+
+class TestFragments:
+    """
+    Tests for the catalogs compiled from many fragments
+    """
+
+    @staticmethod
+    def write(path: Path, **messages: str) -> None:
+        """
+        Write a UTF-8 .po file and its parent folders
+
+        :param path: the .po file
+        :param messages: the translations by msgid
+        """
+        lines = ['msgid ""', 'msgstr "Content-Type: text/plain; charset=UTF-8\\n"']
+        for msgid, msgstr in messages.items():
+            lines += [f'msgid "{msgid}"', f'msgstr "{msgstr}"']
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def test_group(self, messages, locale) -> None:
+        """
+        Ensures that the fragments of a folder give a single catalog, that
+        the keys repeated across fragments are reported and that a change
+        only recompiles the catalog of the fragment
+
+        :param messages: a messages folder
+        :param locale: the locale folder
+        """
+        app = messages / "fr" / "LC_MESSAGES" / "app"
+        self.write(app / "menu.po", open="ouvrir", yes="oui")
+        self.write(app / "dialogs.po", cancel="annuler", yes="ouais")
+        self.write(messages / "fr" / "LC_MESSAGES" / "lib" / "core.po", no="non")
+        config = {"domain": "app", "fragments": True, "jobs": 1}
+        hook = build_hook(dict(config), root=messages.parent)
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        assert sorted(build_data["force_include"].values()) == [
+            "locale/fr/LC_MESSAGES/app.mo", "locale/fr/LC_MESSAGES/lib.mo"
+        ]
+        with open(locale / "fr" / "LC_MESSAGES" / "app.mo", "rb") as f:
+            t = gettext.GNUTranslations(f)
+        assert [t.gettext(m) for m in ("open", "cancel", "yes")] == [
+            "ouvrir", "annuler", "oui"
+        ]
+        warnings = [c[0][0] for c in hook.app.display_warning.call_args_list]
+        assert len(warnings) == 1
+        assert "'yes' already translated in" in warnings[0]
+        assert warnings[0].startswith(str(app / "menu.po"))
+        manifest = json.loads((locale / MANIFEST_NAME).read_text())
+        assert [s["path"] for s in manifest["entries"][
+            "fr/LC_MESSAGES/app.mo"]["sources"]] == [
+            "messages/fr/LC_MESSAGES/app/dialogs.po",
+            "messages/fr/LC_MESSAGES/app/menu.po",
+        ]
+
+        self.write(app / "menu.po", open="ouvrir")
+        hook = build_hook(dict(config), root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        debug = [c[0][0] for c in hook.app.display_debug.call_args_list]
+        assert "locale/fr/LC_MESSAGES/lib.mo is up to date" in debug
+        assert any(d.startswith("Compiling") and "app.mo" in d for d in debug)
+        hook.app.display_warning.assert_not_called()
+
+    def test_rule(self, messages, locale) -> None:
+        """
+        Ensures that a mapping rule gives the domains and that the domains
+        allow-list applies to them
+
+        :param messages: a messages folder
+        :param locale: the locale folder
+        """
+        self.write(messages / "de" / "ui-menu.po", open="\xf6ffnen")
+        self.write(messages / "de" / "ui-dialogs.po", cancel="abbrechen")
+        self.write(messages / "de" / "help.po", help="Hilfe")
+        hook = build_hook(
+            {"domain": "app", "fragments": {"ui-*.po": "ui"}, "domains": ["ui"],
+             "jobs": 1},
+            root=messages.parent,
+        )
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        assert list(build_data["force_include"].values()) == [
+            "locale/de/LC_MESSAGES/ui.mo"
+        ]
+        with open(locale / "de" / "LC_MESSAGES" / "ui.mo", "rb") as f:
+            t = gettext.GNUTranslations(f)
+        assert (t.gettext("open"), t.gettext("cancel")) == ("\xf6ffnen", "abbrechen")
+
+
+class TestPlurals:
+    """
+    Tests for the validation and the precompilation of the plural forms
+    """
+
+    @staticmethod
+    def write(path: Path, plural_forms: str) -> None:
+        """
+        Write a .po file with a Plural-Forms header
+
+        :param path: the .po file
+        :param plural_forms: the value of the Plural-Forms header
+        """
+        path.write_text(
+            'msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n'
+            f'"Plural-Forms: {plural_forms}\\n"\n'
+            'msgid "file"\nmsgid_plural "files"\n'
+            'msgstr[0] "fichier"\nmsgstr[1] "fichiers"\n'
+        )
+
+    def test_invalid(self, messages) -> None:
+        """
+        Ensures that a malformed Plural-Forms fails the build
+
+        :param messages: a messages folder
+        """
+        self.write(messages / "app-fr.po", "nplurals=2; plural=(n > 1;")
+        hook = build_hook({"domain": "app", "jobs": 1}, root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        message = hook.app.abort.call_args[0][0]
+        assert "app-fr.po: invalid plural expression '(n > 1'" in message
+
+    @pytest.mark.parametrize("threshold", [None, 0])
+    def test_range(self, messages, threshold) -> None:
+        """
+        Ensures that the catalogs are checked for the configured range of n,
+        in memory and in streaming mode
+
+        :param messages: a messages folder
+        :param threshold: the streaming threshold (MiB)
+        """
+        # a form out of range for n > 50 only
+        self.write(messages / "app-fr.po", "nplurals=2; plural=(n > 50 ? 2 : n > 1);")
+        config = {"domain": "app", "jobs": 1, "plurals_range": 20}
+        if threshold is not None:
+            config["streaming_threshold"] = threshold
+        hook = build_hook(dict(config), root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        hook.app.abort.assert_not_called()
+        # a larger range is a new configuration: the catalog is checked again
+        hook = build_hook(dict(config, plurals_range=100), root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        assert "gives form 2 for n=51" in hook.app.abort.call_args[0][0]
+
+    def test_module(self, messages, locale, monkeypatch) -> None:
+        """
+        Ensures that the module of the precompiled plural forms is written
+        in the wheel, and only again when a catalog changes
+
+        :param messages: a messages folder
+        :param locale: the locale folder
+        :param monkeypatch: the pytest monkeypatch fixture
+        """
+        self.write(messages / "app-fr.po", "nplurals=2; plural=(n > 1);")
+        self.write(messages / "app-de.po", "nplurals=2; plural=(n != 1);")
+        config = {"domain": "app", "plurals": "pkg/_plurals.py", "plurals_range": 20,
+                  "jobs": 1}
+        build_data = {"force_include": {}}
+        build_hook(dict(config), root=messages.parent).initialize(
+            "standard", build_data
+        )
+        module = locale / plurals.PLURALS_NAME
+        assert build_data["force_include"][str(module)] == "pkg/_plurals.py"
+        tables = runpy.run_path(str(module))["TABLES"]
+        assert tables == {"(n > 1)": (2, bytes([0, 0] + [1] * 18)),
+                          "(n != 1)": (2, bytes([1, 0] + [1] * 18))}
+        mtime = module.stat().st_mtime_ns
+
+        # without the stamp, the module is checked against the manifest
+        (locale.parent / "dist" / OUTPUT_FOLDER / STAMP_NAME).unlink()
+        hook = build_hook(dict(config), root=messages.parent)
+        hook.initialize("standard", {"force_include": {}})
+        # noinspection PyUnresolvedReferences
+        debug = [c[0][0] for c in hook.app.display_debug.call_args_list]
+        assert f"locale/{plurals.PLURALS_NAME} is up to date" in debug
+        assert module.stat().st_mtime_ns == mtime
+
+        monkeypatch.setattr(plurals, "_evaluators", {})
+        self.write(messages / "app-de.po", "nplurals=1; plural=0;")
+        build_hook(dict(config), root=messages.parent).initialize(
+            "standard", {"force_include": {}}
+        )
+        plurals.load(module)
+        assert plurals.evaluator("0").table == bytes(20)
+        assert "(n != 1)" not in plurals._evaluators
+
+
+class TestStamp:
+    """
+    Tests for the fast path of the builds with nothing to compile
+    """
+
+    def test_lazy_import(self) -> None:
+        """
+        Ensures that importing the hook does not import the compiler
+        """
+        code = (
+            "import sys, hatch_msgfmt.plugin\n"
+            "print(sorted(m for m in sys.modules if m.startswith('hatch_msgfmt')))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        for name in ("compiler", "streaming", "bundle", "mapped", "vendor.msgfmt"):
+            assert f"'hatch_msgfmt.{name}'" not in out
+
+    @staticmethod
+    def build(messages: Path, config: dict[str, Any]) -> tuple[MsgFmtBuildHook, dict]:
+        """
+        Build a wheel
+
+        :param messages: the messages folder
+        :param config: the hook configuration
+        :return: the hook and its build data
+        """
+        hook = build_hook(dict(config), root=messages.parent)
+        build_data = {"force_include": {}}
+        hook.initialize("standard", build_data)
+        return hook, build_data
+
+    def test_fast_path(self, data_dir, messages, locale) -> None:
+        """
+        Ensures that a build with a valid stamp neither walks the messages
+        folder nor compiles, and that a change invalidates the stamp
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        config = {"domain": "foo", "jobs": 1}
+        _, first = self.build(messages, config)
+        stamp = messages.parent / "dist" / OUTPUT_FOLDER / STAMP_NAME
+        assert stamp.is_file()
+        # the paths are relative to the root (and nothing is in the project)
+        assert all(
+            not os.path.isabs(p) for p in json.loads(stamp.read_text())["paths"]
+        )
+        assert not list(messages.parent.glob("locale/**/*stamp*"))
+        with patch("hatch_msgfmt.plugin.find_sources", side_effect=AssertionError):
+            hook, build_data = self.build(messages, config)
+        assert build_data == first
+        # noinspection PyUnresolvedReferences
+        assert hook.app.display_debug.call_args_list[-1][0][0] == (
+            "Nothing to compile: the stamp is valid"
+        )
+
+        def compiled(cfg: dict[str, Any]) -> bool:
+            hook, _ = self.build(messages, cfg)
+            # noinspection PyUnresolvedReferences
+            debug = [c[0][0] for c in hook.app.display_debug.call_args_list]
+            return "Nothing to compile: the stamp is valid" not in debug
+
+        assert compiled(dict(config, hash_table=False))
+        assert compiled(config)  # and back
+        assert not compiled(config)
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-de.po")
+        assert compiled(config)
+        (locale / "de" / "LC_MESSAGES" / "foo.mo").unlink()
+        assert compiled(config)
+        po = messages / "foo-fr.po"
+        st = po.stat()
+        po.write_text(po.read_text() + "\n")
+        os.utime(po, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert compiled(config)
+        assert not compiled(config)
+
+    def test_manifest(self, data_dir, messages, locale, tmp_path) -> None:
+        """
+        Ensures that a stamp is not trusted when the manifest is another one
+        (for example the one of an sdist unpacked over the project) or when
+        the project has moved
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        :param tmp_path: a folder for temporary files
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        config = {"domain": "foo", "jobs": 1}
+        self.build(messages, config)
+        manifest = locale / MANIFEST_NAME
+        st = manifest.stat()
+        data = json.loads(manifest.read_text())
+        data["verify"] = True
+        manifest.write_text(json.dumps(data).ljust(st.st_size))
+        os.utime(manifest, ns=(st.st_atime_ns, st.st_mtime_ns))
+        hook, _ = self.build(messages, config)
+        # noinspection PyUnresolvedReferences
+        debug = [c[0][0] for c in hook.app.display_debug.call_args_list]
+        assert "Nothing to compile: the stamp is valid" not in debug
+
+        moved = tmp_path / "moved"
+        shutil.copytree(messages.parent, moved)
+        hook, _ = self.build(moved / "messages", config)
+        assert hook.stamp != self.build(messages, config)[0].stamp
+        # noinspection PyUnresolvedReferences
+        debug = [c[0][0] for c in hook.app.display_debug.call_args_list]
+        assert "Nothing to compile: the stamp is valid" not in debug
+
+    def test_not_stamped(self, data_dir, messages, locale) -> None:
+        """
+        Ensures that the staged and the reported builds always run in full
+
+        :param data_dir: the tests/data folder containing a .po file
+        :param messages: a messages folder
+        :param locale: the locale folder
+        """
+        shutil.copy(data_dir / "foo-fr.po", messages / "foo-fr.po")
+        self.build(
+            messages, {"domain": "foo", "jobs": 1, "report": str(locale.parent / "r.json")}
+        )
+        assert not (locale.parent / "dist" / OUTPUT_FOLDER / STAMP_NAME).exists()
+        hook, build_data = self.build(
+            messages, {"domain": "foo", "jobs": 1, "staging": str(locale.parent / "st")}
+        )
+        assert hook.stamp is None
+        hook.finalize("standard", build_data, "")
@@ -0,0 +1,153 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the validation and the precompilation of the
+plural forms.
+"""
+
+import gettext
+import io
+
+import pytest
+
+from hatch_msgfmt import plurals
+from hatch_msgfmt.mapped import MappedTranslations
+from hatch_msgfmt.vendor import msgfmt
+
+POLISH = (
+    "nplurals=3; plural=(n==1 ? 0 : n%10>=2 && n%10<=4 &&"
+    " (n%100<10 || n%100>=20) ? 1 : 2);"
+)
+
+
+def catalog(plural_forms: str) -> bytes:
+    """
+    A .mo image with a plural entry
+
+    :param plural_forms: the value of the Plural-Forms header
+    :return: the content of the .mo file
+    """
+    return msgfmt.generate({
+        b"": f"Content-Type: text/plain; charset=UTF-8\nPlural-Forms: {plural_forms}\n"
+        .encode(),
+        b"file\0files": b"plik\0pliki\0plik\xc3\xb3w",
+    })
+
+
+@pytest.fixture
+def registry(monkeypatch) -> None:
+    """
+    A pytest fixture isolating the registered tables of a test
+    """
+    monkeypatch.setattr(plurals, "_evaluators", {})
+
+
+def test_check() -> None:
+    """
+    Ensures that a valid value gives its table
+    """
+    nplurals, expression, table = plurals.check(POLISH, 30)
+    assert nplurals == 3
+    func = gettext.c2py(expression)
+    assert list(table) == [func(n) for n in range(30)]
+    assert plurals.header_value(b"Language: pl\nplural-forms : x=1\n") == "x=1"
+    assert plurals.check_header(b"Language: pl\n") is None
+
+
+@pytest.mark.parametrize(
+    "value, message",
+    [
+        ("nplurals=2;", "no plural expression"),
+        ("nplural=2; plural=(n != 1);", "invalid nplurals"),
+        ("nplurals=two; plural=(n != 1);", "invalid nplurals"),
+        ("nplurals=0; plural=0;", "out of range"),
+        ("nplurals=2; plural=(n != 1;", "invalid plural expression"),
+        ("nplurals=2; plural=n % 0;", "invalid plural expression"),
+        ("nplurals=2; plural=n;", "gives form 2 for n=2"),
+    ],
+)
+def test_invalid(value, message) -> None:
+    """
+    Ensures that the malformed values are rejected
+    """
+    with pytest.raises(ValueError, match=message):
+        plurals.check(value)
+
+
+def test_module(tmp_path, registry) -> None:
+    """
+    Ensures that a generated module registers evaluators giving the results
+    of the compiled expressions, in and out of their tables
+    """
+    path = tmp_path / plurals.PLURALS_NAME
+    path.write_text(plurals.module_source(
+        [POLISH, "nplurals=2; plural=(n != 1);", POLISH], limit=50
+    ))
+    plurals.load(path)
+    expression = plurals.split(POLISH)[1]
+    evaluator = plurals.evaluator(expression)
+    assert isinstance(evaluator, plurals.Evaluator)
+    assert len(evaluator.table) == 50
+    func = gettext.c2py(expression)
+    assert [evaluator(n) for n in range(200)] == [func(n) for n in range(200)]
+    assert len(plurals._evaluators) == 2
+    assert not isinstance(plurals.evaluator("n > 1"), plurals.Evaluator)
+
+
+def test_translations(tmp_path, registry) -> None:
+    """
+    Ensures that PluralTranslations uses the registered evaluators for a
+    catalog and for its fallbacks loaded by gettext.translation
+    """
+    plurals.register({"(n != 1)": (2, b"\1\0\1")})
+    for lang, plural_forms in (("pl", POLISH), ("en", "nplurals=2; plural=(n != 1);")):
+        folder = tmp_path / lang / "LC_MESSAGES"
+        folder.mkdir(parents=True)
+        (folder / "app.mo").write_bytes(catalog(plural_forms))
+    t = gettext.translation(
+        "app", tmp_path, ["pl", "en"], class_=plurals.PluralTranslations
+    )
+    assert not isinstance(t.plural, plurals.Evaluator)
+    assert t.ngettext("file", "files", 5) == "plik\xf3w"
+    fallback = gettext.translation(
+        "app", tmp_path, ["en"], class_=plurals.PluralTranslations
+    )
+    assert isinstance(fallback.plural, plurals.Evaluator)
+    assert fallback.ngettext("x", "y", 1) == "x"
+
+
+def test_no_c2py(registry, monkeypatch) -> None:
+    """
+    Ensures that loading a catalog with PluralTranslations does not compile
+    a registered expression, and gives the catalog of GNUTranslations
+    """
+    plurals.register({plurals.split(POLISH)[1]: (3, plurals.check(POLISH)[2])})
+    data = catalog(POLISH)
+    expected = gettext.GNUTranslations(io.BytesIO(data))
+    calls = []
+    monkeypatch.setattr(gettext, "c2py", lambda e: calls.append(e))
+    t = plurals.PluralTranslations(io.BytesIO(data))
+    assert calls == []
+    assert t._catalog == expected._catalog
+    assert t.info() == expected.info()
+    assert t.charset() == expected.charset() == "UTF-8"
+    assert [t.ngettext("file", "files", n) for n in (1, 3, 5)] == [
+        "plik", "pliki", "plik\xf3w"
+    ]
+    with pytest.raises(OSError, match="Bad magic number"):
+        plurals.PluralTranslations(io.BytesIO(b"\0" * 28))
+
+
+def test_mapped(tmp_path, registry) -> None:
+    """
+    Ensures that MappedTranslations uses a registered table when loading
+    """
+    plurals.register({plurals.split(POLISH)[1]: (3, plurals.check(POLISH)[2])})
+    path = tmp_path / "pl.mo"
+    path.write_bytes(catalog(POLISH))
+    with MappedTranslations(path) as t:
+        assert isinstance(t.plural, plurals.Evaluator)
+        assert [t.ngettext("file", "files", n) for n in (1, 3, 5, 22, 1022)] == [
+            "plik", "pliki", "plik\xf3w", "pliki", "pliki"
+        ]
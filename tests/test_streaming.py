@@ -0,0 +1,153 @@
+#  SPDX-FileCopyrightText: 2025-present s-ball <s-ball@laposte.net>
+#  #
+#  SPDX-License-Identifier: MIT
+"""
+This pytest module tests the streaming compilation of large catalogs.
+"""
+
+import shutil
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from benchmarks.catalogs import po_content
+from hatch_msgfmt import compiler, streaming
+from hatch_msgfmt.vendor import msgfmt
+
+
+@pytest.fixture
+def data_dir() -> Path:
+    """
+    pytest fixtures returning the pathlib.Path of the tests/data folder
+
+    :return: the Path of the tests/data folder
+    """
+    return Path(__file__).parent / "data"
+
+
+def reference(sources: list[Path], hash_table: bool = True) -> bytes:
+    """
+    The output of the in-memory compiler
+
+    :param sources: the .po files
+    :param hash_table: generate the GNU hash table
+    :return: the content of the .mo file
+    """
+    return compiler.compile_catalog(sources, compiler.Options(hash_table))
+
+
+@pytest.mark.parametrize("charset", ["UTF-8", "KOI8-R"])
+@pytest.mark.parametrize("hash_table", [True, False])
+@pytest.mark.parametrize("run_size", [200, streaming.RUN_SIZE])
+def test_identical(tmp_path, charset, hash_table, run_size) -> None:
+    """
+    Ensures that the output is identical to the in-memory one, with one or
+    many sorted runs
+    """
+    po = tmp_path / "big.po"
+    po.write_bytes(po_content(500, seed=7, charset=charset, multiline=0.3))
+    mo = tmp_path / "big.mo"
+    stats = {}
+    streaming.compile_to_file([po], mo, hash_table, stats, run_size)
+    assert mo.read_bytes() == reference([po], hash_table)
+    assert stats["input_bytes"] == po.stat().st_size
+    messages = {}
+    msgfmt.process(str(po), messages)
+    assert stats["messages"] == len(messages)
+    # the temporary files are removed
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["big.mo", "big.po"]
+
+
+def test_duplicates(tmp_path) -> None:
+    """
+    Ensures that the last translation of a repeated key wins, inside a file
+    and across files, and that fuzzy and untranslated entries are skipped
+    """
+    first = tmp_path / "first.po"
+    first.write_bytes(
+        b'msgid "a"\nmsgstr "1"\n\nmsgid "b"\nmsgstr "2"\n\n'
+        b'msgid "a"\nmsgstr "3"\n\nmsgctxt "c"\nmsgid "a"\nmsgstr "4"\n'
+    )
+    second = tmp_path / "second.po"
+    second.write_bytes(
+        b'msgid "b"\nmsgstr "5"\n\n#, fuzzy\nmsgid "a"\nmsgstr "6"\n\n'
+        b'msgid "d"\nmsgstr ""\n'
+    )
+    mo = tmp_path / "x.mo"
+    stats = {}
+    streaming.compile_to_file([first, second], mo, stats=stats, run_size=1)
+    assert mo.read_bytes() == reference([first, second])
+    assert (stats["messages"], stats["fuzzy"]) == (3, 1)
+
+
+def test_empty(tmp_path) -> None:
+    """
+    Ensures that a catalog without any translation gives an empty .mo file
+    """
+    po = tmp_path / "empty.po"
+    po.write_bytes(b"# nothing\n")
+    mo = tmp_path / "empty.mo"
+    streaming.compile_to_file([po], mo)
+    assert mo.read_bytes() == reference([po])
+
+
+def test_memory(tmp_path) -> None:
+    """
+    Ensures that the peak memory does not grow with the size of the strings
+    """
+    po = tmp_path / "large.po"
+    value = "x" * 4000
+    with open(po, "w") as f:
+        for i in range(2000):
+            f.write(f'msgid "key {i}"\nmsgstr "{value} {i}"\n\n')
+    mo = tmp_path / "large.mo"
+    tracemalloc.start()
+    try:
+        streaming.compile_to_file([po], mo)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert mo.stat().st_size > 8_000_000
+    assert peak < 1_000_000
+    assert mo.read_bytes() == reference([po])
+
+
+def test_error(tmp_path) -> None:
+    """
+    Ensures that a missing source raises a MsgfmtError
+    """
+    with pytest.raises(msgfmt.MsgfmtError):
+        streaming.compile_to_file([tmp_path / "missing.po"], tmp_path / "x.mo")
+
+
+def test_charsets(tmp_path) -> None:
+    """
+    Ensures that catalogs of different charsets are not merged
+    """
+    sources = []
+    for charset in ("UTF-8", "KOI8-R"):
+        sources.append(tmp_path / f"{charset}.po")
+        sources[-1].write_bytes(po_content(10, charset=charset))
+    for compile_ in (streaming.compile_to_file, lambda s, _: reference(s)):
+        with pytest.raises(msgfmt.MsgfmtError, match="koi8-r differs from utf-8"):
+            compile_(sources, tmp_path / "x.mo")
+
+
+def test_job(tmp_path, data_dir) -> None:
+    """
+    Ensures that a job over the threshold is streamed, and that an
+    identical .mo file is not rewritten
+    """
+    po = tmp_path / "foo-fr.po"
+    shutil.copy(data_dir / "foo-fr.po", po)
+    mo = tmp_path / "foo.mo"
+    job = compiler.Job("fr/LC_MESSAGES/foo.mo", str(mo), [str(po)],
+                       streaming_threshold=0)
+    result = compiler.run_job(job)
+    assert result.error is None and result.written
+    assert mo.read_bytes() == reference([po])
+    assert result.digest == compiler.digest(mo.read_bytes())
+    assert result.stats["output_bytes"] == mo.stat().st_size
+    assert not compiler.run_job(job).written
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["foo-fr.po", "foo.mo"]